@@ -0,0 +1,152 @@
+"""
+Micro-benchmark of text cleaning and chunking on a large synthetic document.
+
+Compares the former four-pass clean_text plus list-based chunk_text with the
+single-pass streaming TextCleaner/TextChunker, reporting throughput and peak
+memory for each. Run from the repository root:
+
+    python -m benchmarks.bench_chunking --megabytes 50
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+import tracemalloc
+from typing import Callable, Iterable, Iterator, List, Tuple
+
+from src.utils import iter_text_chunks
+
+CHUNK_SIZE = 300
+OVERLAP = 100
+
+_WORDS = [
+    "retrieval", "augmented", "generation", "document", "embedding", "index",
+    "search", "hybrid", "vector", "lexical", "model", "context", "answer", "the",
+    "of", "and", "a", "to", "in", "is", "for", "on", "with", "as", "by",
+]  # fmt: skip
+
+
+def make_pages(megabytes: float, page_chars: int = 3000) -> List[str]:
+    """
+    Builds OCR-like page texts with line breaks, hyphenation and stray whitespace.
+
+    Args:
+        megabytes (float): Approximate total size of the text in megabytes.
+        page_chars (int): Approximate size of each page in characters.
+
+    Returns:
+        List[str]: The page texts.
+    """
+    rng = random.Random(0)
+    pages = []
+    total = 0
+    while total < megabytes * 1_000_000:
+        parts = []
+        length = 0
+        while length < page_chars:
+            word = rng.choice(_WORDS)
+            roll = rng.random()
+            if roll < 0.02 and len(word) > 3:
+                word = f"{word[:2]}-\n{word[2:]}"
+            separator = " "
+            if roll > 0.9:
+                separator = "\n"
+            elif roll > 0.88:
+                separator = "\n\n"
+            elif roll > 0.86:
+                separator = "  \t"
+            parts.append(word + separator)
+            length += len(word) + len(separator)
+        page = "".join(parts)
+        pages.append(page)
+        total += len(page)
+    return pages
+
+
+def legacy_chunks(pages: List[str]) -> List[str]:
+    """
+    Chunks the pages the way clean_text and chunk_text originally did.
+
+    Args:
+        pages (List[str]): The page texts.
+
+    Returns:
+        List[str]: The chunks.
+    """
+    text = "".join(pages)
+    text = re.sub(r"(\w+)-\n(\w+)", r"\1\2", text)
+    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
+    text = re.sub(r"\n+", "\n", text)
+    text = re.sub(r"[ \t]+", " ", text)
+    text = text.strip()
+    tokens = text.split(" ")
+    chunks = []
+    start = 0
+    while start < len(tokens):
+        chunks.append(" ".join(tokens[start : start + CHUNK_SIZE]))
+        start += CHUNK_SIZE - OVERLAP
+    return chunks
+
+
+def streaming_chunks(pages: List[str]) -> Iterator[str]:
+    """
+    Chunks the pages with the streaming cleaner and chunker.
+
+    Args:
+        pages (List[str]): The page texts.
+
+    Returns:
+        Iterator[str]: The chunks, produced lazily.
+    """
+    return iter_text_chunks(iter(pages), CHUNK_SIZE, OVERLAP)
+
+
+def measure(
+    run: Callable[[List[str]], Iterable[str]], pages: List[str]
+) -> Tuple[float, int, int]:
+    """
+    Consumes the chunks of one implementation without keeping them.
+
+    Args:
+        run (Callable[[List[str]], Iterable[str]]): The chunking implementation.
+        pages (List[str]): The page texts.
+
+    Returns:
+        Tuple[float, int, int]: Elapsed seconds, peak traced bytes and chunk count.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    count = sum(1 for _ in run(pages))
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, count
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--megabytes", type=float, default=20, help="size of the synthetic document"
+    )
+    args = parser.parse_args()
+
+    pages = make_pages(args.megabytes)
+    size_mb = sum(len(page) for page in pages) / 1e6
+    print(f"{len(pages)} pages, {size_mb:.1f} MB of text")
+
+    results = {}
+    for name, run in (("legacy", legacy_chunks), ("streaming", streaming_chunks)):
+        elapsed, peak, count = measure(run, pages)
+        results[name] = elapsed
+        print(
+            f"{name:>9}: {count} chunks in {elapsed:.2f}s "
+            f"({size_mb / elapsed:.1f} MB/s), peak memory {peak / 1e6:.1f} MB"
+        )
+    print(f"speed-up: {results['legacy'] / results['streaming']:.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,112 @@
+"""
+Import-time benchmark guarding the cold start of the Streamlit pages.
+
+Imports each module in a fresh interpreter, reports the best time over a few
+runs, and fails if a module exceeds the time budget or loads one of the heavy
+dependencies that should only be imported on first use. Run from the
+repository root:
+
+    python -m benchmarks.bench_import_time --budget 1.0
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+from typing import Any, Dict, List
+
+# Modules imported by the pages before any question is asked
+MODULES = [
+    "src.utils",
+    "src.chat",
+    "src.async_chat",
+    "src.warmup",
+    "src.pipeline",
+    "src.ocr",
+]
+
+# Dependencies that must stay unloaded until they are used
+HEAVY_MODULES = [
+    "torch",
+    "sentence_transformers",
+    "pytesseract",
+    "PIL",
+    "PyPDF2",
+    "opensearchpy",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+__import__(sys.argv[1])
+seconds = time.perf_counter() - start
+heavy = [name for name in sys.argv[2:] if name in sys.modules]
+print(json.dumps({"seconds": seconds, "heavy": heavy}))
+"""
+
+
+def measure(module: str, repeat: int) -> Dict[str, Any]:
+    """
+    Imports a module in fresh interpreters and records the fastest import.
+
+    Args:
+        module (str): Dotted module name.
+        repeat (int): Number of interpreters to start.
+
+    Returns:
+        Dict[str, Any]: 'seconds' and 'heavy' (heavy modules loaded), or 'error'.
+    """
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    best: Dict[str, Any] = {}
+    for _ in range(repeat):
+        process = subprocess.run(
+            [sys.executable, "-c", _PROBE, module, *HEAVY_MODULES],
+            cwd=root,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            lines = process.stderr.strip().splitlines()
+            return {"error": lines[-1] if lines else f"exit {process.returncode}"}
+        result = json.loads(process.stdout.strip().splitlines()[-1])
+        if not best or result["seconds"] < best["seconds"]:
+            best = result
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "--budget", type=float, default=1.0, help="maximum import time in seconds"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="runs per module")
+    parser.add_argument(
+        "modules", nargs="*", default=MODULES, help="modules to import"
+    )
+    args = parser.parse_args()
+
+    failures: List[str] = []
+    for module in args.modules:
+        result = measure(module, args.repeat)
+        if "error" in result:
+            print(f"{module:>16}: import failed: {result['error']}")
+            failures.append(module)
+            continue
+        status = "ok"
+        if result["heavy"]:
+            status = f"loads {', '.join(result['heavy'])}"
+        elif result["seconds"] > args.budget:
+            status = f"over budget of {args.budget:.2f}s"
+        if status != "ok":
+            failures.append(module)
+        print(f"{module:>16}: {result['seconds']:.3f}s  {status}")
+
+    if failures:
+        print(f"FAILED: {', '.join(failures)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,14 +3,13 @@ import os
  
 import streamlit as st
  
-from src.chat import (  # type: ignore
-    ensure_model_pulled,
-    generate_response_streaming,
-    get_embedding_model,
-)
-from src.ingestion import create_index, get_opensearch_client
-from src.constants import OLLAMA_MODEL_NAME, OPENSEARCH_INDEX
+from src.chat import generate_response_streaming  # type: ignore
+from src.async_chat import generate_response_streaming_async
+from src.constants import ASYNC_QUERY_PATH
+from src.history import ConversationHistory
+from src.retrieval import get_retrieval_backend
 from src.utils import setup_logging
+from src.warmup import warm_up
  
 # Initialize logger
 setup_logging()  # Configures logging for the application
@@ -159,12 +158,6 @@ def render_chatbot_page() -> None:
     if "temperature" not in st.session_state:
         st.session_state["temperature"] = 0.7
  
-    # OpenSearch client + index
-    with st.spinner("Connecting to OpenSearch..."):
-        client = get_opensearch_client()
-    create_index(client)
-    index_name = OPENSEARCH_INDEX  # noqa: F841 (kept for clarity/logging if needed)
- 
     # Sidebar controls
     st.session_state["use_hybrid_search"] = st.sidebar.checkbox(
         "Enable RAG mode", value=st.session_state["use_hybrid_search"]
@@ -199,19 +192,42 @@ def render_chatbot_page() -> None:
     
     logger.info("Sidebar configured with headers and footer.")
  
-    # Load models once
-    if "embedding_models_loaded" not in st.session_state:
+    # Retrieval backend + index (not needed without RAG), after the checkbox so
+    # enabling RAG connects on the same run
+    use_rag = st.session_state["use_hybrid_search"]
+    if use_rag:
+        with st.spinner("Connecting to the retrieval backend..."):
+            get_retrieval_backend().ensure_ready()
+ 
+    # Load models once; without RAG the embedding model is not needed yet
+    warm_up_key = "rag_models_loaded" if use_rag else "chat_model_loaded"
+    if warm_up_key not in st.session_state:
+        message = (
+            "Loading Embedding and Ollama models for Hybrid Search..."
+            if use_rag
+            else "Loading the Ollama model..."
+        )
         with model_loading_placeholder:
-            with st.spinner("Loading Embedding and Ollama models for Hybrid Search..."):
-                get_embedding_model()
-                ensure_model_pulled(OLLAMA_MODEL_NAME)
-                st.session_state["embedding_models_loaded"] = True
-        logger.info("Embedding model loaded.")
+            with st.spinner(message):
+                failed_steps = warm_up(use_rag)
         model_loading_placeholder.empty()
+        if failed_steps:
+            # Not marked as loaded, so the next rerun retries the failed steps
+            st.warning(
+                f"Could not load the {', '.join(failed_steps)}; "
+                "retrying on the next message."
+            )
+        else:
+            st.session_state[warm_up_key] = True
+            logger.info("Models warmed up.")
  
     # Chat history
     if "chat_history" not in st.session_state:
         st.session_state["chat_history"] = []
+    if "conversation" not in st.session_state:
+        st.session_state["conversation"] = ConversationHistory(
+            st.session_state["chat_history"]
+        )
  
     # Show history
     for message in st.session_state["chat_history"]:
@@ -230,12 +246,18 @@ def render_chatbot_page() -> None:
                 response_placeholder = st.empty()
                 response_text = ""
  
-                response_stream = generate_response_streaming(
+                generate = (
+                    generate_response_streaming_async
+                    if ASYNC_QUERY_PATH
+                    else generate_response_streaming
+                )
+                response_stream = generate(
                     prompt,
                     use_hybrid_search=st.session_state["use_hybrid_search"],
                     num_results=st.session_state["num_results"],
                     temperature=st.session_state["temperature"],
                     chat_history=st.session_state["chat_history"],
+                    conversation=st.session_state["conversation"],
                 )
  
             if response_stream is not None:
@@ -254,6 +276,8 @@ def render_chatbot_page() -> None:
             st.session_state["chat_history"].append(
                 {"role": "assistant", "content": response_text}
             )
+            # Summarizes older turns off the request path, ready for the next turn
+            st.session_state["conversation"].compact_in_background()
             logger.info("Response generated and displayed.")
  
  
@@ -3,17 +3,12 @@ import os
 import time
  
 import streamlit as st
-from PyPDF2 import PdfReader
- 
-from src.constants import OPENSEARCH_INDEX, TEXT_CHUNK_SIZE
-from src.embeddings import generate_embeddings, get_embedding_model
-from src.ingestion import (
-    bulk_index_documents,
-    create_index,
-    delete_documents_by_document_name,
-)
-from src.opensearch import get_opensearch_client
-from src.utils import chunk_text, setup_logging
+ 
+from src.catalog import list_documents
+from src.embeddings import get_embedding_model
+from src.pipeline import IngestionPipeline, update_document
+from src.retrieval import get_retrieval_backend
+from src.utils import setup_logging
  
 # Initialize logger
 setup_logging()  # Set up centralized logging configuration
@@ -184,7 +179,7 @@ st.sidebar.markdown(
 def render_upload_page() -> None:
     """
     Renders the document upload page for users to upload and manage PDFs.
-    Shows only the documents that are present in the OpenSearch index.
+    Shows only the documents that are present in the retrieval index.
     """
  
     st.title("Upload Documents")
@@ -203,41 +198,34 @@ def render_upload_page() -> None:
     UPLOAD_DIR = "uploaded_files"
     os.makedirs(UPLOAD_DIR, exist_ok=True)
  
-    # Initialize OpenSearch client
-    with st.spinner("Connecting to OpenSearch..."):
-        client = get_opensearch_client()
-    index_name = OPENSEARCH_INDEX
- 
-    # Ensure the index exists
-    create_index(client)
+    # Initialize the retrieval backend and ensure the index exists
+    with st.spinner("Connecting to the retrieval backend..."):
+        backend = get_retrieval_backend()
+        backend.ensure_ready()
  
     # Initialize or clear the documents list in session state
     st.session_state["documents"] = []
  
-    # Query OpenSearch to get the list of unique document names
-    query = {
-        "size": 0,
-        "aggs": {"unique_docs": {"terms": {"field": "document_name", "size": 10000}}},
-    }
-    response = client.search(index=index_name, body=query)
-    buckets = response["aggregations"]["unique_docs"]["buckets"]
-    document_names = [bucket["key"] for bucket in buckets]
-    logger.info("Retrieved document names from OpenSearch.")
+    # Get the list of unique document names in the index
+    document_names = backend.list_document_names()
  
-    # Load document information from the index
+    # Load document information from the catalog instead of re-parsing every PDF
+    catalog = list_documents()
     for document_name in document_names:
         file_path = os.path.join(UPLOAD_DIR, document_name)
-        if os.path.exists(file_path):
-            reader = PdfReader(file_path)
-            text = "".join([page.extract_text() for page in reader.pages])
-            st.session_state["documents"].append(
-                {"filename": document_name, "content": text, "file_path": file_path}
-            )
-        else:
-            st.session_state["documents"].append(
-                {"filename": document_name, "content": "", "file_path": None}
-            )
+        record = catalog.get(document_name)
+        if record is None:
+            logger.warning(f"File '{document_name}' is missing from the catalog.")
+        if not os.path.exists(file_path):
+            file_path = None
             logger.warning(f"File '{document_name}' does not exist locally.")
+        st.session_state["documents"].append(
+            {
+                "filename": document_name,
+                "char_count": record.char_count if record else 0,
+                "file_path": file_path,
+            }
+        )
  
     if "deleted_file" in st.session_state:
         st.success(
@@ -252,40 +240,46 @@ def render_upload_page() -> None:
  
     if uploaded_files:
         with st.spinner("Uploading and processing documents. Please wait..."):
+            files_to_ingest = []
+            failed = 0
             for uploaded_file in uploaded_files:
-                if uploaded_file.name in document_names:
-                    st.warning(
-                        f"The file '{uploaded_file.name}' already exists in the index."
-                    )
+                file_path = save_uploaded_file(uploaded_file)
+                if uploaded_file.name not in document_names:
+                    files_to_ingest.append((uploaded_file.name, file_path))
                     continue
  
-                file_path = save_uploaded_file(uploaded_file)
-                reader = PdfReader(file_path)
-                text = "".join([page.extract_text() for page in reader.pages])
-                chunks = chunk_text(text, chunk_size=TEXT_CHUNK_SIZE, overlap=100)
-                embeddings = generate_embeddings(chunks)
+                # Re-uploaded documents only have their changed chunks re-indexed
+                result = update_document(uploaded_file.name, file_path)
+                if result.error:
+                    st.error(
+                        f"Failed to update '{uploaded_file.name}': {result.error}"
+                    )
+                    failed += 1
+                else:
+                    st.info(
+                        f"Updated '{uploaded_file.name}': {result.added_chunks} chunks "
+                        f"added, {result.removed_chunks} removed."
+                    )
  
-                documents_to_index = [
-                    {
-                        "doc_id": f"{uploaded_file.name}_{i}",
-                        "text": chunk,
-                        "embedding": embedding,
-                        "document_name": uploaded_file.name,
-                    }
-                    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings))
-                ]
-                bulk_index_documents(documents_to_index)
+            for result in IngestionPipeline().run(files_to_ingest):
+                if result.error:
+                    st.error(
+                        f"Failed to index '{result.document_name}': {result.error}"
+                    )
+                    failed += 1
+                    continue
                 st.session_state["documents"].append(
                     {
-                        "filename": uploaded_file.name,
-                        "content": text,
-                        "file_path": file_path,
+                        "filename": result.document_name,
+                        "char_count": result.char_count,
+                        "file_path": result.file_path,
                     }
                 )
-                document_names.append(uploaded_file.name)
-                logger.info(f"File '{uploaded_file.name}' uploaded and indexed.")
+                document_names.append(result.document_name)
+                logger.info(f"File '{result.document_name}' uploaded and indexed.")
  
-        st.success("Files uploaded and indexed successfully!")
+        if not failed:
+            st.success("Files uploaded and indexed successfully!")
  
     if st.session_state["documents"]:
         st.markdown("### Uploaded Documents")
@@ -295,7 +289,7 @@ def render_upload_page() -> None:
                 with col1:
                     # Strong + readable filename text
                     st.markdown(
-                        f"**{idx}. {doc['filename']}** — {len(doc['content'])} characters extracted"
+                        f"**{idx}. {doc['filename']}** — {doc['char_count']} characters extracted"
                     )
                 with col2:
                     delete_button = st.button(
@@ -317,7 +311,7 @@ def render_upload_page() -> None:
                                 logger.error(
                                     f"File '{doc['filename']}' not found during deletion."
                                 )
-                        delete_documents_by_document_name(doc["filename"])
+                        backend.delete_documents_by_document_name(doc["filename"])
                         st.session_state["documents"].pop(idx - 1)
                         st.session_state["deleted_file"] = doc["filename"]
                         time.sleep(0.5)
@@ -0,0 +1,376 @@
+import asyncio
+import logging
+import threading
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    AsyncGenerator,
+    Awaitable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+import ollama
+
+from src.cache import get_index_generation
+from src.chat import (
+    answer_context_key,
+    is_first_turn,
+    lookup_cached_answer,
+    ollama_options,
+    prompt_history,
+    prompt_template,
+    replay_answer,
+    store_answer,
+)
+from src.constants import (
+    ANSWER_CACHE_ENABLED,
+    HYBRID_CANDIDATE_DEPTH,
+    HYBRID_FUSION_METHOD,
+    HYBRID_LEXICAL_WEIGHT,
+    HYBRID_VECTOR_WEIGHT,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_MODEL_NAME,
+    OPENSEARCH_HOST,
+    OPENSEARCH_INDEX,
+    OPENSEARCH_POOL_MAXSIZE,
+    OPENSEARCH_PORT,
+    OPENSEARCH_SEARCH_PIPELINE,
+    RERANK_ENABLED,
+    RETRIEVAL_BACKEND,
+    VECTOR_QUANTIZATION,
+)
+from src.context import assemble_context
+from src.embeddings import embed_query
+from src.fusion import fuse
+from src.history import ConversationHistory
+from src.opensearch import (
+    cache_results,
+    get_cached_results,
+    hybrid_query_body,
+    search_cache_key,
+)
+from src.quantization import (
+    EXACT_EMBEDDING_FIELD,
+    oversampled_k,
+    quantize,
+    rescore_hits,
+)
+from src.reranker import candidate_count, rerank
+from src.retrieval import get_retrieval_backend
+from src.utils import setup_logging
+
+# opensearchpy loads when the async clients are first created
+if TYPE_CHECKING:
+    from opensearchpy import AsyncOpenSearch
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Event loop running in a background thread, shared by all sessions, and the
+# clients bound to it
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_lock = threading.Lock()
+_async_client: Optional["AsyncOpenSearch"] = None
+_ollama_client: Optional[ollama.AsyncClient] = None
+
+
+def _get_event_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="async-chat-loop", daemon=True
+            ).start()
+        return _loop
+
+
+def _get_async_clients() -> Tuple["AsyncOpenSearch", ollama.AsyncClient]:
+    # Only called from coroutines on the background loop, so no lock is needed
+    global _async_client, _ollama_client
+    if _async_client is None:
+        from opensearchpy import AsyncOpenSearch
+
+        _async_client = AsyncOpenSearch(
+            hosts=[{"host": OPENSEARCH_HOST, "port": OPENSEARCH_PORT}],
+            http_compress=True,
+            timeout=30,
+            max_retries=3,
+            retry_on_timeout=True,
+            pool_maxsize=OPENSEARCH_POOL_MAXSIZE,
+        )
+        _ollama_client = ollama.AsyncClient()
+        logger.info("Async OpenSearch and Ollama clients initialized.")
+    assert _ollama_client is not None
+    return _async_client, _ollama_client
+
+
+async def _search(
+    client: "AsyncOpenSearch",
+    query: Dict[str, Any],
+    size: int,
+    exclude: Tuple[str, ...] = ("embedding", EXACT_EMBEDDING_FIELD),
+) -> Any:
+    body = {"_source": {"exclude": list(exclude)}, "query": query, "size": size}
+    response = await client.search(index=OPENSEARCH_INDEX, body=body)
+    return response["hits"]["hits"]
+
+
+async def aretrieve(query: str, top_k: int) -> List[Dict[str, Any]]:
+    """
+    Async counterpart of hybrid_search, with the same rankings and result cache.
+
+    Without a fusion method the hybrid query goes through the search pipeline,
+    exactly as in hybrid_search. With client-side fusion (or a quantized
+    index) the BM25 leg is sent while the query is still being embedded in a
+    worker thread, and the k-NN leg follows as soon as the embedding is ready.
+    Backends other than OpenSearch are searched in a worker thread once the
+    query is embedded.
+
+    Args:
+        query (str): The user's query.
+        top_k (int): Number of results to retrieve.
+
+    Returns:
+        List[Dict[str, Any]]: The fused search hits.
+    """
+    loop = asyncio.get_running_loop()
+    if RETRIEVAL_BACKEND != "opensearch":
+        backend = get_retrieval_backend()
+        query_embedding = await loop.run_in_executor(None, embed_query, query)
+        return await loop.run_in_executor(
+            None, backend.search, query, query_embedding, top_k
+        )
+
+    fusion = HYBRID_FUSION_METHOD
+    if fusion is None and VECTOR_QUANTIZATION is not None:
+        fusion = "minmax"
+    key = search_cache_key(query, top_k, fusion, HYBRID_CANDIDATE_DEPTH)
+    cached_hits = get_cached_results(key)
+    if cached_hits is not None:
+        logger.info(f"Async hybrid search for query '{query}' served from cache.")
+        return cached_hits
+
+    embedding_future = loop.run_in_executor(None, embed_query, query)
+    client, _ = _get_async_clients()
+    if fusion is None:
+        query_embedding = await embedding_future
+        response = await client.search(
+            index=OPENSEARCH_INDEX,
+            body=hybrid_query_body(query, query_embedding, top_k),
+            search_pipeline=OPENSEARCH_SEARCH_PIPELINE,
+        )
+        hits: List[Dict[str, Any]] = response["hits"]["hits"]
+    else:
+        depth = max(HYBRID_CANDIDATE_DEPTH or top_k, top_k)
+        lexical_task = asyncio.create_task(
+            _search(client, {"match": {"text": {"query": query}}}, depth)
+        )
+        try:
+            query_embedding = await embedding_future
+        except BaseException:
+            lexical_task.cancel()
+            raise
+        result_lists = await _agather_legs(
+            lexical_task,
+            _avector_leg(client, query_embedding, depth),
+        )
+        hits = fuse(
+            result_lists,
+            [HYBRID_LEXICAL_WEIGHT, HYBRID_VECTOR_WEIGHT],
+            top_k,
+            method=fusion,
+        )
+    logger.info(f"Async hybrid search completed for query '{query}'.")
+    cache_results(key, hits)
+    return hits
+
+
+async def _avector_leg(
+    client: "AsyncOpenSearch", query_embedding: List[float], depth: int
+) -> List[Dict[str, Any]]:
+    vector_k = oversampled_k(depth)
+    hits = await _search(
+        client,
+        {"knn": {"embedding": {"vector": quantize(query_embedding), "k": vector_k}}},
+        vector_k,
+        exclude=("embedding",),
+    )
+    if VECTOR_QUANTIZATION is not None:
+        hits = rescore_hits(hits, query_embedding, depth)
+    return list(hits)
+
+
+async def _agather_legs(
+    *legs: Awaitable[List[Dict[str, Any]]],
+) -> List[List[Dict[str, Any]]]:
+    # Both legs are always awaited; like _msearch_fused, a failed leg degrades
+    # to the other one, and the query fails only if every leg failed
+    results = await asyncio.gather(*legs, return_exceptions=True)
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if len(errors) == len(results):
+        raise errors[0]
+    result_lists: List[List[Dict[str, Any]]] = []
+    for leg, result in zip(("lexical", "vector"), results):
+        if isinstance(result, BaseException):
+            logger.error(f"Hybrid search {leg} leg failed: {result}")
+            result_lists.append([])
+        else:
+            result_lists.append(result)
+    return result_lists
+
+
+async def _aretrieve_reranked(query: str, top_k: int) -> List[Dict[str, Any]]:
+    hits = await aretrieve(query, candidate_count(top_k))
+    if not RERANK_ENABLED:
+        return hits
+    # The cross-encoder is CPU/GPU bound, so it runs off the event loop
+    return await asyncio.get_running_loop().run_in_executor(
+        None, rerank, query, hits, top_k
+    )
+
+
+async def agenerate_response_streaming(
+    query: str,
+    use_hybrid_search: bool,
+    num_results: int,
+    temperature: float,
+    chat_history: Optional[List[Dict[str, str]]] = None,
+    conversation: Optional[ConversationHistory] = None,
+) -> AsyncGenerator[Mapping[str, Any], None]:
+    """
+    Async counterpart of generate_response_streaming.
+
+    Retrieval runs on the shared event loop, overlapping the BM25 search with
+    embedding the query when fusing client-side; the Ollama model is already
+    loaded by the warm-up and kept alive. First questions are served from the semantic answer cache when possible.
+
+    Args:
+        query (str): The user's query.
+        use_hybrid_search (bool): Whether to use hybrid search for context.
+        num_results (int): The number of search results to include in the context.
+        temperature (float): The temperature for the response generation.
+        chat_history (Optional[List[Dict[str, str]]]): List of chat history messages.
+        conversation (Optional[ConversationHistory]): History manager over chat_history, if any.
+
+    Yields:
+        Mapping[str, Any]: Response chunks from Ollama.
+    """
+    chat_history = chat_history or []
+    context = ""
+    use_answer_cache = False
+
+    if use_hybrid_search:
+        logger.info("Performing async hybrid search.")
+        generation = get_index_generation()
+        search_results = await _aretrieve_reranked(query, num_results)
+
+        use_answer_cache = ANSWER_CACHE_ENABLED and is_first_turn(query, chat_history)
+        if use_answer_cache:
+            # Served from the query embedding cache filled during retrieval
+            query_embedding = await asyncio.get_running_loop().run_in_executor(
+                None, embed_query, query
+            )
+            context_key = answer_context_key(search_results, temperature)
+            cached_answer = lookup_cached_answer(
+                query_embedding, context_key, generation
+            )
+            if cached_answer is not None:
+                for chunk in replay_answer(cached_answer):
+                    yield chunk
+                return
+
+        context = assemble_context(search_results)
+
+    summary, history = prompt_history(query, chat_history, conversation)
+    messages = prompt_template(query, context, history, summary)
+
+    _, ollama_client = _get_async_clients()
+    logger.info("Streaming response from LLaMA model.")
+    stream = await ollama_client.chat(
+        model=OLLAMA_MODEL_NAME,
+        messages=messages,
+        stream=True,
+        options=ollama_options(temperature),
+        keep_alive=OLLAMA_KEEP_ALIVE,
+    )
+    parts = []
+    try:
+        async for chunk in stream:
+            parts.append(chunk.get("message", {}).get("content", ""))
+            yield chunk
+    finally:
+        # Releases the HTTP stream when the caller stops reading early
+        close = getattr(stream, "aclose", None)
+        if close is not None:
+            await close()
+    if use_answer_cache:
+        store_answer(query_embedding, context_key, generation, "".join(parts))
+
+
+def generate_response_streaming_async(
+    query: str,
+    use_hybrid_search: bool,
+    num_results: int,
+    temperature: float,
+    chat_history: Optional[List[Dict[str, str]]] = None,
+    conversation: Optional[ConversationHistory] = None,
+) -> Optional[Iterable[Mapping[str, Any]]]:
+    """
+    Runs agenerate_response_streaming on the shared event loop behind a plain generator.
+
+    Has the same interface as generate_response_streaming, so the chat page can
+    iterate over the result synchronously.
+
+    Args:
+        query (str): The user's query.
+        use_hybrid_search (bool): Whether to use hybrid search for context.
+        num_results (int): The number of search results to include in the context.
+        temperature (float): The temperature for the response generation.
+        chat_history (Optional[List[Dict[str, str]]]): List of chat history messages.
+        conversation (Optional[ConversationHistory]): History manager over chat_history, if any.
+
+    Returns:
+        Optional[Iterable[Mapping[str, Any]]]: A generator yielding response chunks, or None if an error occurs.
+    """
+    loop = _get_event_loop()
+    stream = agenerate_response_streaming(
+        query, use_hybrid_search, num_results, temperature, chat_history, conversation
+    )
+
+    async def anext_chunk() -> Mapping[str, Any]:
+        return await stream.__anext__()
+
+    def next_chunk() -> Mapping[str, Any]:
+        return asyncio.run_coroutine_threadsafe(anext_chunk(), loop).result()
+
+    # Wait for the first chunk here so errors surface like in the sync path
+    try:
+        first_chunk = next_chunk()
+    except StopAsyncIteration:
+        return iter(())
+    except ollama.ResponseError as e:
+        logger.error(f"Error during streaming: {e.error}")
+        return None
+
+    def chunks() -> Iterator[Mapping[str, Any]]:
+        try:
+            yield first_chunk
+            while True:
+                try:
+                    yield next_chunk()
+                except StopAsyncIteration:
+                    return
+        finally:
+            # A page that stops reading early (or an error) would otherwise
+            # leave the Ollama stream open on the background loop
+            asyncio.run_coroutine_threadsafe(stream.aclose(), loop).result()
+
+    return chunks()
@@ -0,0 +1,243 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Generic, Hashable, List, Optional, Tuple, TypeVar
+
+import numpy as np
+
+V = TypeVar("V")
+
+# (index generation, context key, unit query embedding, answer)
+_AnswerEntry = Tuple[int, Hashable, "np.ndarray[Any, Any]", str]
+
+# Incremented whenever the index changes, so cached results can be invalidated
+_index_generation = 0
+_generation_lock = threading.Lock()
+
+
+def get_index_generation() -> int:
+    """
+    Returns the current index generation of this process.
+
+    Returns:
+        int: Number of index changes seen so far.
+    """
+    with _generation_lock:
+        return _index_generation
+
+
+def bump_index_generation() -> int:
+    """
+    Marks the index as changed, invalidating results cached for earlier generations.
+
+    Returns:
+        int: The new index generation.
+    """
+    global _index_generation
+    with _generation_lock:
+        _index_generation += 1
+        return _index_generation
+
+
+class LRUCache(Generic[V]):
+    """
+    Thread-safe in-memory LRU cache with an optional time-to-live and hit statistics.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None) -> None:
+        """
+        Creates an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of entries before the least recently used is evicted.
+            ttl_seconds (Optional[float]): Lifetime of an entry in seconds, or None to never expire.
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """
+        Returns the cached value for key, or None if it is missing or expired.
+
+        Args:
+            key (Hashable): The cache key.
+
+        Returns:
+            Optional[V]: The cached value, if any.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl_seconds is not None and (
+                time.monotonic() - stored_at > self.ttl_seconds
+            ):
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: V) -> None:
+        """
+        Stores value under key, evicting the least recently used entry if full.
+
+        Args:
+            key (Hashable): The cache key.
+            value (V): The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        """
+        Removes all entries while keeping the statistics.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache statistics.
+
+        Returns:
+            Dict[str, float]: Entry count, hits, misses, evictions, expirations and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+class SemanticAnswerCache:
+    """
+    Thread-safe LRU cache of answers matched by query embedding similarity.
+
+    An entry is reused only for the same context key (e.g. the retrieved chunk
+    IDs) and index generation, and only if the cosine similarity between the
+    query embeddings reaches the threshold. Entries of older generations are
+    dropped on lookup.
+    """
+
+    def __init__(self, max_entries: int, threshold: float) -> None:
+        """
+        Creates an empty cache.
+
+        Args:
+            max_entries (int): Maximum number of answers before the least recently used is evicted.
+            threshold (float): Minimum cosine similarity for a cached answer to be reused.
+        """
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._next_id = 0
+        self._entries: "OrderedDict[int, _AnswerEntry]" = OrderedDict()
+
+    def get(
+        self, embedding: List[float], context_key: Hashable, generation: int
+    ) -> Optional[str]:
+        """
+        Returns the cached answer of the most similar matching query, if any.
+
+        Args:
+            embedding (List[float]): Embedding of the query.
+            context_key (Hashable): Key of the context the answer was generated from.
+            generation (int): Current index generation.
+
+        Returns:
+            Optional[str]: The cached answer, or None.
+        """
+        query = _unit(embedding)
+        with self._lock:
+            best_id, best_similarity = None, self.threshold
+            for entry_id, (entry_generation, key, vector, _) in list(
+                self._entries.items()
+            ):
+                if entry_generation != generation:
+                    del self._entries[entry_id]
+                    continue
+                if key != context_key:
+                    continue
+                similarity = float(vector @ query)
+                if similarity >= best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(best_id)
+            self.hits += 1
+            return self._entries[best_id][3]
+
+    def put(
+        self,
+        embedding: List[float],
+        context_key: Hashable,
+        generation: int,
+        answer: str,
+    ) -> None:
+        """
+        Stores an answer, evicting the least recently used entry if full.
+
+        Args:
+            embedding (List[float]): Embedding of the query.
+            context_key (Hashable): Key of the context the answer was generated from.
+            generation (int): Index generation the answer was generated against.
+            answer (str): The answer text.
+        """
+        with self._lock:
+            self._entries[self._next_id] = (
+                generation,
+                context_key,
+                _unit(embedding),
+                answer,
+            )
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the cache statistics.
+
+        Returns:
+            Dict[str, float]: Entry count, hits, misses, evictions and hit rate.
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
+
+
+def _unit(embedding: List[float]) -> np.ndarray[Any, Any]:
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm > 0 else vector
@@ -0,0 +1,125 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Dict, Iterator
+
+from src.constants import CATALOG_PATH
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DocumentRecord:
+    """Catalog entry describing an ingested document."""
+
+    document_name: str
+    file_path: str
+    sha256: str
+    size_bytes: int
+    page_count: int
+    char_count: int
+    chunk_count: int
+    ingested_at: float = field(default_factory=time.time)
+
+
+@contextmanager
+def _connect() -> Iterator[sqlite3.Connection]:
+    os.makedirs(os.path.dirname(CATALOG_PATH), exist_ok=True)
+    connection = sqlite3.connect(CATALOG_PATH)
+    try:
+        # Commits on success and rolls back on error
+        with connection:
+            connection.execute(
+                """
+                CREATE TABLE IF NOT EXISTS documents (
+                    document_name TEXT PRIMARY KEY,
+                    file_path TEXT NOT NULL,
+                    sha256 TEXT NOT NULL,
+                    size_bytes INTEGER NOT NULL,
+                    page_count INTEGER NOT NULL,
+                    char_count INTEGER NOT NULL,
+                    chunk_count INTEGER NOT NULL,
+                    ingested_at REAL NOT NULL
+                )
+                """
+            )
+            yield connection
+    finally:
+        connection.close()
+
+
+def file_sha256(file_path: str) -> str:
+    """
+    Computes the SHA-256 digest of a file without reading it into memory at once.
+
+    Args:
+        file_path (str): Path to the file.
+
+    Returns:
+        str: Hex-encoded SHA-256 digest.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def upsert_document(record: DocumentRecord) -> None:
+    """
+    Inserts or replaces a document's catalog entry.
+
+    Args:
+        record (DocumentRecord): The document's catalog entry.
+    """
+    with _connect() as connection:
+        connection.execute(
+            "INSERT OR REPLACE INTO documents VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                record.document_name,
+                record.file_path,
+                record.sha256,
+                record.size_bytes,
+                record.page_count,
+                record.char_count,
+                record.chunk_count,
+                record.ingested_at,
+            ),
+        )
+    logger.info(f"Catalog entry stored for '{record.document_name}'.")
+
+
+def delete_document(document_name: str) -> None:
+    """
+    Removes a document's catalog entry if present.
+
+    Args:
+        document_name (str): Name of the document to remove.
+    """
+    with _connect() as connection:
+        connection.execute(
+            "DELETE FROM documents WHERE document_name = ?", (document_name,)
+        )
+    logger.info(f"Catalog entry removed for '{document_name}'.")
+
+
+def list_documents() -> Dict[str, DocumentRecord]:
+    """
+    Returns all catalog entries.
+
+    Returns:
+        Dict[str, DocumentRecord]: Catalog entries keyed by document name.
+    """
+    with _connect() as connection:
+        rows = connection.execute(
+            "SELECT document_name, file_path, sha256, size_bytes, page_count, "
+            "char_count, chunk_count, ingested_at FROM documents"
+        ).fetchall()
+    return {row[0]: DocumentRecord(*row) for row in rows}
@@ -1,50 +1,80 @@
 import logging
-from typing import Dict, Iterable, List, Optional
+from typing import (
+    Any,
+    Dict,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
 
 import ollama
-import streamlit as st
 
-from src.constants import ASSYMETRIC_EMBEDDING, OLLAMA_MODEL_NAME
-from src.embeddings import get_embedding_model
-from src.opensearch import hybrid_search
+from src.cache import SemanticAnswerCache, get_index_generation
+from src.constants import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_ENTRIES,
+    ANSWER_CACHE_SIMILARITY,
+    CHAT_HISTORY_MAX_MESSAGES,
+    OLLAMA_CONTEXT_WINDOW,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_MODEL_NAME,
+    RERANK_ENABLED,
+)
+from src.context import assemble_context
+from src.embeddings import embed_query
+from src.history import ConversationHistory
+from src.reranker import candidate_count, rerank
+from src.retrieval import get_retrieval_backend
 from src.utils import setup_logging
 
 # Initialize logger
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# System prompt opening every conversation, identical across turns and modes
+SYSTEM_PROMPT = (
+    "You are a knowledgeable chatbot assistant. Answer questions to the best of "
+    "your knowledge. When a question comes with context, use it to answer."
+)
 
-@st.cache_resource(show_spinner=False)
-def ensure_model_pulled(model: str) -> bool:
+# Process-wide cache of answers to first questions, shared by all sessions
+_answer_cache = SemanticAnswerCache(ANSWER_CACHE_MAX_ENTRIES, ANSWER_CACHE_SIMILARITY)
+
+
+def ollama_options(temperature: Optional[float] = None) -> Dict[str, Any]:
     """
-    Ensures that the specified model is pulled and available locally.
+    Returns the Ollama model options shared by every request.
+
+    All requests must use the same num_ctx, otherwise Ollama reloads the model
+    and discards its prompt cache.
 
     Args:
-        model (str): The name of the model to ensure is available.
+        temperature (Optional[float], optional): The response generation temperature, if generating.
 
     Returns:
-        bool: True if the model is available or successfully pulled, False if an error occurs.
+        Dict[str, Any]: Options for ollama.chat and ollama.generate.
     """
-    try:
-        available_models = ollama.list()
-        if model not in available_models:
-            logger.info(f"Model {model} not found locally. Pulling the model...")
-            ollama.pull(model)
-            logger.info(f"Model {model} has been pulled and is now available locally.")
-        else:
-            logger.info(f"Model {model} is already available locally.")
-    except ollama.ResponseError as e:
-        logger.error(f"Error checking or pulling model: {e.error}")
-        return False
-    return True
+    options: Dict[str, Any] = {"num_ctx": OLLAMA_CONTEXT_WINDOW}
+    if temperature is not None:
+        options["temperature"] = temperature
+    return options
 
 
-def run_llama_streaming(prompt: str, temperature: float) -> Optional[Iterable[str]]: 
+def run_llama_streaming(
+    messages: List[Dict[str, str]], temperature: float
+) -> Optional[Iterable[str]]:
     """
     Uses Ollama's Python library to run the LLaMA model with streaming enabled.
 
+    The model is kept loaded for OLLAMA_KEEP_ALIVE after the response, so the
+    next turn can reuse the cached prompt prefix.
+
     Args:
-        prompt (str): The prompt to send to the model.
+        messages (List[Dict[str, str]]): The chat messages from prompt_template.
         temperature (float): The response generation temperature.
 
     Returns:
@@ -56,9 +86,10 @@ def run_llama_streaming(prompt: str, temperature: float) -> Optional[Iterable[st
         logger.info("Streaming response from LLaMA model.")
         stream = ollama.chat(
             model=OLLAMA_MODEL_NAME,
-            messages=[{"role": "user", "content": prompt}],
+            messages=messages,
             stream=True,
-            options={"temperature": temperature},
+            options=ollama_options(temperature),
+            keep_alive=OLLAMA_KEEP_ALIVE,
         )
     except ollama.ResponseError as e:
         logger.error(f"Error during streaming: {e.error}")
@@ -67,39 +98,206 @@ def run_llama_streaming(prompt: str, temperature: float) -> Optional[Iterable[st
     return stream
 
 
-def prompt_template(query: str, context: str, history: List[Dict[str, str]]) -> str:
+def stable_history(
+    history: List[Dict[str, str]], max_messages: int = CHAT_HISTORY_MAX_MESSAGES
+) -> List[Dict[str, str]]:
     """
-    Builds the prompt with context, conversation history, and user query.
+    Limits the conversation history while keeping its start fixed between turns.
+
+    A sliding window changes the first message on every turn, which defeats
+    Ollama's prompt cache. Instead, the oldest messages are dropped in blocks of
+    whole turns, about half the window at a time, so the history only changes
+    at its start once every few turns.
+
+    Args:
+        history (List[Dict[str, str]]): Previous messages, oldest first.
+        max_messages (int, optional): Maximum messages to keep. Defaults to CHAT_HISTORY_MAX_MESSAGES.
+
+    Returns:
+        List[Dict[str, str]]: The most recent messages, at most max_messages.
+    """
+    excess = len(history) - max_messages
+    if excess <= 0:
+        return history
+    block = max(max_messages // 4 * 2, 2)
+    start = -(-excess // block) * block
+    return history[start:]
+
+
+def prompt_template(
+    query: str, context: str, history: List[Dict[str, str]], summary: str = ""
+) -> List[Dict[str, str]]:
+    """
+    Builds the chat messages with context, conversation history, and user query.
+
+    The messages start with the same system prompt in every mode and keep
+    earlier turns unchanged, so consecutive prompts share a prefix that Ollama
+    does not have to evaluate again. Retrieved context changes every turn and
+    is therefore only part of the final user message; earlier questions appear
+    without their context. A summary of older turns follows the system prompt.
 
     Args:
         query (str): The user's query.
         context (str): Context text gathered from hybrid search.
-        history (List[Dict[str, str]]): Conversation history to include in the prompt.
+        history (List[Dict[str, str]]): Conversation history to include, possibly ending with the query itself.
+        summary (str, optional): Summary of turns no longer in history. Defaults to "".
 
     Returns:
-        str: Constructed prompt for Ollama model.
+        List[Dict[str, str]]: Messages for ollama.chat.
     """
-    prompt = "You are a knowledgeable chatbot assistant. "
+    if history and history[-1] == {"role": "user", "content": query}:
+        history = history[:-1]
+
+    content = query
     if context:
-        prompt += (
+        content = (
             "Use the following context to answer the question.\nContext:\n"
             + context
-            + "\n"
+            + f"Question: {query}"
         )
-    else:
-        prompt += "Answer questions to the best of your knowledge.\n"
-
-    if history:
-        prompt += "Conversation History:\n"
-        for msg in history:
-            role = "User" if msg["role"] == "user" else "Assistant"
-            content = msg["content"]
-            prompt += f"{role}: {content}\n"
-        prompt += "\n"
-
-    prompt += f"User: {query}\nAssistant:"
+
+    messages = [{"role": "system", "content": SYSTEM_PROMPT}]
+    if summary:
+        messages.append(
+            {
+                "role": "system",
+                "content": f"Summary of the earlier conversation:\n{summary}",
+            }
+        )
+    messages.extend({"role": msg["role"], "content": msg["content"]} for msg in history)
+    messages.append({"role": "user", "content": content})
     logger.info("Prompt constructed with context and conversation history.")
-    return prompt
+    return messages
+
+
+def is_first_turn(query: str, chat_history: List[Dict[str, str]]) -> bool:
+    """
+    Checks whether a query opens the conversation, so its answer ignores history.
+
+    Args:
+        query (str): The user's query.
+        chat_history (List[Dict[str, str]]): Chat history, possibly ending with the query itself.
+
+    Returns:
+        bool: True if there is no history besides the query.
+    """
+    previous = chat_history
+    if previous and previous[-1] == {"role": "user", "content": query}:
+        previous = previous[:-1]
+    return not previous
+
+
+def answer_context_key(
+    search_results: List[Dict[str, Any]], temperature: float
+) -> Hashable:
+    """
+    Builds the answer cache key for the context an answer is generated from.
+
+    Args:
+        search_results (List[Dict[str, Any]]): The hits placed in the prompt.
+        temperature (float): The response generation temperature.
+
+    Returns:
+        Hashable: The model name and its options, followed by the chunk IDs in prompt order.
+    """
+    options = tuple(sorted(ollama_options(temperature).items()))
+    return (OLLAMA_MODEL_NAME, options, *(hit["_id"] for hit in search_results))
+
+
+def lookup_cached_answer(
+    query_embedding: List[float], context_key: Hashable, generation: int
+) -> Optional[str]:
+    """
+    Returns a cached answer to a near-identical question over the same context.
+
+    Args:
+        query_embedding (List[float]): Embedding of the user's query.
+        context_key (Hashable): Key from answer_context_key.
+        generation (int): Index generation at retrieval time.
+
+    Returns:
+        Optional[str]: The cached answer, or None.
+    """
+    answer = _answer_cache.get(query_embedding, context_key, generation)
+    if answer is not None:
+        logger.info("Answer served from the semantic answer cache.")
+    return answer
+
+
+def store_answer(
+    query_embedding: List[float], context_key: Hashable, generation: int, answer: str
+) -> None:
+    """
+    Caches a complete answer for lookup_cached_answer.
+
+    Args:
+        query_embedding (List[float]): Embedding of the user's query.
+        context_key (Hashable): Key from answer_context_key.
+        generation (int): Index generation at retrieval time.
+        answer (str): The full answer text.
+    """
+    if answer:
+        _answer_cache.put(query_embedding, context_key, generation, answer)
+
+
+def replay_answer(answer: str) -> Iterator[Mapping[str, Any]]:
+    """
+    Streams a cached answer in the chunk format of ollama.chat.
+
+    Args:
+        answer (str): The cached answer.
+
+    Yields:
+        Mapping[str, Any]: A single chunk holding the whole answer.
+    """
+    yield {"message": {"role": "assistant", "content": answer}, "done": True}
+
+
+def _record_answer(
+    stream: Iterable[Mapping[str, Any]],
+    query_embedding: List[float],
+    context_key: Hashable,
+    generation: int,
+) -> Iterator[Mapping[str, Any]]:
+    # Passes chunks through and caches the answer once the stream completes
+    parts = []
+    for chunk in stream:
+        parts.append(chunk.get("message", {}).get("content", ""))
+        yield chunk
+    store_answer(query_embedding, context_key, generation, "".join(parts))
+
+
+def get_answer_cache_stats() -> Dict[str, float]:
+    """
+    Returns hit-rate statistics of the semantic answer cache.
+
+    Returns:
+        Dict[str, float]: Entry count, hits, misses, evictions and hit rate.
+    """
+    return _answer_cache.stats()
+
+
+def prompt_history(
+    query: str,
+    chat_history: List[Dict[str, str]],
+    conversation: Optional[ConversationHistory] = None,
+) -> Tuple[str, List[Dict[str, str]]]:
+    """
+    Selects the summary and the history messages to send with a query.
+
+    Args:
+        query (str): The user's query.
+        chat_history (List[Dict[str, str]]): Chat history, possibly ending with the query itself.
+        conversation (Optional[ConversationHistory]): Token-budgeted history manager, if any.
+
+    Returns:
+        Tuple[str, List[Dict[str, str]]]: The summary (possibly empty) and the history messages.
+    """
+    if conversation is not None:
+        return conversation.prompt_history(query)
+    if chat_history and chat_history[-1] == {"role": "user", "content": query}:
+        chat_history = chat_history[:-1]
+    return "", stable_history(chat_history)
 
 
 def generate_response_streaming(
@@ -108,44 +306,59 @@ def generate_response_streaming(
     num_results: int,
     temperature: float,
     chat_history: Optional[List[Dict[str, str]]] = None,
+    conversation: Optional[ConversationHistory] = None,
 ) -> Optional[Iterable[str]]:
     """
     Generates a chatbot response by performing hybrid search and incorporating conversation history.
 
+    In RAG mode, the answer to the first question of a conversation is served
+    from the semantic answer cache when a near-identical question was answered
+    from the same chunks against the same index generation.
+
     Args:
         query (str): The user's query.
         use_hybrid_search (bool): Whether to use hybrid search for context.
         num_results (int): The number of search results to include in the context.
         temperature (float): The temperature for the response generation.
         chat_history (Optional[List[Dict[str, str]]]): List of chat history messages.
+        conversation (Optional[ConversationHistory]): History manager over chat_history. Without one, the last CHAT_HISTORY_MAX_MESSAGES messages are sent.
 
     Returns:
         Optional[Iterable[str]]: A generator yielding response chunks as strings, or None if an error occurs.
     """
     chat_history = chat_history or []
-    max_history_messages = 10
-    history = chat_history[-max_history_messages:]
     context = ""
+    use_answer_cache = False
 
     # Include hybrid search results if enabled
     if use_hybrid_search:
         logger.info("Performing hybrid search.")
-        if ASSYMETRIC_EMBEDDING:
-            prefixed_query = f"passage: {query}"
-        else:
-            prefixed_query = f"{query}"
-        embedding_model = get_embedding_model()
-        query_embedding = embedding_model.encode(
-            prefixed_query
-        ).tolist()  # Convert tensor to list of floats
-        search_results = hybrid_search(query, query_embedding, top_k=num_results)
+        generation = get_index_generation()
+        query_embedding = embed_query(query)
+        search_results = get_retrieval_backend().search(
+            query, query_embedding, top_k=candidate_count(num_results)
+        )
         logger.info("Hybrid search completed.")
+        if RERANK_ENABLED:
+            search_results = rerank(query, search_results, num_results)
 
-        # Collect text from search results
-        for i, result in enumerate(search_results):
-            context += f"Document {i}:\n{result['_source']['text']}\n\n"
+        use_answer_cache = ANSWER_CACHE_ENABLED and is_first_turn(query, chat_history)
+        if use_answer_cache:
+            context_key = answer_context_key(search_results, temperature)
+            cached_answer = lookup_cached_answer(
+                query_embedding, context_key, generation
+            )
+            if cached_answer is not None:
+                return replay_answer(cached_answer)
 
-    # Generate prompt using the prompt_template function
-    prompt = prompt_template(query, context, history)
+        # Merge overlapping chunks and fit them to the context budget
+        context = assemble_context(search_results)
 
-    return run_llama_streaming(prompt, temperature)
+    # Generate messages using the prompt_template function
+    summary, history = prompt_history(query, chat_history, conversation)
+    messages = prompt_template(query, context, history, summary)
+
+    stream = run_llama_streaming(messages, temperature)
+    if stream is not None and use_answer_cache:
+        return _record_answer(stream, query_embedding, context_key, generation)
+    return stream
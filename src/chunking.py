@@ -0,0 +1,241 @@
+import logging
+import re
+import zlib
+from dataclasses import dataclass
+from typing import Any, List, Optional
+
+from src.constants import ASSYMETRIC_EMBEDDING, TOKEN_CHUNK_OVERLAP
+from src.embeddings import get_embedding_model
+from src.utils import TextCleaner, setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Whitespace ending a sentence, or a line break
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Longest run of text without a sentence break held back before it is split
+_MAX_PENDING_CHARS = 20_000
+
+# One in this many sentences may start a chunk once the chunk is half full
+_SENTENCE_BOUNDARY_DIVISOR = 4
+
+
+@dataclass
+class Chunk:
+    """A chunk of document text and its character span in the cleaned document."""
+
+    text: str
+    start_offset: int
+    end_offset: int
+
+
+@dataclass
+class _Unit:
+    # A sentence (or piece of an over-long sentence) with its trailing whitespace
+    text: str
+    start_offset: int
+    tokens: int
+
+
+class TokenChunker:
+    """
+    Incrementally packs streamed text into chunks that fit the embedding model.
+
+    Text is cleaned and split into sentences, which are counted with the
+    embedding model's own tokenizer in one batched call per piece of text and
+    packed into chunks of at most max_tokens word-pieces. Sentences longer than
+    that are split at token boundaries using the tokenizer's offset mapping.
+    Consecutive chunks share trailing sentences of up to overlap_tokens tokens.
+    Boundaries are content-defined: once a chunk holds half of its new-token
+    budget, it ends before any sentence whose hash hits, so an edit only moves
+    the boundaries next to it and the other chunks keep their IDs. Each chunk
+    keeps its character offsets in the cleaned document text, i.e. clean_text of
+    the concatenated pieces.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        overlap_tokens: int = TOKEN_CHUNK_OVERLAP,
+    ) -> None:
+        """
+        Creates a chunker for the configured embedding model.
+
+        Args:
+            max_tokens (Optional[int]): Maximum tokens per chunk, capped at what the model
+                can see after special tokens and the passage prefix. Defaults to that cap.
+            overlap_tokens (int): Maximum tokens shared by consecutive chunks. Defaults to TOKEN_CHUNK_OVERLAP.
+        """
+        model = get_embedding_model()
+        self._tokenizer = model.tokenizer
+        prefix = "passage: " if ASSYMETRIC_EMBEDDING else ""
+        reserved = self._tokenizer.num_special_tokens_to_add() + len(
+            self._tokenizer(prefix, add_special_tokens=False)["input_ids"]
+        )
+        limit = model.max_seq_length - reserved
+        self.max_tokens = min(max_tokens, limit) if max_tokens else limit
+        self.overlap_tokens = min(overlap_tokens, self.max_tokens // 2)
+        self.char_count = 0
+        self._cleaner = TextCleaner()
+        self._pending = ""  # Text after the last complete sentence
+        self._pending_start = 0
+        self._window: List[_Unit] = []
+        self._window_tokens = 0
+        self._emitted = 0  # Leading window units already part of an emitted chunk
+        self._emitted_tokens = 0
+
+    def feed(self, text: str) -> List[Chunk]:
+        """
+        Cleans a piece of text and returns the chunks it completes.
+
+        Args:
+            text (str): The next piece of text, e.g. one page.
+
+        Returns:
+            List[Chunk]: Chunks completed by this piece, possibly empty.
+        """
+        text = self._cleaner.feed(text)
+        if not text:
+            return []
+        self.char_count += len(text)
+        self._pending += text
+
+        sentences = []
+        position = 0
+        for match in _SENTENCE_BREAK.finditer(self._pending):
+            if match.end() < len(self._pending):
+                sentences.append(self._pending[position : match.end()])
+                position = match.end()
+        if len(self._pending) - position > _MAX_PENDING_CHARS:
+            sentences.append(self._pending[position:])
+            position = len(self._pending)
+
+        start = self._pending_start
+        self._pending = self._pending[position:]
+        self._pending_start += position
+        return self._pack(sentences, start)
+
+    def flush(self) -> List[Chunk]:
+        """
+        Returns the final chunk(s) and resets the chunker.
+
+        Returns:
+            List[Chunk]: The remaining chunks, possibly empty.
+        """
+        text = self._cleaner.flush()
+        self.char_count += len(text)
+        chunks = self._pack([self._pending + text], self._pending_start)
+        if len(self._window) > self._emitted:
+            chunks.append(self._emit())
+        self._pending = ""
+        self._pending_start = 0
+        self._window = []
+        self._window_tokens = 0
+        self._emitted = 0
+        self._emitted_tokens = 0
+        return chunks
+
+    def _pack(self, sentences: List[str], start: int) -> List[Chunk]:
+        chunks = []
+        for unit in self._units(sentences, start):
+            if self._window and (
+                self._window_tokens + unit.tokens > self.max_tokens
+                or self._starts_chunk(unit)
+            ):
+                chunks.append(self._emit())
+                self._keep_overlap(unit.tokens)
+            self._window.append(unit)
+            self._window_tokens += unit.tokens
+        return chunks
+
+    def _units(self, sentences: List[str], start: int) -> List[_Unit]:
+        # Counts all sentences in one batched tokenizer call
+        starts = []
+        for sentence in sentences:
+            starts.append(start)
+            start += len(sentence)
+        kept = [(s, o) for s, o in zip(sentences, starts) if s.strip()]
+        if not kept:
+            return []
+        encoding: Any = self._tokenizer(
+            [sentence for sentence, _ in kept],
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+        )
+
+        units = []
+        for (sentence, offset), offsets in zip(kept, encoding["offset_mapping"]):
+            # Drop leading whitespace so the unit starts at its first character
+            leading = len(sentence) - len(sentence.lstrip())
+            sentence, offset = sentence[leading:], offset + leading
+            offsets = [(s - leading, e - leading) for s, e in offsets]
+            if len(offsets) <= self.max_tokens:
+                units.append(_Unit(sentence, offset, max(len(offsets), 1)))
+                continue
+            # Split an over-long sentence at token boundaries
+            for first in range(0, len(offsets), self.max_tokens):
+                last = min(first + self.max_tokens, len(offsets))
+                piece_start = 0 if first == 0 else offsets[first][0]
+                piece_end = offsets[last][0] if last < len(offsets) else len(sentence)
+                units.append(
+                    _Unit(
+                        sentence[piece_start:piece_end],
+                        offset + piece_start,
+                        last - first,
+                    )
+                )
+        return units
+
+    def _starts_chunk(self, unit: _Unit) -> bool:
+        # Whether a content-defined boundary falls before the unit
+        new_tokens = self._window_tokens - self._emitted_tokens
+        if 2 * new_tokens < self.max_tokens - self.overlap_tokens:
+            return False
+        digest = zlib.crc32(unit.text.strip().encode("utf-8"))
+        return digest % _SENTENCE_BOUNDARY_DIVISOR == 0
+
+    def _emit(self) -> Chunk:
+        text = "".join(unit.text for unit in self._window).rstrip()
+        start = self._window[0].start_offset
+        return Chunk(text, start, start + len(text))
+
+    def _keep_overlap(self, incoming_tokens: int) -> None:
+        # Keeps trailing units within the overlap budget that still leave room
+        budget = min(self.overlap_tokens, self.max_tokens - incoming_tokens)
+        kept: List[_Unit] = []
+        kept_tokens = 0
+        for unit in reversed(self._window[1:]):
+            if kept_tokens + unit.tokens > budget:
+                break
+            kept.insert(0, unit)
+            kept_tokens += unit.tokens
+        self._window = kept
+        self._window_tokens = kept_tokens
+        self._emitted = len(kept)
+        self._emitted_tokens = kept_tokens
+
+
+def chunk_text_by_tokens(
+    text: str,
+    max_tokens: Optional[int] = None,
+    overlap_tokens: int = TOKEN_CHUNK_OVERLAP,
+) -> List[Chunk]:
+    """
+    Splits a whole text into token-bounded chunks with character offsets.
+
+    Args:
+        text (str): The text to split.
+        max_tokens (Optional[int]): Maximum tokens per chunk. Defaults to the model limit.
+        overlap_tokens (int): Maximum tokens shared by consecutive chunks. Defaults to TOKEN_CHUNK_OVERLAP.
+
+    Returns:
+        List[Chunk]: The chunks in document order.
+    """
+    chunker = TokenChunker(max_tokens, overlap_tokens)
+    chunks = chunker.feed(text) + chunker.flush()
+    logger.info(
+        f"Text split into {len(chunks)} chunks of at most {chunker.max_tokens} tokens."
+    )
+    return chunks
@@ -2,10 +2,56 @@ EMBEDDING_MODEL_PATH = "sentence-transformers/all-mpnet-base-v2"  # OR Path of l
 ASSYMETRIC_EMBEDDING = False  # Flag for asymmetric embedding
 EMBEDDING_DIMENSION = 768  # Embedding model settings
 TEXT_CHUNK_SIZE = 300  # Maximum number of characters in each text chunk for
+CHUNKING_STRATEGY = "tokens"  # "tokens" (sentences packed to the model's max sequence length) or "words" (TEXT_CHUNK_SIZE words)
+TOKEN_CHUNK_OVERLAP = 32  # Maximum tokens shared by consecutive token-based chunks
+EMBEDDING_BATCH_SIZE = 32  # Number of text chunks encoded per forward pass
+EMBEDDING_CACHE_ENABLED = True  # Reuse embeddings of previously seen chunk text
+EMBEDDING_CACHE_MAX_ENTRIES = 100_000  # Embeddings kept on disk before LRU eviction
+QUERY_CACHE_MAX_ENTRIES = 1024  # Query embeddings kept in memory before LRU eviction
+QUERY_CACHE_TTL_SECONDS = 3600  # Lifetime of a cached query embedding in seconds
+RETRIEVAL_CACHE_MAX_ENTRIES = 512  # Search results kept in memory (0 disables the cache)
+RETRIEVAL_CACHE_TTL_SECONDS = 300  # Lifetime of cached search results in seconds
+PDF_EXTRACTION_WORKERS = 8  # Worker processes used to extract and OCR PDF pages
+PDF_PAGE_TIMEOUT_SECONDS = 120  # Maximum wait for a single page before it is skipped
+PIPELINE_EXTRACT_WORKERS = 2  # Files extracted concurrently by the ingestion pipeline
+PIPELINE_EMBED_WORKERS = 1  # Concurrent embedding workers in the ingestion pipeline
+PIPELINE_INDEX_WORKERS = 2  # Concurrent bulk indexing workers in the ingestion pipeline
+PIPELINE_QUEUE_SIZE = 8  # Pages or chunk batches buffered between pipeline stages
+BULK_CHUNK_SIZE = 500  # Maximum number of actions per bulk request
+BULK_MAX_CHUNK_BYTES = 10 * 1024 * 1024  # Maximum size of a bulk request body in bytes
+BULK_THREAD_COUNT = 4  # Bulk requests sent to OpenSearch in parallel
+BULK_MAX_RETRIES = 3  # Retries for bulk items rejected with HTTP 429
+BULK_INITIAL_BACKOFF_SECONDS = 2  # Wait before the first retry, doubled on each retry
+OCR_MIN_IMAGE_SIDE = 64  # Images narrower or shorter than this (pixels) are not OCR'd
+OCR_MIN_IMAGE_PIXELS = 40_000  # Images with a smaller area (pixels) are not OCR'd
+OCR_MAX_IMAGE_SIDE = 3000  # Larger images are downscaled before OCR (None to disable)
+OCR_BINARIZE = False  # Convert images to black and white before OCR
 
 OLLAMA_MODEL_NAME = (
     "llama3.2:1b"  # Name of the model used in Ollama for chat functionality
 )
+OLLAMA_CONTEXT_WINDOW = 2048  # Context window (num_ctx) of the Ollama model in tokens
+CONTEXT_BUDGET_RATIO = 0.5  # Share of the context window filled with retrieved text
+OLLAMA_KEEP_ALIVE = "30m"  # How long Ollama keeps the model and its prompt cache loaded
+CHAT_HISTORY_MAX_MESSAGES = 10  # Previous chat messages in the prompt without a history manager
+HISTORY_TOKEN_BUDGET = 512  # Tokens of recent chat messages kept verbatim in the prompt
+HISTORY_SUMMARY_MAX_TOKENS = 200  # Tokens generated for the summary of older messages
+RETRIEVAL_BACKEND = "opensearch"  # "opensearch" or "local" (in-process engine, no JVM)
+ASYNC_QUERY_PATH = True  # Answer on a shared event loop (overlaps embedding and BM25 with fusion)
+HYBRID_FUSION_METHOD = None  # None (search pipeline) or "minmax", "rrf", "zscore"
+HYBRID_CANDIDATE_DEPTH = None  # Hits fetched per leg for client-side fusion (None: top_k)
+VECTOR_QUANTIZATION = None  # None, "fp16", "int8" or "binary" (recreate index on change)
+VECTOR_OVERSAMPLE_FACTOR = 4  # k-NN candidates per hit rescored with exact vectors
+EMBEDDING_PROJECTION = None  # None, "pca" or "truncate" (recreate index on change)
+PROJECTED_DIMENSION = 384  # Dimension of stored embeddings when a projection is enabled
+PCA_FIT_SAMPLES = 5000  # Most chunks sampled to fit the PCA, first fitted at PROJECTED_DIMENSION chunks
+RERANK_ENABLED = False  # Rerank retrieved chunks with a local cross-encoder
+RERANKER_MODEL_PATH = "cross-encoder/ms-marco-MiniLM-L-6-v2"  # Local path or Hugging Face name
+RERANK_CANDIDATE_MULTIPLIER = 4  # Candidates retrieved per result kept after reranking
+RERANK_BATCH_SIZE = 16  # Query/chunk pairs scored per cross-encoder forward pass
+RERANK_BUDGET_MS = 300  # Time budget for reranking; remaining candidates keep their rank
+ANSWER_CACHE_ENABLED = True  # Replay answers to near-identical first questions
+ANSWER_CACHE_SIMILARITY = 0.95  # Minimum query cosine similarity to reuse an answer
 
 ####################################################################################################
 # Dont change the following settings
@@ -13,7 +59,30 @@ OLLAMA_MODEL_NAME = (
 
 # Logging
 LOG_FILE_PATH = "logs/app.log"  # File path for the application log file
+# Embedding cache
+EMBEDDING_CACHE_DIR = "cache/embeddings"  # Directory of the on-disk embedding cache
+# OCR cache
+OCR_CACHE_DIR = "cache/ocr"  # Directory of cached OCR results
+# Embedding projection
+PROJECTION_PATH = "data/projection.npz"  # Fitted PCA projection of the embeddings
+# Answer cache
+ANSWER_CACHE_MAX_ENTRIES = 256  # Cached chat answers kept before LRU eviction
+# Reranker
+RERANK_CACHE_MAX_ENTRIES = 10_000  # Cross-encoder scores kept before LRU eviction
+# Local retrieval engine
+LOCAL_INDEX_DIR = "data/local_index"  # Directory of the local engine's index files
+# Document catalog
+CATALOG_PATH = "data/catalog.sqlite3"  # SQLite database describing ingested documents
 # OpenSearch settings
 OPENSEARCH_HOST = "localhost"  # Hostname for the OpenSearch instance
 OPENSEARCH_PORT = 9200  # Port number for OpenSearch
 OPENSEARCH_INDEX = "documents"  # Index name for storing documents in OpenSearch
+OPENSEARCH_POOL_MAXSIZE = 16  # Keep-alive connections kept open to OpenSearch
+OPENSEARCH_HEALTH_CHECK_INTERVAL_SECONDS = 30  # Minimum time between client health pings
+OPENSEARCH_HEALTH_CHECK_TIMEOUT_SECONDS = 2  # Timeout of a health ping (not retried)
+OPENSEARCH_SEARCH_PIPELINE = "nlp-search-pipeline"  # Search pipeline fusing hybrid scores
+HYBRID_LEXICAL_WEIGHT = 0.3  # Weight of the BM25 leg, as in the search pipeline
+HYBRID_VECTOR_WEIGHT = 0.7  # Weight of the k-NN leg, as in the search pipeline
+RRF_RANK_CONSTANT = 60  # Smoothing constant k of reciprocal rank fusion
+# Vector quantization
+INT8_QUANTIZATION_RANGE = 0.3  # Embedding values mapped onto the int8 range [-127, 127]
@@ -0,0 +1,213 @@
+import logging
+from dataclasses import dataclass, replace
+from typing import Any, Dict, List, Optional
+
+from src.constants import (
+    ASSYMETRIC_EMBEDDING,
+    CONTEXT_BUDGET_RATIO,
+    OLLAMA_CONTEXT_WINDOW,
+)
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Prefix both retrieval backends store before chunk texts with ASSYMETRIC_EMBEDDING
+_PASSAGE_PREFIX = "passage: "
+
+# Rough number of characters per LLM token in English text
+_CHARS_PER_TOKEN = 4
+
+# Fewest shared words for two chunks without offsets to be merged
+_MIN_OVERLAP_WORDS = 8
+
+# Smallest remainder of the budget worth filling with a truncated passage
+_MIN_PARTIAL_TOKENS = 32
+
+
+@dataclass
+class _Passage:
+    # Text of one or more merged hits and the best retrieval rank among them
+    rank: int
+    document_name: str
+    text: str
+    start_offset: Optional[int] = None
+    end_offset: Optional[int] = None
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Estimates the number of LLM tokens in a text without running a tokenizer.
+
+    Args:
+        text (str): The text.
+
+    Returns:
+        int: Approximate token count, about one token per four characters.
+    """
+    return -(-len(text) // _CHARS_PER_TOKEN)
+
+
+def clip_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Shortens a text to about max_tokens estimated tokens at a word boundary.
+
+    Args:
+        text (str): The text.
+        max_tokens (int): Maximum estimated tokens to keep.
+
+    Returns:
+        str: The text itself if it fits, else its leading words.
+    """
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    return text[: max_tokens * _CHARS_PER_TOKEN].rsplit(" ", 1)[0]
+
+
+def context_token_budget() -> int:
+    """
+    Returns the number of tokens retrieved text may take up in the prompt.
+
+    Returns:
+        int: OLLAMA_CONTEXT_WINDOW times CONTEXT_BUDGET_RATIO.
+    """
+    return int(OLLAMA_CONTEXT_WINDOW * CONTEXT_BUDGET_RATIO)
+
+
+def assemble_context(
+    search_results: List[Dict[str, Any]], token_budget: Optional[int] = None
+) -> str:
+    """
+    Builds the prompt context from search hits within a token budget.
+
+    Hits from the same document that overlap or touch are merged into one
+    passage, using their character offsets when indexed and otherwise the
+    longest run of words one chunk ends and the other starts with. The
+    "passage: " prefix stored with ASSYMETRIC_EMBEDDING is removed first, as
+    the offsets refer to the chunk text without it. Passages whose text
+    already appears in a better-ranked one are dropped. The rest are added in
+    order of their best hit until the budget is used up; the last one is cut
+    at a word boundary if enough of the budget is left for it.
+
+    Args:
+        search_results (List[Dict[str, Any]]): Hits, best first, with 'text' and 'document_name' in '_source'.
+        token_budget (Optional[int], optional): Maximum estimated tokens of context. Defaults to context_token_budget().
+
+    Returns:
+        str: The context, one "Document i:" section per passage.
+    """
+    if token_budget is None:
+        token_budget = context_token_budget()
+
+    documents: Dict[str, List[_Passage]] = {}
+    for rank, hit in enumerate(search_results):
+        source = hit["_source"]
+        text = source["text"]
+        if ASSYMETRIC_EMBEDDING and text.startswith(_PASSAGE_PREFIX):
+            text = text[len(_PASSAGE_PREFIX) :]
+        passage = _Passage(
+            rank,
+            source.get("document_name", ""),
+            text,
+            source.get("start_offset"),
+            source.get("end_offset"),
+        )
+        documents.setdefault(passage.document_name, []).append(passage)
+
+    passages = []
+    kept: List[str] = []
+    merged = [p for hits in documents.values() for p in _merge_document(hits)]
+    for passage in sorted(merged, key=lambda p: p.rank):
+        # Drops text repeated in a better-ranked passage, e.g. a duplicate file
+        normalized = " ".join(passage.text.split())
+        if not any(normalized in text for text in kept):
+            kept.append(normalized)
+            passages.append(passage)
+
+    sections = []
+    used_tokens = 0
+    for passage in passages:
+        header = f"Document {len(sections)}:\n"
+        text = passage.text
+        tokens = estimate_tokens(header + text)
+        truncated = used_tokens + tokens > token_budget
+        if truncated:
+            remaining = token_budget - used_tokens - estimate_tokens(header)
+            if remaining < _MIN_PARTIAL_TOKENS:
+                break
+            text = clip_to_tokens(text, remaining)
+            tokens = estimate_tokens(header + text)
+        sections.append(f"{header}{text}\n\n")
+        used_tokens += tokens
+        if truncated:
+            break
+
+    logger.info(
+        f"Context assembled from {len(search_results)} hits into {len(sections)} "
+        f"passages of about {used_tokens} tokens (budget {token_budget})."
+    )
+    return "".join(sections)
+
+
+def _merge_document(hits: List[_Passage]) -> List[_Passage]:
+    # Merges the hits of one document, first by offsets, then by shared words
+    passages: List[_Passage] = []
+    located = [hit for hit in hits if hit.start_offset is not None]
+    for hit in sorted(located, key=lambda hit: hit.start_offset or 0):
+        previous = passages[-1] if passages else None
+        start, end = hit.start_offset or 0, hit.end_offset or 0
+        # At most one whitespace character separates touching chunks
+        if previous is None or start - (previous.end_offset or 0) > 1:
+            passages.append(hit)
+            continue
+        previous_end = previous.end_offset or 0
+        text = previous.text
+        if end > previous_end:
+            if start >= previous_end:
+                text = f"{text} {hit.text}"
+            else:
+                text += hit.text[previous_end - start :]
+        passages[-1] = replace(
+            previous,
+            rank=min(previous.rank, hit.rank),
+            text=text,
+            end_offset=max(end, previous_end),
+        )
+
+    for hit in hits:
+        if hit.start_offset is not None:
+            continue
+        for i, passage in enumerate(passages):
+            text = _merge_text(passage.text, hit.text)
+            if text is not None:
+                passages[i] = replace(
+                    passage, rank=min(passage.rank, hit.rank), text=text
+                )
+                break
+        else:
+            passages.append(hit)
+    return passages
+
+
+def _merge_text(first: str, second: str) -> Optional[str]:
+    # Returns both texts as one if either contains or continues the other
+    if second in first:
+        return first
+    if first in second:
+        return second
+    first_words, second_words = first.split(), second.split()
+    return _join_overlap(first_words, second_words) or _join_overlap(
+        second_words, first_words
+    )
+
+
+def _join_overlap(head: List[str], tail: List[str]) -> Optional[str]:
+    # Joins head and tail if tail starts with the last words of head
+    if len(tail) < _MIN_OVERLAP_WORDS:
+        return None
+    first = max(len(head) - len(tail), 0)
+    for i in range(first, len(head) - _MIN_OVERLAP_WORDS + 1):
+        if head[i] == tail[0] and head[i:] == tail[: len(head) - i]:
+            return " ".join(head + tail[len(head) - i :])
+    return None
@@ -0,0 +1,204 @@
+import hashlib
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List
+
+import numpy as np
+import streamlit as st
+
+from src.constants import (
+    ASSYMETRIC_EMBEDDING,
+    EMBEDDING_CACHE_DIR,
+    EMBEDDING_CACHE_MAX_ENTRIES,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_MODEL_PATH,
+)
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of chunk embeddings.
+
+    Vectors live in a fixed-size memory-mapped float32 file with one row per
+    slot. A compact index of 16-byte keys (in least-recently-used order) maps
+    each key to its slot and is persisted next to the vectors. When the cache
+    is full the least recently used slot is reused.
+    """
+
+    def __init__(self, cache_dir: str, max_entries: int, dimension: int) -> None:
+        """
+        Opens the cache in cache_dir, creating or resetting it if needed.
+
+        Args:
+            cache_dir (str): Directory holding the vector file and key index.
+            max_entries (int): Maximum number of embeddings kept on disk.
+            dimension (int): Dimension of the cached embeddings.
+        """
+        self.max_entries = max_entries
+        self.dimension = dimension
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._slots: "OrderedDict[bytes, int]" = OrderedDict()
+
+        os.makedirs(cache_dir, exist_ok=True)
+        self._vectors_path = os.path.join(cache_dir, "vectors.f32")
+        self._index_path = os.path.join(cache_dir, "index.npz")
+
+        expected_size = max_entries * dimension * np.dtype(np.float32).itemsize
+        reuse = (
+            os.path.exists(self._vectors_path)
+            and os.path.getsize(self._vectors_path) == expected_size
+            and os.path.exists(self._index_path)
+        )
+        self._vectors = np.memmap(
+            self._vectors_path,
+            dtype=np.float32,
+            mode="r+" if reuse else "w+",
+            shape=(max_entries, dimension),
+        )
+        if reuse:
+            self._load_index()
+        logger.info(
+            f"Embedding cache opened at {cache_dir} with {len(self._slots)} entries."
+        )
+
+    @staticmethod
+    def make_key(text: str, model_id: str, prefix: str) -> bytes:
+        """
+        Builds the cache key for a chunk of text.
+
+        Args:
+            text (str): The chunk text.
+            model_id (str): Identifier of the embedding model.
+            prefix (str): Prefix applied for asymmetric embedding models.
+
+        Returns:
+            bytes: 16-byte digest identifying the (model, prefix, text) triple.
+        """
+        payload = f"{model_id}\0{prefix}\0{text}".encode("utf-8")
+        return hashlib.blake2b(payload, digest_size=16).digest()
+
+    def lookup(self, keys: List[bytes], out: np.ndarray[Any, Any]) -> List[int]:
+        """
+        Copies cached embeddings into the matching rows of out.
+
+        Args:
+            keys (List[bytes]): Cache keys, one per row of out.
+            out (np.ndarray[Any, Any]): Matrix receiving the cached embeddings.
+
+        Returns:
+            List[int]: Indices of the keys that were not found in the cache.
+        """
+        missing = []
+        with self._lock:
+            for i, key in enumerate(keys):
+                slot = self._slots.get(key)
+                if slot is None:
+                    missing.append(i)
+                    continue
+                self._slots.move_to_end(key)
+                out[i] = self._vectors[slot]
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+        return missing
+
+    def store(self, keys: List[bytes], embeddings: np.ndarray[Any, Any]) -> None:
+        """
+        Writes embeddings to the cache and persists the key index.
+
+        Args:
+            keys (List[bytes]): Cache keys, one per row of embeddings.
+            embeddings (np.ndarray[Any, Any]): Embeddings to cache.
+        """
+        if not keys:
+            return
+        with self._lock:
+            for key, embedding in zip(keys, embeddings):
+                slot = self._slots.get(key)
+                if slot is None:
+                    if len(self._slots) < self.max_entries:
+                        slot = len(self._slots)
+                    else:
+                        _, slot = self._slots.popitem(last=False)
+                        self.evictions += 1
+                    self._slots[key] = slot
+                else:
+                    self._slots.move_to_end(key)
+                self._vectors[slot] = embedding
+            self._vectors.flush()
+            self._save_index()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            Dict[str, int]: Number of entries, hits, misses and evictions.
+        """
+        with self._lock:
+            return {
+                "entries": len(self._slots),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _load_index(self) -> None:
+        with np.load(self._index_path) as index:
+            if int(index["dimension"]) != self.dimension:
+                logger.warning("Embedding cache dimension changed; starting empty.")
+                return
+            for key, slot in zip(index["keys"], index["slots"]):
+                self._slots[key.tobytes()] = int(slot)
+
+    def _save_index(self) -> None:
+        tmp_path = f"{self._index_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                keys=np.frombuffer(b"".join(self._slots), dtype=np.uint8).reshape(
+                    -1, 16
+                ),
+                slots=np.array(list(self._slots.values()), dtype=np.int32),
+                dimension=np.int32(self.dimension),
+            )
+        os.replace(tmp_path, self._index_path)
+
+
+@st.cache_resource(show_spinner=False)
+def get_embedding_cache() -> EmbeddingCache:
+    """
+    Opens and caches the on-disk embedding cache.
+
+    Returns:
+        EmbeddingCache: The process-wide embedding cache.
+    """
+    return EmbeddingCache(
+        EMBEDDING_CACHE_DIR, EMBEDDING_CACHE_MAX_ENTRIES, EMBEDDING_DIMENSION
+    )
+
+
+def chunk_cache_keys(chunks: List[str]) -> List[bytes]:
+    """
+    Builds embedding cache keys for chunks under the configured model.
+
+    Args:
+        chunks (List[str]): List of text chunks.
+
+    Returns:
+        List[bytes]: One cache key per chunk.
+    """
+    prefix = "passage: " if ASSYMETRIC_EMBEDDING else ""
+    return [
+        EmbeddingCache.make_key(chunk, EMBEDDING_MODEL_PATH, prefix)
+        for chunk in chunks
+    ]
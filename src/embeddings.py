@@ -1,17 +1,36 @@
 import logging
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, Dict, List
 
 import numpy as np
 import streamlit as st
-from sentence_transformers import SentenceTransformer
 
-from src.constants import EMBEDDING_MODEL_PATH
+from src.cache import LRUCache
+from src.constants import (
+    ASSYMETRIC_EMBEDDING,
+    EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_DIMENSION,
+    EMBEDDING_MODEL_PATH,
+    QUERY_CACHE_MAX_ENTRIES,
+    QUERY_CACHE_TTL_SECONDS,
+)
+from src.embedding_cache import chunk_cache_keys, get_embedding_cache
+from src.projection import index_dimension, project_embeddings, project_for_index
 from src.utils import setup_logging
 
+# sentence_transformers (and torch) load on first use of get_embedding_model
+if TYPE_CHECKING:
+    from sentence_transformers import SentenceTransformer
+
 # Initialize logger
 setup_logging()  # Configures logging for the application
 logger = logging.getLogger(__name__)
 
+# Process-wide cache of query embeddings shared by all sessions
+_query_embedding_cache: LRUCache[List[float]] = LRUCache(
+    QUERY_CACHE_MAX_ENTRIES, ttl_seconds=QUERY_CACHE_TTL_SECONDS
+)
+
 """
 Without the @st.cache_resource decorator
 Every time someone:
@@ -34,28 +53,136 @@ Initialized again (additional overhead)
 """
 
 @st.cache_resource(show_spinner=False)
-def get_embedding_model() -> SentenceTransformer:
+def get_embedding_model() -> "SentenceTransformer":
     """
     Loads and caches the embedding model.
 
     Returns:
         SentenceTransformer: The loaded embedding model.
     """
+    from sentence_transformers import SentenceTransformer
+
     logger.info(f"Loading embedding model from path: {EMBEDDING_MODEL_PATH}")
     return SentenceTransformer(EMBEDDING_MODEL_PATH)
 
 
-def generate_embeddings(chunks: List[str]) -> List[np.ndarray[Any, Any]]:
+def generate_embeddings(
+    chunks: List[str], batch_size: int = EMBEDDING_BATCH_SIZE, project: bool = True
+) -> np.ndarray[Any, Any]:
     """
-    Generates embeddings for a list of text chunks.
+    Generates embeddings for a list of text chunks in batches.
+
+    Chunks already present in the on-disk embedding cache are read from it; the
+    rest are sorted by length before batching so that each forward pass pads
+    to a similar sequence length. Rows are returned in the original order.
+    The cache holds full model embeddings; the configured projection is
+    applied on the way out.
 
     Args:
         chunks (List[str]): List of text chunks.
+        batch_size (int, optional): Number of chunks encoded per forward pass.
+            Defaults to EMBEDDING_BATCH_SIZE.
+        project (bool, optional): Whether to apply the embedding projection. Defaults to True.
 
     Returns:
-        List[np.ndarray[Any, Any]]: List of embeddings as numpy arrays for each chunk.
+        np.ndarray[Any, Any]: Contiguous float32 matrix with one row per chunk, of
+            dimension index_dimension() if projected, else EMBEDDING_DIMENSION.
     """
+    if not chunks:
+        dimension = index_dimension() if project else EMBEDDING_DIMENSION
+        return np.empty((0, dimension), dtype=np.float32)
+    embeddings = np.empty((len(chunks), EMBEDDING_DIMENSION), dtype=np.float32)
+
+    pending = list(range(len(chunks)))
+    if EMBEDDING_CACHE_ENABLED:
+        cache = get_embedding_cache()
+        keys = chunk_cache_keys(chunks)
+        pending = cache.lookup(keys, embeddings)
+        logger.info(
+            f"Embedding cache served {len(chunks) - len(pending)} of {len(chunks)} chunks."
+        )
+        if not pending:
+            return project_embeddings(embeddings) if project else embeddings
+
     model = get_embedding_model()
-    embeddings = [np.array(model.encode(chunk)) for chunk in chunks]
-    logger.info(f"Generated embeddings for {len(chunks)} text chunks.")
-    return embeddings
+    order = sorted(pending, key=lambda i: len(chunks[i]), reverse=True)
+    for start in range(0, len(order), batch_size):
+        batch_indices = order[start : start + batch_size]
+        embeddings[batch_indices] = model.encode(
+            [chunks[i] for i in batch_indices],
+            batch_size=batch_size,
+            convert_to_numpy=True,
+            show_progress_bar=False,
+        )
+    if EMBEDDING_CACHE_ENABLED:
+        cache.store([keys[i] for i in pending], embeddings[pending])
+    logger.info(
+        f"Generated embeddings for {len(pending)} text chunks in batches of {batch_size}."
+    )
+    return project_embeddings(embeddings) if project else embeddings
+
+
+def embed_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Embeds the chunk documents that have no 'embedding' yet, in place, for indexing.
+
+    Each newly embedded document also gets a 'projection' with the version of
+    the projection applied (None without one), which is stored with its vector
+    so vectors of an older projection can be re-embedded after a refit.
+
+    Args:
+        documents (List[Dict[str, Any]]): Document dictionaries with at least a 'text'.
+
+    Returns:
+        List[Dict[str, Any]]: The same documents.
+    """
+    missing = [doc for doc in documents if doc.get("embedding") is None]
+    if missing:
+        embeddings = generate_embeddings(
+            [doc["text"] for doc in missing], project=False
+        )
+        projected, version = project_for_index(embeddings)
+        for doc, embedding in zip(missing, projected):
+            doc["embedding"] = embedding
+            doc["projection"] = version
+    return documents
+
+
+def embed_query(query: str) -> List[float]:
+    """
+    Embeds a search query, reusing a cached embedding for repeated queries.
+
+    Whitespace in the query is normalised before lookup and encoding, and the
+    cache key includes the model and the asymmetric-embedding prefix. The
+    cache holds the full model embedding; the configured projection is
+    applied on the way out.
+
+    Args:
+        query (str): The user's query.
+
+    Returns:
+        List[float]: The query embedding.
+    """
+    normalized_query = " ".join(query.split())
+    prefix = "passage: " if ASSYMETRIC_EMBEDDING else ""
+    key = (EMBEDDING_MODEL_PATH, prefix, normalized_query)
+
+    embedding = _query_embedding_cache.get(key)
+    if embedding is not None:
+        logger.info("Query embedding served from cache.")
+    else:
+        model = get_embedding_model()
+        embedding = model.encode(f"{prefix}{normalized_query}").tolist()
+        _query_embedding_cache.put(key, embedding)
+    projected: List[float] = project_embeddings(np.asarray([embedding]))[0].tolist()
+    return projected
+
+
+def get_query_cache_stats() -> Dict[str, float]:
+    """
+    Returns hit-rate statistics of the query embedding cache.
+
+    Returns:
+        Dict[str, float]: Entry count, hits, misses, evictions, expirations and hit rate.
+    """
+    return _query_embedding_cache.stats()
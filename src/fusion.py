@@ -0,0 +1,175 @@
+import logging
+import statistics
+from typing import Any, Callable, Dict, List, Sequence
+
+from src.constants import RRF_RANK_CONSTANT
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Fusion methods accepted by fuse()
+FUSION_METHODS = ("minmax", "rrf", "zscore")
+
+
+def fuse(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    top_k: int,
+    method: str = "minmax",
+) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked hit lists from several sub-queries into one ranking.
+
+    Args:
+        result_lists (Sequence[List[Dict[str, Any]]]): OpenSearch-style hits per sub-query.
+        weights (Sequence[float]): Weight of each sub-query, in the same order.
+        top_k (int): Number of fused hits to return.
+        method (str, optional): One of FUSION_METHODS. Defaults to "minmax".
+
+    Returns:
+        List[Dict[str, Any]]: The top_k fused hits with '_score' set to the combined score.
+
+    Raises:
+        ValueError: If method is not one of FUSION_METHODS.
+    """
+    if method == "minmax":
+        return min_max_fuse(result_lists, weights, top_k)
+    if method == "rrf":
+        return rrf_fuse(result_lists, weights, top_k)
+    if method == "zscore":
+        return z_score_fuse(result_lists, weights, top_k)
+    raise ValueError(
+        f"Unknown fusion method '{method}'; expected one of {FUSION_METHODS}"
+    )
+
+
+def min_max_fuse(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    top_k: int,
+) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked hit lists with min-max normalisation and a weighted arithmetic mean.
+
+    Mirrors the normalization-processor of the 'nlp-search-pipeline': scores of
+    each list are scaled to [0, 1], a hit missing from a list scores 0 there, and
+    the combined score is the weighted mean over all lists.
+
+    Args:
+        result_lists (Sequence[List[Dict[str, Any]]]): OpenSearch-style hits per sub-query.
+        weights (Sequence[float]): Weight of each sub-query, in the same order.
+        top_k (int): Number of fused hits to return.
+
+    Returns:
+        List[Dict[str, Any]]: The top_k fused hits with '_score' set to the combined score.
+    """
+
+    def normalize(scores: List[float]) -> List[float]:
+        low, high = min(scores), max(scores)
+        return [(s - low) / (high - low) if high > low else 1.0 for s in scores]
+
+    return _combine(result_lists, weights, top_k, normalize)
+
+
+def z_score_fuse(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    top_k: int,
+) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked hit lists with z-score normalisation and a weighted arithmetic mean.
+
+    A hit missing from a list is given that list's lowest z-score.
+
+    Args:
+        result_lists (Sequence[List[Dict[str, Any]]]): OpenSearch-style hits per sub-query.
+        weights (Sequence[float]): Weight of each sub-query, in the same order.
+        top_k (int): Number of fused hits to return.
+
+    Returns:
+        List[Dict[str, Any]]: The top_k fused hits with '_score' set to the combined score.
+    """
+
+    def normalize(scores: List[float]) -> List[float]:
+        mean = statistics.fmean(scores)
+        stdev = statistics.pstdev(scores, mean)
+        return [(s - mean) / stdev if stdev > 0 else 0.0 for s in scores]
+
+    return _combine(result_lists, weights, top_k, normalize, missing_is_min=True)
+
+
+def rrf_fuse(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    top_k: int,
+    rank_constant: int = RRF_RANK_CONSTANT,
+) -> List[Dict[str, Any]]:
+    """
+    Fuses ranked hit lists with weighted reciprocal rank fusion.
+
+    Each list contributes weight / (rank_constant + rank) for every hit it
+    contains, so only ranks matter and raw scores need no normalisation.
+
+    Args:
+        result_lists (Sequence[List[Dict[str, Any]]]): OpenSearch-style hits per sub-query.
+        weights (Sequence[float]): Weight of each sub-query, in the same order.
+        top_k (int): Number of fused hits to return.
+        rank_constant (int, optional): Smoothing constant k. Defaults to RRF_RANK_CONSTANT.
+
+    Returns:
+        List[Dict[str, Any]]: The top_k fused hits with '_score' set to the combined score.
+    """
+    combined: Dict[str, float] = {}
+    hits_by_id: Dict[str, Dict[str, Any]] = {}
+    for hits, weight in zip(result_lists, weights):
+        for rank, hit in enumerate(hits, start=1):
+            combined[hit["_id"]] = combined.get(hit["_id"], 0.0) + weight / (
+                rank_constant + rank
+            )
+            hits_by_id.setdefault(hit["_id"], hit)
+    return _top(combined, hits_by_id, top_k, 1.0)
+
+
+def _combine(
+    result_lists: Sequence[List[Dict[str, Any]]],
+    weights: Sequence[float],
+    top_k: int,
+    normalize: Callable[[List[float]], List[float]],
+    missing_is_min: bool = False,
+) -> List[Dict[str, Any]]:
+    normalized_lists: List[Dict[str, float]] = []
+    hits_by_id: Dict[str, Dict[str, Any]] = {}
+    for hits in result_lists:
+        normalized = normalize([float(hit["_score"]) for hit in hits]) if hits else []
+        normalized_lists.append(
+            {hit["_id"]: score for hit, score in zip(hits, normalized)}
+        )
+        for hit in hits:
+            hits_by_id.setdefault(hit["_id"], hit)
+
+    defaults = [
+        min(scores.values()) if missing_is_min and scores else 0.0
+        for scores in normalized_lists
+    ]
+    combined: Dict[str, float] = {}
+    for doc_id in hits_by_id:
+        combined[doc_id] = sum(
+            weight * scores.get(doc_id, default)
+            for scores, weight, default in zip(normalized_lists, weights, defaults)
+        )
+    return _top(combined, hits_by_id, top_k, sum(weights) or 1.0)
+
+
+def _top(
+    combined: Dict[str, float],
+    hits_by_id: Dict[str, Dict[str, Any]],
+    top_k: int,
+    total_weight: float,
+) -> List[Dict[str, Any]]:
+    ranked = sorted(combined.items(), key=lambda item: item[1], reverse=True)
+    return [
+        {**hits_by_id[doc_id], "_score": score / total_weight}
+        for doc_id, score in ranked[:top_k]
+    ]
@@ -0,0 +1,188 @@
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import ollama
+
+from src.constants import (
+    HISTORY_SUMMARY_MAX_TOKENS,
+    HISTORY_TOKEN_BUDGET,
+    OLLAMA_CONTEXT_WINDOW,
+    OLLAMA_KEEP_ALIVE,
+    OLLAMA_MODEL_NAME,
+)
+from src.context import clip_to_tokens, estimate_tokens
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Instructions for folding earlier turns into the running summary
+SUMMARY_PROMPT = (
+    "Summarize the conversation below so it can replace it in later prompts. "
+    "Keep facts, names, numbers, decisions and open questions. "
+    "Reply with the summary only."
+)
+
+
+class ConversationHistory:
+    """
+    Bounds the conversation history sent to the model by tokens, not messages.
+
+    Wraps the chat page's message list, which stays the full transcript shown
+    to the user, and counts the tokens of each message once. Recent messages
+    are sent verbatim within token_budget; older ones are folded into a running
+    summary by compact_in_background, in a worker thread started after an
+    answer has been streamed. The summary request still competes with the next
+    question for the same Ollama model, and a new summary changes the prompt
+    right after the system message, so the next turn cannot reuse the cached
+    prompt prefix. Compacting to half the budget keeps this to one turn in
+    several.
+    """
+
+    def __init__(
+        self,
+        messages: List[Dict[str, str]],
+        token_budget: int = HISTORY_TOKEN_BUDGET,
+        summary_max_tokens: int = HISTORY_SUMMARY_MAX_TOKENS,
+    ) -> None:
+        """
+        Creates a history manager over a message list.
+
+        Args:
+            messages (List[Dict[str, str]]): The conversation, oldest first; appended to by the caller.
+            token_budget (int, optional): Maximum estimated tokens of verbatim history. Defaults to HISTORY_TOKEN_BUDGET.
+            summary_max_tokens (int, optional): Maximum tokens generated for the summary. Defaults to HISTORY_SUMMARY_MAX_TOKENS.
+        """
+        self.messages = messages
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ""
+        self._summarized = 0  # Leading messages covered by the summary
+        self._tokens: List[int] = []
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def prompt_history(self, query: str) -> Tuple[str, List[Dict[str, str]]]:
+        """
+        Returns the summary and the verbatim messages to send before a query.
+
+        Messages not yet covered by the summary are included newest first while
+        they fit the token budget; the newest is clipped if it alone exceeds it.
+
+        Args:
+            query (str): The user's query, dropped if it ends the messages.
+
+        Returns:
+            Tuple[str, List[Dict[str, str]]]: The summary (possibly empty) and the messages, oldest first.
+        """
+        with self._lock:
+            tokens = self._count()
+            summary, first = self.summary, self._summarized
+        end = len(tokens)
+        current = {"role": "user", "content": query}
+        if end > first and self.messages[end - 1] == current:
+            end -= 1
+
+        kept: List[Dict[str, str]] = []
+        used = 0
+        for i in range(end - 1, first - 1, -1):
+            if used + tokens[i] > self.token_budget:
+                if not kept:
+                    kept.append(self._clip(self.messages[i], self.token_budget))
+                break
+            kept.append(self.messages[i])
+            used += tokens[i]
+        kept.reverse()
+        return summary, kept
+
+    def compact_in_background(self) -> bool:
+        """
+        Starts folding older messages into the summary if they exceed the budget.
+
+        The oldest whole turns are summarized until the remaining messages fit
+        half of the token budget, leaving room for the next turns before
+        another compaction is needed. At most one compaction runs at a time.
+
+        Returns:
+            bool: True if a compaction was started.
+        """
+        with self._lock:
+            if self._worker is not None and self._worker.is_alive():
+                return False
+            tokens = self._count()
+            remaining = sum(tokens[self._summarized :])
+            if remaining <= self.token_budget:
+                return False
+            end = self._summarized
+            # Always keep the last turn (question and answer) verbatim
+            while end < len(tokens) - 2 and remaining > self.token_budget // 2:
+                remaining -= tokens[end]
+                end += 1
+            if end % 2:
+                # Stop at a turn boundary, never folding the last turn
+                end += 1 if end < len(tokens) - 2 else -1
+            if end <= self._summarized:
+                return False
+            folded = list(self.messages[self._summarized : end])
+            self._worker = threading.Thread(
+                target=self._compact,
+                args=(self.summary, folded, end),
+                name="history-summary",
+                daemon=True,
+            )
+            self._worker.start()
+        return True
+
+    def _count(self) -> List[int]:
+        # Counts tokens of messages appended since the last call; needs the lock
+        for message in self.messages[len(self._tokens) :]:
+            self._tokens.append(estimate_tokens(message["content"]))
+        return list(self._tokens)
+
+    def _clip(self, message: Dict[str, str], tokens: int) -> Dict[str, str]:
+        # Shortens a message to about the given number of tokens
+        content = clip_to_tokens(message["content"], tokens)
+        if content == message["content"]:
+            return message
+        return {"role": message["role"], "content": f"{content} ..."}
+
+    def _compact(self, summary: str, folded: List[Dict[str, str]], end: int) -> None:
+        # Runs in a worker thread; the summary only changes if generation succeeds
+        transcript = "\n".join(
+            f"{'User' if message['role'] == 'user' else 'Assistant'}: "
+            f"{self._clip(message, self.token_budget)['content']}"
+            for message in folded
+        )
+        content = f"Conversation:\n{transcript}"
+        if summary:
+            content = f"Summary of the conversation so far:\n{summary}\n\n{content}"
+        try:
+            response = ollama.chat(
+                model=OLLAMA_MODEL_NAME,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": content},
+                ],
+                # Same num_ctx as the chat requests, so the model is not reloaded
+                options={
+                    "num_ctx": OLLAMA_CONTEXT_WINDOW,
+                    "num_predict": self.summary_max_tokens,
+                    "temperature": 0,
+                },
+                keep_alive=OLLAMA_KEEP_ALIVE,
+            )
+        except Exception as e:
+            # Also covers connection errors; the next compaction retries
+            logger.error(f"Error summarizing conversation history: {e}")
+            return
+
+        new_summary = response["message"]["content"].strip()
+        with self._lock:
+            self.summary = new_summary
+            self._summarized = end
+        logger.info(
+            f"Folded {len(folded)} messages into a conversation summary of about "
+            f"{estimate_tokens(new_summary)} tokens."
+        )
@@ -1,56 +1,113 @@
+import copy
+import functools
+import hashlib
 import json
 import logging
-from typing import Any, Dict, List, Tuple
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 
-from opensearchpy import OpenSearch, helpers
-
-from src.constants import ASSYMETRIC_EMBEDDING, EMBEDDING_DIMENSION, OPENSEARCH_INDEX
+from src.cache import bump_index_generation
+from src.catalog import delete_document
+from src.constants import (
+    ASSYMETRIC_EMBEDDING,
+    BULK_CHUNK_SIZE,
+    BULK_INITIAL_BACKOFF_SECONDS,
+    BULK_MAX_CHUNK_BYTES,
+    BULK_MAX_RETRIES,
+    BULK_THREAD_COUNT,
+    EMBEDDING_BATCH_SIZE,
+    OPENSEARCH_INDEX,
+    VECTOR_QUANTIZATION,
+)
+from src.embeddings import embed_documents
 from src.opensearch import get_opensearch_client
+from src.projection import index_dimension
+from src.quantization import (
+    EXACT_EMBEDDING_FIELD,
+    apply_quantization_mapping,
+    encode_exact,
+    quantize,
+)
 from src.utils import setup_logging
 
+# opensearchpy is imported where used, keeping this module cheap to import
+if TYPE_CHECKING:
+    from opensearchpy import OpenSearch
+
 # Initialize logger
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Set once the index is known to exist, so callers skip the exists round trip
+_index_ready = False
+
 
 def load_index_config() -> Dict[str, Any]:
     """
     Loads the index configuration from a JSON file.
 
+    The file is read once per process; each call returns a fresh copy.
+
     Returns:
         Dict[str, Any]: The index configuration as a dictionary.
     """
+    return copy.deepcopy(_read_index_config())
+
+
+@functools.lru_cache(maxsize=1)
+def _read_index_config() -> Dict[str, Any]:
     with open("src/index_config.json", "r") as f:
         config = json.load(f)
 
-    # Replace the placeholder with the actual embedding dimension
-    config["mappings"]["properties"]["embedding"]["dimension"] = EMBEDDING_DIMENSION
+    # Replace the placeholder with the dimension of the stored embeddings
+    config["mappings"]["properties"]["embedding"]["dimension"] = index_dimension()
+    apply_quantization_mapping(config)
     logger.info("Index configuration loaded from src/index_config.json.")
     return config if isinstance(config, dict) else {}
 
 
-def create_index(client: OpenSearch) -> None:
+def create_index(client: "OpenSearch") -> None:
     """
     Creates an index in OpenSearch using settings and mappings from the configuration file.
 
+    Once the index is known to exist, later calls in the same process return
+    without contacting OpenSearch.
+
     Args:
         client (OpenSearch): OpenSearch client instance.
     """
-    index_body = load_index_config()
+    global _index_ready
+    if _index_ready:
+        return
     if not client.indices.exists(index=OPENSEARCH_INDEX):
+        index_body = load_index_config()
         response = client.indices.create(index=OPENSEARCH_INDEX, body=index_body)
         logger.info(f"Created index {OPENSEARCH_INDEX}: {response}")
     else:
         logger.info(f"Index {OPENSEARCH_INDEX} already exists.")
+    _index_ready = True
 
 
-def delete_index(client: OpenSearch) -> None:
+def delete_index(client: "OpenSearch") -> None:
     """
     Deletes the index in OpenSearch if it exists.
 
     Args:
         client (OpenSearch): OpenSearch client instance.
     """
+    global _index_ready
+    _index_ready = False
     if client.indices.exists(index=OPENSEARCH_INDEX):
         response = client.indices.delete(index=OPENSEARCH_INDEX)
         logger.info(f"Deleted index {OPENSEARCH_INDEX}: {response}")
@@ -58,52 +115,215 @@ def delete_index(client: OpenSearch) -> None:
         logger.info(f"Index {OPENSEARCH_INDEX} does not exist.")
 
 
-def bulk_index_documents(documents: List[Dict[str, Any]]) -> Tuple[int, List[Any]]:
+def bulk_index_documents(
+    documents: Iterable[Dict[str, Any]],
+) -> Tuple[int, List[Any]]:
     """
     Indexes multiple documents into OpenSearch in bulk.
 
+    Documents are consumed lazily and streamed to stream_bulk_index. Documents
+    without an 'embedding' are embedded in batches of EMBEDDING_BATCH_SIZE as
+    they are consumed. Afterwards the index is refreshed and its generation
+    bumped, see refresh_and_bump_generation.
+
     Args:
-        documents (List[Dict[str, Any]]): List of document dictionaries with 'doc_id', 'text', 'embedding', and 'document_name'.
+        documents (Iterable[Dict[str, Any]]): Document dictionaries with 'doc_id', 'text', 'embedding', and 'document_name',
+            and optionally the chunk's 'start_offset' and 'end_offset' and the 'projection' its embedding was made with.
+            Documents without an embedding are embedded with embed_documents.
 
     Returns:
         Tuple[int, List[Any]]: Tuple with the number of successfully indexed documents and a list of any errors.
     """
-    actions = []
-    client = get_opensearch_client()
 
-    for doc in documents:
-        doc_id = doc["doc_id"]
-        embedding_list = doc["embedding"].tolist()
-        document_name = doc["document_name"]
-
-        # Prefix each document's text with "passage: " for the asymmetric embedding model
-        if ASSYMETRIC_EMBEDDING:
-            prefixed_text = f"passage: {doc['text']}"
-        else:
-            prefixed_text = f"{doc['text']}"
-
-        action = {
-            "_index": OPENSEARCH_INDEX,
-            "_id": doc_id,
-            "_source": {
+    def actions() -> Iterator[Dict[str, Any]]:
+        for doc in _with_embeddings(documents):
+            # Prefix each document's text with "passage: " for the asymmetric embedding model
+            if ASSYMETRIC_EMBEDDING:
+                prefixed_text = f"passage: {doc['text']}"
+            else:
+                prefixed_text = f"{doc['text']}"
+
+            source = {
                 "text": prefixed_text,
-                "embedding": embedding_list,  # Precomputed embedding
-                "document_name": document_name,
-            },
-        }
-        actions.append(action)
+                "embedding": quantize(doc["embedding"]),  # Precomputed embedding
+                "document_name": doc["document_name"],
+            }
+            if "start_offset" in doc:
+                source["start_offset"] = doc["start_offset"]
+                source["end_offset"] = doc["end_offset"]
+            if doc.get("projection") is not None:
+                source["projection"] = doc["projection"]
+            if VECTOR_QUANTIZATION is not None:
+                # Full-precision copy, used only to rescore k-NN candidates
+                source[EXACT_EMBEDDING_FIELD] = encode_exact(doc["embedding"])
+            yield {"_index": OPENSEARCH_INDEX, "_id": doc["doc_id"], "_source": source}
 
-    # Perform bulk indexing and capture response details explicitly
-    success, errors = helpers.bulk(client, actions)
+    success, errors = stream_bulk_index(actions())
+    if success:
+        refresh_and_bump_generation()
     logger.info(
-        f"Bulk indexed {len(documents)} documents into index {OPENSEARCH_INDEX} with {len(errors)} errors."
+        f"Bulk indexed {success} documents into index {OPENSEARCH_INDEX} with {len(errors)} errors."
+    )
+    return success, errors
+
+
+def refresh_and_bump_generation() -> None:
+    """
+    Makes index changes searchable, then invalidates cached search results.
+
+    Bulk writes only become visible with the next refresh, so bumping the
+    generation right after them would let searches in the refresh window cache
+    stale results (and answers) under the new generation. The generation is
+    bumped even if the refresh fails, so older results are never reused.
+    """
+    try:
+        get_opensearch_client().indices.refresh(index=OPENSEARCH_INDEX)
+    finally:
+        bump_index_generation()
+
+
+def _with_embeddings(
+    documents: Iterable[Dict[str, Any]],
+) -> Iterator[Dict[str, Any]]:
+    batch: List[Dict[str, Any]] = []
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= EMBEDDING_BATCH_SIZE:
+            yield from embed_documents(batch)
+            batch = []
+    yield from embed_documents(batch)
+
+
+def stream_bulk_index(
+    actions: Iterable[Dict[str, Any]],
+    chunk_size: int = BULK_CHUNK_SIZE,
+    max_chunk_bytes: int = BULK_MAX_CHUNK_BYTES,
+    thread_count: int = BULK_THREAD_COUNT,
+    max_retries: int = BULK_MAX_RETRIES,
+    initial_backoff: float = BULK_INITIAL_BACKOFF_SECONDS,
+) -> Tuple[int, List[Any]]:
+    """
+    Streams bulk actions to OpenSearch in size-bounded requests sent in parallel.
+
+    Actions are serialized as they are consumed and sliced into requests of at
+    most chunk_size actions and max_chunk_bytes bytes. Up to thread_count
+    requests are in flight at once, so at most about twice that many requests
+    are held in memory. Items rejected with HTTP 429 are retried with
+    exponential backoff.
+
+    Args:
+        actions (Iterable[Dict[str, Any]]): Bulk actions with '_index', '_id', optional '_op_type' and '_source'.
+        chunk_size (int, optional): Maximum actions per request. Defaults to BULK_CHUNK_SIZE.
+        max_chunk_bytes (int, optional): Maximum request body size in bytes. Defaults to BULK_MAX_CHUNK_BYTES.
+        thread_count (int, optional): Number of requests sent in parallel. Defaults to BULK_THREAD_COUNT.
+        max_retries (int, optional): Retries for rejected items. Defaults to BULK_MAX_RETRIES.
+        initial_backoff (float, optional): Seconds before the first retry, doubled on each retry.
+            Defaults to BULK_INITIAL_BACKOFF_SECONDS.
+
+    Returns:
+        Tuple[int, List[Any]]: Tuple with the number of successful actions and a list of any errors.
+    """
+    client = get_opensearch_client()
+    success = 0
+    errors: List[Any] = []
+    in_flight: Set["Future[Tuple[int, List[Any]]]"] = set()
+
+    def collect(futures: Set["Future[Tuple[int, List[Any]]]"]) -> None:
+        nonlocal success
+        for future in futures:
+            batch_success, batch_errors = future.result()
+            success += batch_success
+            errors.extend(batch_errors)
+
+    with ThreadPoolExecutor(max_workers=thread_count) as executor:
+        for batch in _iter_bulk_batches(actions, chunk_size, max_chunk_bytes):
+            if len(in_flight) >= thread_count * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight.add(
+                executor.submit(
+                    _send_bulk_batch, client, batch, max_retries, initial_backoff
+                )
+            )
+        collect(in_flight)
+
+    return success, errors
+
+
+def _iter_bulk_batches(
+    actions: Iterable[Dict[str, Any]], chunk_size: int, max_chunk_bytes: int
+) -> Iterator[List[str]]:
+    # Each batch item is the newline-terminated action line plus its source line
+    batch: List[str] = []
+    batch_bytes = 0
+    for action in actions:
+        op_type = action.get("_op_type", "index")
+        meta = {op_type: {"_index": action["_index"], "_id": action["_id"]}}
+        item = json.dumps(meta) + "\n"
+        if op_type != "delete":
+            item += json.dumps(action["_source"]) + "\n"
+        item_bytes = len(item.encode("utf-8"))
+
+        if batch and (
+            len(batch) >= chunk_size or batch_bytes + item_bytes > max_chunk_bytes
+        ):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += item_bytes
+    if batch:
+        yield batch
+
+
+def _send_bulk_batch(
+    client: "OpenSearch", batch: List[str], max_retries: int, initial_backoff: float
+) -> Tuple[int, List[Any]]:
+    from opensearchpy import TransportError
+
+    start = time.perf_counter()
+    payload_bytes = sum(len(item.encode("utf-8")) for item in batch)
+    success = 0
+    errors: List[Any] = []
+    pending = batch
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(initial_backoff * 2 ** (attempt - 1))
+        try:
+            response = client.bulk(body="".join(pending))
+        except TransportError as e:
+            if e.status_code != 429 or attempt == max_retries:
+                raise
+            logger.warning(f"Bulk request rejected with 429; retry {attempt + 1}.")
+            continue
+
+        rejected = []
+        for item, result in zip(pending, response["items"]):
+            op_result = next(iter(result.values()))
+            status = op_result.get("status", 500)
+            if 200 <= status < 300 or (status == 404 and "delete" in result):
+                success += 1
+            elif status == 429 and attempt < max_retries:
+                rejected.append(item)
+            else:
+                errors.append(result)
+        if not rejected:
+            break
+        logger.warning(f"{len(rejected)} bulk items rejected with 429; retrying.")
+        pending = rejected
+
+    elapsed = max(time.perf_counter() - start, 1e-6)
+    logger.info(
+        f"Bulk batch of {len(batch)} actions ({payload_bytes / 1e6:.2f} MB) in "
+        f"{elapsed:.2f}s: {len(batch) / elapsed:.0f} docs/s, "
+        f"{payload_bytes / 1e6 / elapsed:.2f} MB/s."
     )
     return success, errors
 
 
 def delete_documents_by_document_name(document_name: str) -> Dict[str, Any]:
     """
-    Deletes documents from OpenSearch where 'document_name' matches the provided value.
+    Deletes documents from OpenSearch where 'document_name' matches the provided value,
+    and removes the document from the catalog.
 
     Args:
         document_name (str): Name of the document to delete.
@@ -119,4 +339,174 @@ def delete_documents_by_document_name(document_name: str) -> Dict[str, Any]:
     logger.info(
         f"Deleted documents with name '{document_name}' from index {OPENSEARCH_INDEX}."
     )
+    refresh_and_bump_generation()
+    delete_document(document_name)
     return response
+
+
+def make_chunk_ids(
+    document_name: str, chunks: List[str], seen: Optional[Dict[str, int]] = None
+) -> List[str]:
+    """
+    Derives stable chunk IDs from the document name and chunk content.
+
+    Repeated chunk text within a document gets an occurrence suffix so that every
+    chunk keeps a distinct ID.
+
+    Args:
+        document_name (str): Name of the document the chunks belong to.
+        chunks (List[str]): List of text chunks.
+        seen (Optional[Dict[str, int]]): Occurrence counts per content digest, updated in
+            place so IDs stay unique across successive calls for the same document.
+
+    Returns:
+        List[str]: One ID per chunk.
+    """
+    seen = {} if seen is None else seen
+    chunk_ids = []
+    for chunk in chunks:
+        content = f"{document_name}\0{chunk}".encode("utf-8")
+        digest = hashlib.sha1(content).hexdigest()
+        occurrence = seen.get(digest, 0)
+        seen[digest] = occurrence + 1
+        chunk_ids.append(digest if occurrence == 0 else f"{digest}-{occurrence}")
+    return chunk_ids
+
+
+def make_chunk_document(
+    chunk_id: str,
+    chunk: str,
+    document_name: str,
+    offsets: Optional[List[Tuple[int, int]]] = None,
+    position: int = 0,
+) -> Dict[str, Any]:
+    """
+    Builds the document dictionary of a chunk for indexing.
+
+    Args:
+        chunk_id (str): The chunk ID.
+        chunk (str): The chunk text.
+        document_name (str): Name of the document the chunk belongs to.
+        offsets (Optional[List[Tuple[int, int]]]): Character spans of the document's chunks, if known.
+        position (int): Index of the chunk within the document's chunks.
+
+    Returns:
+        Dict[str, Any]: Document dictionary with 'doc_id', 'text', 'document_name' and any offsets.
+    """
+    doc: Dict[str, Any] = {
+        "doc_id": chunk_id,
+        "text": chunk,
+        "document_name": document_name,
+    }
+    if offsets is not None:
+        doc["start_offset"], doc["end_offset"] = offsets[position]
+    return doc
+
+
+def get_indexed_chunk_ids(document_name: str) -> Set[str]:
+    """
+    Returns the IDs of all chunks indexed for a document.
+
+    Args:
+        document_name (str): Name of the document.
+
+    Returns:
+        Set[str]: IDs of the document's indexed chunks.
+    """
+    from opensearchpy import helpers
+
+    client = get_opensearch_client()
+    query = {"query": {"term": {"document_name": document_name}}, "_source": False}
+    return {
+        hit["_id"] for hit in helpers.scan(client, index=OPENSEARCH_INDEX, query=query)
+    }
+
+
+def iter_indexed_chunks() -> Iterator[Dict[str, Any]]:
+    """
+    Yields every indexed chunk as a document dictionary, e.g. for re-embedding.
+
+    Returns:
+        Iterator[Dict[str, Any]]: Documents with 'doc_id', 'text' (without the passage prefix),
+            'document_name', any offsets and the 'projection' of the stored vector (None if unrecorded).
+    """
+    from opensearchpy import helpers
+
+    client = get_opensearch_client()
+    query = {
+        "query": {"match_all": {}},
+        "_source": {"exclude": ["embedding", EXACT_EMBEDDING_FIELD]},
+    }
+    prefix = "passage: " if ASSYMETRIC_EMBEDDING else ""
+    for hit in helpers.scan(client, index=OPENSEARCH_INDEX, query=query):
+        source = hit["_source"]
+        text = source["text"]
+        doc = {
+            "doc_id": hit["_id"],
+            "text": text[len(prefix) :] if text.startswith(prefix) else text,
+            "document_name": source["document_name"],
+            "projection": source.get("projection"),
+        }
+        if "start_offset" in source:
+            doc["start_offset"] = source["start_offset"]
+            doc["end_offset"] = source["end_offset"]
+        yield doc
+
+
+def incremental_index_document(
+    document_name: str,
+    chunks: List[str],
+    offsets: Optional[List[Tuple[int, int]]] = None,
+) -> Dict[str, int]:
+    """
+    Brings the indexed chunks of a document in line with a new chunk set.
+
+    Only chunks whose content-derived ID is not yet indexed are embedded and
+    indexed. Indexed chunks that no longer occur are deleted only once all new
+    chunks were indexed, so a failed update never leaves the document with
+    fewer chunks than before; it can simply be retried.
+
+    Args:
+        document_name (str): Name of the document.
+        chunks (List[str]): The document's new list of text chunks.
+        offsets (Optional[List[Tuple[int, int]]]): Character span of each chunk, if known.
+
+    Returns:
+        Dict[str, int]: Number of chunks added, removed, left unchanged and failed to index or delete.
+    """
+    chunk_ids = make_chunk_ids(document_name, chunks)
+    indexed_ids = get_indexed_chunk_ids(document_name)
+
+    documents_to_index = [
+        make_chunk_document(chunk_id, chunk, document_name, offsets, i)
+        for i, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks))
+        if chunk_id not in indexed_ids
+    ]
+    added = 0
+    errors: List[Any] = []
+    if documents_to_index:
+        added, errors = bulk_index_documents(documents_to_index)
+
+    removed_ids = indexed_ids.difference(chunk_ids)
+    removed = 0
+    if errors:
+        logger.error(
+            f"{len(errors)} chunks of '{document_name}' failed to index; "
+            f"keeping its {len(removed_ids)} outdated chunks."
+        )
+    elif removed_ids:
+        removed, delete_errors = stream_bulk_index(
+            {"_op_type": "delete", "_index": OPENSEARCH_INDEX, "_id": chunk_id}
+            for chunk_id in removed_ids
+        )
+        errors.extend(delete_errors)
+        refresh_and_bump_generation()
+
+    stats = {
+        "added": added,
+        "removed": removed,
+        "unchanged": len(chunk_ids) - len(documents_to_index),
+        "failed": len(errors),
+    }
+    logger.info(f"Incrementally re-indexed '{document_name}': {stats}.")
+    return stats
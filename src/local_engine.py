@@ -0,0 +1,640 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+
+from src.cache import bump_index_generation
+from src.catalog import delete_document
+from src.constants import (
+    ASSYMETRIC_EMBEDDING,
+    EMBEDDING_DIMENSION,
+    HYBRID_CANDIDATE_DEPTH,
+    HYBRID_FUSION_METHOD,
+    HYBRID_LEXICAL_WEIGHT,
+    HYBRID_VECTOR_WEIGHT,
+)
+from src.embeddings import embed_documents
+from src.fusion import fuse
+from src.ingestion import make_chunk_document, make_chunk_ids
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Lucene's default BM25 parameters, as used by OpenSearch
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Deleted rows are only marked; the files are compacted once this share of rows
+# (and at least _COMPACT_MIN_DELETED rows) are deleted
+_COMPACT_DELETED_RATIO = 0.25
+_COMPACT_MIN_DELETED = 256
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Splits text into lowercase word tokens for BM25.
+
+    Args:
+        text (str): The text to tokenize.
+
+    Returns:
+        List[str]: The tokens.
+    """
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _append(
+    buffer: np.ndarray[Any, Any], size: int, values: np.ndarray[Any, Any]
+) -> np.ndarray[Any, Any]:
+    # Appends values after the first size entries, doubling the capacity as needed
+    if size + len(values) > len(buffer):
+        grown = np.empty(max(2 * len(buffer), size + len(values)), dtype=buffer.dtype)
+        grown[:size] = buffer[:size]
+        buffer = grown
+    buffer[size : size + len(values)] = values
+    return buffer
+
+
+class _Postings:
+    """
+    One segment of a BM25 inverted index, stored CSR-style.
+
+    For term t, docs[offsets[t]:offsets[t + 1]] holds the rows containing t and
+    tf the matching term frequencies.
+    """
+
+    def __init__(
+        self,
+        terms: np.ndarray[Any, Any],
+        docs: np.ndarray[Any, Any],
+        tf: np.ndarray[Any, Any],
+        vocabulary_size: int,
+    ) -> None:
+        order = np.argsort(terms, kind="stable")
+        self.docs = docs[order]
+        self.tf = tf[order]
+        self.offsets = np.zeros(vocabulary_size + 1, dtype=np.int64)
+        np.cumsum(np.bincount(terms, minlength=vocabulary_size), out=self.offsets[1:])
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def lookup(self, term_id: int) -> Tuple[np.ndarray[Any, Any], np.ndarray[Any, Any]]:
+        # Rows containing a term and its frequencies; empty for newer terms
+        if term_id + 1 >= len(self.offsets):
+            return self.docs[:0], self.tf[:0]
+        start, end = self.offsets[term_id], self.offsets[term_id + 1]
+        return self.docs[start:end], self.tf[start:end]
+
+    def terms(self) -> np.ndarray[Any, Any]:
+        # Term ID of every posting
+        return np.repeat(
+            np.arange(len(self.offsets) - 1, dtype=np.int32), np.diff(self.offsets)
+        )
+
+    @classmethod
+    def merge(
+        cls, older: "_Postings", newer: "_Postings", vocabulary_size: int
+    ) -> "_Postings":
+        return cls(
+            np.concatenate([older.terms(), newer.terms()]),
+            np.concatenate([older.docs, newer.docs]),
+            np.concatenate([older.tf, newer.tf]),
+            vocabulary_size,
+        )
+
+
+class BM25Index:
+    """
+    Compact, array-backed BM25 inverted index that grows by appending rows.
+
+    Each added batch of rows becomes a segment of CSR postings over a shared
+    vocabulary, and segments of similar size are merged like a binary counter,
+    so adding N rows in batches costs O(N log N) and a query visits O(log N)
+    segments. Document frequencies and the average length include rows the
+    caller treats as deleted, as in Lucene, until the index is rebuilt.
+    """
+
+    def __init__(self, texts: List[str]) -> None:
+        """
+        Builds the index over a list of texts.
+
+        Args:
+            texts (List[str]): Texts to index, one per row.
+        """
+        self.vocabulary: Dict[str, int] = {}
+        self.segments: List[_Postings] = []
+        self.num_docs = 0
+        self._doc_lengths = np.zeros(0, dtype=np.float32)
+        self._total_length = 0.0
+        self.add(texts)
+
+    @property
+    def doc_lengths(self) -> np.ndarray[Any, Any]:
+        return self._doc_lengths[: self.num_docs]
+
+    @property
+    def average_length(self) -> float:
+        return self._total_length / self.num_docs if self.num_docs else 0.0
+
+    def add(self, texts: List[str]) -> None:
+        """
+        Appends rows to the index.
+
+        Args:
+            texts (List[str]): Texts of the new rows, which follow the existing rows.
+        """
+        term_ids: List[int] = []
+        doc_ids: List[int] = []
+        tfs: List[int] = []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+        for i, text in enumerate(texts):
+            tokens = tokenize(text)
+            doc_lengths[i] = len(tokens)
+            for term, tf in Counter(tokens).items():
+                term_ids.append(self.vocabulary.setdefault(term, len(self.vocabulary)))
+                doc_ids.append(self.num_docs + i)
+                tfs.append(tf)
+        self._doc_lengths = _append(self._doc_lengths, self.num_docs, doc_lengths)
+        self._total_length += float(doc_lengths.sum())
+        self.num_docs += len(texts)
+        if not term_ids:
+            return
+
+        self.segments.append(
+            _Postings(
+                np.asarray(term_ids, dtype=np.int32),
+                np.asarray(doc_ids, dtype=np.int32),
+                np.asarray(tfs, dtype=np.float32),
+                len(self.vocabulary),
+            )
+        )
+        while len(self.segments) > 1 and len(self.segments[-2]) <= len(
+            self.segments[-1]
+        ):
+            newer = self.segments.pop()
+            older = self.segments.pop()
+            self.segments.append(_Postings.merge(older, newer, len(self.vocabulary)))
+
+    def score(self, query: str) -> np.ndarray[Any, Any]:
+        """
+        Scores every row against a query.
+
+        Args:
+            query (str): The query text.
+
+        Returns:
+            np.ndarray[Any, Any]: BM25 score per row (0 for rows without query terms).
+        """
+        scores = np.zeros(self.num_docs, dtype=np.float32)
+        if not self.num_docs:
+            return scores
+        norms = BM25_K1 * (
+            1 - BM25_B + BM25_B * self.doc_lengths / max(self.average_length, 1e-9)
+        )
+        for term in tokenize(query):
+            term_id = self.vocabulary.get(term)
+            if term_id is None:
+                continue
+            postings = [segment.lookup(term_id) for segment in self.segments]
+            df = sum(len(docs) for docs, _ in postings)
+            idf = math.log(1 + (self.num_docs - df + 0.5) / (df + 0.5))
+            for docs, tf in postings:
+                scores[docs] += idf * tf / (tf + norms[docs])
+        return scores
+
+
+class LocalRetrievalEngine:
+    """
+    In-process hybrid retrieval engine that needs no external service.
+
+    Embeddings are kept in a memory-mapped float32 matrix and searched with
+    vectorised NumPy top-k; chunk texts are searched with an array-backed BM25
+    index. Both legs are fused with HYBRID_FUSION_METHOD, defaulting to the same
+    min-max/weighted-mean scheme as the OpenSearch search pipeline.
+
+    The index files are append-only: each batch appends its vectors and then
+    its metadata lines, and deletions append row numbers to a tombstone file.
+    On open, vector rows without metadata (left by a crash between the two
+    writes) and torn trailing lines are dropped. Once enough rows are deleted,
+    the live rows are rewritten into a new generation of files, switched to by
+    atomically replacing a small manifest, so indexing costs O(batch) and not
+    O(index size). The manifest also records the vector dimension, and an
+    index of another dimension is refused rather than truncated.
+    """
+
+    def __init__(self, index_dir: str, dimension: int = EMBEDDING_DIMENSION) -> None:
+        """
+        Opens (or creates) the engine's on-disk index.
+
+        Args:
+            index_dir (str): Directory holding the vector matrix and chunk metadata.
+            dimension (int, optional): Embedding dimension. Defaults to EMBEDDING_DIMENSION.
+
+        Raises:
+            RuntimeError: If the index on disk holds vectors of another dimension.
+        """
+        os.makedirs(index_dir, exist_ok=True)
+        self.dimension = dimension
+        self._index_dir = index_dir
+        self._manifest_path = os.path.join(index_dir, "manifest.json")
+        self._lock = threading.RLock()
+        self._generation = 0
+        if os.path.exists(self._manifest_path):
+            with open(self._manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+            self._generation = manifest["generation"]
+            # Vectors of another dimension (e.g. after toggling the projection)
+            # would otherwise look like crash leftovers and be truncated away
+            if manifest.get("dimension") != dimension:
+                raise RuntimeError(
+                    f"Local index in {index_dir} stores {manifest.get('dimension')}-"
+                    f"dimensional vectors, but {dimension} are configured; delete "
+                    "the directory and re-ingest, or restore the previous settings."
+                )
+            self._load()
+        else:
+            self._load(verify_dimension=True)
+            self._write_manifest(self._generation)
+        logger.info(f"Local retrieval engine opened with {len(self._row_of)} chunks.")
+
+    def ensure_ready(self) -> None:
+        """
+        No-op; the local index is created when the engine is opened.
+        """
+
+    def search(
+        self, query_text: str, query_embedding: List[float], top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Performs a hybrid search combining BM25 and vector similarity.
+
+        Args:
+            query_text (str): The text query for BM25 search.
+            query_embedding (List[float]): Embedding vector for vector search.
+            top_k (int, optional): Number of top results to retrieve. Defaults to 5.
+
+        Returns:
+            List[Dict[str, Any]]: OpenSearch-style hits with '_id', '_score' and '_source'.
+        """
+        with self._lock:
+            if not self._row_of:
+                return []
+            if self._bm25 is None:
+                self._bm25 = BM25Index([chunk["text"] for chunk in self._chunks])
+            live = self._live[: len(self._chunks)]
+            lexical_scores = np.where(live, self._bm25.score(query_text), 0.0)
+
+            query = np.asarray(query_embedding, dtype=np.float32)
+            # Squared L2 distance, scored like OpenSearch's l2 space: 1 / (1 + d^2)
+            distances = (
+                self._squared_norms[: len(self._chunks)]
+                - 2 * (self._vectors @ query)
+                + float(query @ query)
+            )
+            vector_scores = np.where(
+                live, 1.0 / (1.0 + np.maximum(distances, 0.0)), 0.0
+            )
+
+            depth = max(HYBRID_CANDIDATE_DEPTH or top_k, top_k)
+            lexical_hits = self._top_hits(lexical_scores, depth)
+            vector_hits = self._top_hits(vector_scores, depth)
+
+        logger.info(f"Local hybrid search completed for query '{query_text}'.")
+        return fuse(
+            [lexical_hits, vector_hits],
+            [HYBRID_LEXICAL_WEIGHT, HYBRID_VECTOR_WEIGHT],
+            top_k,
+            method=HYBRID_FUSION_METHOD or "minmax",
+        )
+
+    def index_documents(
+        self, documents: Iterable[Dict[str, Any]]
+    ) -> Tuple[int, List[Any]]:
+        """
+        Adds or replaces chunks in the local index.
+
+        Args:
+            documents (Iterable[Dict[str, Any]]): Document dictionaries with 'doc_id', 'text', 'embedding', and 'document_name',
+                and optionally the chunk's 'start_offset' and 'end_offset' and the 'projection' its embedding was made with.
+                Documents without an embedding are embedded with embed_documents.
+
+        Returns:
+            Tuple[int, List[Any]]: Number of indexed chunks and an (always empty) list of errors.
+        """
+        documents = list(documents)
+        if not documents:
+            return 0, []
+        embed_documents(documents)
+
+        prefix = "passage: " if ASSYMETRIC_EMBEDDING else ""
+        new_chunks = [
+            {
+                "id": doc["doc_id"],
+                "text": f"{prefix}{doc['text']}",
+                "document_name": doc["document_name"],
+                **{
+                    field: doc[field]
+                    for field in ("start_offset", "end_offset", "projection")
+                    if doc.get(field) is not None
+                },
+            }
+            for doc in documents
+        ]
+        matrix = np.asarray(
+            [doc["embedding"] for doc in documents], dtype=np.float32
+        ).reshape(len(documents), self.dimension)
+
+        with self._lock:
+            # Vectors first and metadata last, so a crash in between leaves only
+            # vector rows without metadata, which are dropped on open
+            with open(self._path("vectors.f32"), "ab") as f:
+                f.write(matrix.tobytes())
+            with open(self._path("chunks.jsonl"), "a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(chunk) + "\n" for chunk in new_chunks))
+
+            replaced = []
+            for row, chunk in enumerate(new_chunks, start=len(self._chunks)):
+                if chunk["id"] in self._row_of:
+                    replaced.append(self._row_of[chunk["id"]])
+                self._row_of[chunk["id"]] = row
+            self._append_rows(new_chunks, matrix)
+            self._delete_rows(replaced)
+        bump_index_generation()
+        logger.info(f"Indexed {len(documents)} chunks into the local engine.")
+        return len(documents), []
+
+    def update_document(
+        self,
+        document_name: str,
+        chunks: List[str],
+        offsets: Optional[List[Tuple[int, int]]] = None,
+    ) -> Dict[str, int]:
+        """
+        Brings the indexed chunks of a document in line with a new chunk set.
+
+        New chunks are indexed first; outdated ones are deleted only if that
+        succeeded.
+
+        Args:
+            document_name (str): Name of the document.
+            chunks (List[str]): The document's new list of text chunks.
+            offsets (Optional[List[Tuple[int, int]]]): Character span of each chunk, if known.
+
+        Returns:
+            Dict[str, int]: Number of chunks added, removed, left unchanged and failed to index.
+        """
+        chunk_ids = make_chunk_ids(document_name, chunks)
+        indexed_ids = self._document_ids(document_name)
+        added = [
+            make_chunk_document(chunk_id, chunk, document_name, offsets, i)
+            for i, (chunk_id, chunk) in enumerate(zip(chunk_ids, chunks))
+            if chunk_id not in indexed_ids
+        ]
+        _, errors = self.index_documents(added)
+        removed_ids = indexed_ids.difference(chunk_ids)
+        if removed_ids and not errors:
+            with self._lock:
+                self._remove_ids(removed_ids)
+        return {
+            "added": len(added),
+            "removed": 0 if errors else len(removed_ids),
+            "unchanged": len(chunk_ids) - len(added),
+            "failed": len(errors),
+        }
+
+    def delete_documents_by_document_name(self, document_name: str) -> None:
+        """
+        Deletes all chunks of a document and removes it from the catalog.
+
+        Args:
+            document_name (str): Name of the document to delete.
+        """
+        with self._lock:
+            self._remove_ids(self._document_ids(document_name))
+        delete_document(document_name)
+        logger.info(f"Deleted '{document_name}' from the local engine.")
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """
+        Yields every indexed chunk as a document dictionary, e.g. for re-embedding.
+
+        Returns:
+            Iterator[Dict[str, Any]]: Documents with 'doc_id', 'text' (without the passage prefix),
+                'document_name', any offsets and the 'projection' of the stored vector (None if unrecorded).
+        """
+        with self._lock:
+            chunks = [self._chunks[row] for row in sorted(self._row_of.values())]
+        prefix = "passage: " if ASSYMETRIC_EMBEDDING else ""
+        for chunk in chunks:
+            text = chunk["text"]
+            doc = {
+                "doc_id": chunk["id"],
+                "text": text[len(prefix) :] if text.startswith(prefix) else text,
+                "document_name": chunk["document_name"],
+                "projection": chunk.get("projection"),
+            }
+            if "start_offset" in chunk:
+                doc["start_offset"] = chunk["start_offset"]
+                doc["end_offset"] = chunk["end_offset"]
+            yield doc
+
+    def list_document_names(self) -> List[str]:
+        """
+        Returns the names of all indexed documents.
+
+        Returns:
+            List[str]: Sorted document names.
+        """
+        with self._lock:
+            return sorted(
+                {self._chunks[row]["document_name"] for row in self._row_of.values()}
+            )
+
+    def _path(self, name: str, generation: Optional[int] = None) -> str:
+        # Path of an index file; generation 0 uses the plain names
+        generation = self._generation if generation is None else generation
+        if generation:
+            stem, extension = os.path.splitext(name)
+            name = f"{stem}.{generation}{extension}"
+        return os.path.join(self._index_dir, name)
+
+    def _load(self, verify_dimension: bool = False) -> None:
+        # Reads the current generation, dropping anything a crash left half-written.
+        # Without a recorded dimension, extra vector bytes are not assumed to be
+        # crash leftovers
+        self._chunks: List[Dict[str, Any]] = [
+            json.loads(line)
+            for line in _read_complete_lines(self._path("chunks.jsonl"))
+        ]
+        rows = len(self._chunks)
+        vectors_path = self._path("vectors.f32")
+        row_bytes = 4 * self.dimension
+        if not os.path.exists(vectors_path):
+            open(vectors_path, "wb").close()
+        if verify_dimension and os.path.getsize(vectors_path) != rows * row_bytes:
+            raise RuntimeError(
+                f"Local index in {self._index_dir} does not hold {self.dimension}-"
+                "dimensional vectors; delete the directory and re-ingest."
+            )
+        if os.path.getsize(vectors_path) > rows * row_bytes:
+            logger.warning("Dropping local index vectors without chunk metadata.")
+            os.truncate(vectors_path, rows * row_bytes)
+        elif os.path.getsize(vectors_path) < rows * row_bytes:
+            raise RuntimeError(f"Local index in {self._index_dir} lacks vectors.")
+
+        deleted = {
+            int(line)
+            for line in _read_complete_lines(self._path("deleted.txt"))
+            if int(line) < rows
+        }
+        self._row_of: Dict[str, int] = {}
+        for row, chunk in enumerate(self._chunks):
+            if row in deleted:
+                continue
+            # A crash before a replaced row was marked deleted leaves two copies
+            if chunk["id"] in self._row_of:
+                deleted.add(self._row_of[chunk["id"]])
+            self._row_of[chunk["id"]] = row
+        self._deleted_count = len(deleted)
+        self._live = np.ones(rows, dtype=bool)
+        self._live[list(deleted)] = False
+        self._open_vectors()
+        self._squared_norms = np.einsum("ij,ij->i", self._vectors, self._vectors)
+        self._bm25: Optional[BM25Index] = None
+
+    def _open_vectors(self) -> None:
+        rows = len(self._chunks)
+        if rows:
+            self._vectors = np.memmap(
+                self._path("vectors.f32"),
+                dtype=np.float32,
+                mode="r",
+                shape=(rows, self.dimension),
+            )
+        else:
+            self._vectors = np.zeros((0, self.dimension), dtype=np.float32)
+
+    def _append_rows(
+        self, new_chunks: List[Dict[str, Any]], matrix: np.ndarray[Any, Any]
+    ) -> None:
+        # Extends the in-memory state by rows already written to disk
+        rows = len(self._chunks)
+        self._chunks.extend(new_chunks)
+        self._squared_norms = _append(
+            self._squared_norms, rows, np.einsum("ij,ij->i", matrix, matrix)
+        )
+        self._live = _append(self._live, rows, np.ones(len(new_chunks), dtype=bool))
+        if self._bm25 is not None:
+            self._bm25.add([chunk["text"] for chunk in new_chunks])
+        self._open_vectors()
+
+    def _document_ids(self, document_name: str) -> Set[str]:
+        with self._lock:
+            return {
+                chunk_id
+                for chunk_id, row in self._row_of.items()
+                if self._chunks[row]["document_name"] == document_name
+            }
+
+    def _remove_ids(self, chunk_ids: Set[str]) -> None:
+        rows = [self._row_of.pop(i) for i in chunk_ids if i in self._row_of]
+        if rows:
+            self._delete_rows(rows)
+            bump_index_generation()
+
+    def _delete_rows(self, rows: List[int]) -> None:
+        # Marks rows deleted and compacts the files once enough rows are deleted
+        rows = [row for row in rows if self._live[row]]
+        if not rows:
+            return
+        with open(self._path("deleted.txt"), "a", encoding="utf-8") as f:
+            f.write("".join(f"{row}\n" for row in rows))
+        self._live[rows] = False
+        self._deleted_count += len(rows)
+        if self._deleted_count >= max(
+            _COMPACT_MIN_DELETED, _COMPACT_DELETED_RATIO * len(self._chunks)
+        ):
+            self._compact()
+
+    def _compact(self) -> None:
+        # Rewrites the live rows into the next generation of files
+        keep = np.flatnonzero(self._live[: len(self._chunks)])
+        generation = self._generation + 1
+        kept_vectors = np.array(self._vectors[keep], dtype=np.float32)
+        kept_chunks = [self._chunks[row] for row in keep]
+        with open(self._path("vectors.f32", generation), "wb") as f:
+            f.write(kept_vectors.tobytes())
+        with open(self._path("chunks.jsonl", generation), "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(chunk) + "\n" for chunk in kept_chunks))
+        self._write_manifest(generation)
+
+        # Release the memory map before removing the file underneath it
+        self._vectors = kept_vectors
+        for name in ("vectors.f32", "chunks.jsonl", "deleted.txt"):
+            if os.path.exists(self._path(name)):
+                os.remove(self._path(name))
+        self._generation = generation
+        self._squared_norms = self._squared_norms[keep]
+        self._chunks = kept_chunks
+        self._row_of = {chunk["id"]: row for row, chunk in enumerate(kept_chunks)}
+        self._live = np.ones(len(kept_chunks), dtype=bool)
+        self._deleted_count = 0
+        self._bm25 = None
+        self._open_vectors()
+        logger.info(f"Compacted the local index to {len(kept_chunks)} chunks.")
+
+    def _write_manifest(self, generation: int) -> None:
+        # Atomically records the current generation and the vector dimension
+        with open(f"{self._manifest_path}.tmp", "w", encoding="utf-8") as f:
+            json.dump({"generation": generation, "dimension": self.dimension}, f)
+        os.replace(f"{self._manifest_path}.tmp", self._manifest_path)
+
+    def _top_hits(
+        self, scores: np.ndarray[Any, Any], top_k: int
+    ) -> List[Dict[str, Any]]:
+        # Rows with a score of 0 (deleted, or no query term) are left out
+        k = min(top_k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.argsort(-scores[candidates])]
+        return [
+            {
+                "_id": self._chunks[row]["id"],
+                "_score": float(scores[row]),
+                "_source": {
+                    field: value
+                    for field, value in self._chunks[row].items()
+                    if field != "id"
+                },
+            }
+            for row in candidates
+            if scores[row] > 0
+        ]
+
+
+def _read_complete_lines(path: str) -> List[str]:
+    # Returns the newline-terminated lines of a file and truncates a torn last line
+    if not os.path.exists(path):
+        return []
+    lines = []
+    complete = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if not line.endswith(b"\n"):
+                break
+            lines.append(line.decode("utf-8"))
+            complete += len(line)
+    if complete < os.path.getsize(path):
+        logger.warning(f"Dropping a partially written line from {path}.")
+        os.truncate(path, complete)
+    return lines
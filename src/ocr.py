@@ -1,69 +1,301 @@
+import hashlib
 import io
 import logging
-from typing import Optional
+import multiprocessing
+import os
+import signal
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import TYPE_CHECKING, Dict, Iterator, Optional, Tuple
 
-import pytesseract
-from PIL import Image
-from PyPDF2 import PageObject, PdfReader
+from src.constants import (
+    OCR_BINARIZE,
+    OCR_CACHE_DIR,
+    OCR_MAX_IMAGE_SIDE,
+    OCR_MIN_IMAGE_PIXELS,
+    OCR_MIN_IMAGE_SIDE,
+    PDF_EXTRACTION_WORKERS,
+    PDF_PAGE_TIMEOUT_SECONDS,
+)
+from src.utils import TextCleaner, setup_logging
 
-from src.constants import LOG_FILE_PATH
-from src.utils import clean_text, setup_logging
+# PDF and OCR libraries are imported where used, keeping this module cheap to import
+if TYPE_CHECKING:
+    from PIL import Image
+    from PyPDF2 import PageObject, PdfReader
 
 # Configure logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Longest side (pixels) of the thumbnail used for the blank image check
+_CONTRAST_CHECK_SIDE = 256
 
-def extract_text_from_pdf(file_path: str) -> str:
+# PDF reader opened once per worker process by _init_page_worker
+_worker_reader: Optional["PdfReader"] = None
+
+
+def extract_text_from_pdf(file_path: str, parallel: bool = False) -> str:
     """
     Extracts text from a PDF file. Uses OCR if text extraction fails for any page.
 
     Args:
         file_path (str): Path to the PDF file.
+        parallel (bool, optional): Whether to extract pages in a process pool. Defaults to False.
 
     Returns:
         str: Extracted and cleaned text from the PDF.
     """
-    text = ""
-    with open(file_path, "rb") as f:
-        pdf_reader = PdfReader(f)
-        logger.info(f"Opened PDF file for text extraction: {file_path}")
-
-        for page_num in range(len(pdf_reader.pages)):
-            page = pdf_reader.pages[page_num]
-            try:
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text
-                    logger.info(f"Extracted text from page {page_num} without OCR.")
-                else:
-                    logger.info(f"No text found on page {page_num}; attempting OCR.")
-                    text += extract_text_from_images(page)
-            except Exception as e:
-                logger.error(f"Error processing page {page_num}: {e}")
-
-    cleaned_text = clean_text(text)
+    max_workers = PDF_EXTRACTION_WORKERS if parallel else 1
+    # Pages are cleaned as they arrive, so the raw text is never held in full
+    cleaner = TextCleaner()
+    cleaned_pages = [
+        cleaner.feed(page_text)
+        for _, page_text in iter_pdf_page_texts(file_path, max_workers)
+    ]
+    cleaned_pages.append(cleaner.flush())
+    cleaned_text = "".join(cleaned_pages)
     logger.info(f"Completed text extraction for {file_path}")
     return cleaned_text
 
 
-def extract_text_from_images(page: PageObject) -> str:
+def iter_pdf_page_texts(
+    file_path: str,
+    max_workers: int = PDF_EXTRACTION_WORKERS,
+    page_timeout: float = PDF_PAGE_TIMEOUT_SECONDS,
+) -> Iterator[Tuple[int, str]]:
+    """
+    Yields the raw text of each page of a PDF file in page order.
+
+    With more than one worker, pages are extracted (and OCR'd) in a process pool
+    and each page is yielded as soon as it and all preceding pages are done.
+    Pages are handed to the pool only when a worker is free, so a page's
+    deadline runs from its submission. A page past its deadline yields empty
+    text; as a running page cannot be cancelled, the pool's processes (and the
+    tesseract processes they started) are then killed and the other pages in
+    flight resubmitted to a new pool. The pool is also killed when the caller
+    stops iterating early.
+
+    Args:
+        file_path (str): Path to the PDF file.
+        max_workers (int, optional): Maximum number of worker processes. Defaults to PDF_EXTRACTION_WORKERS.
+        page_timeout (float, optional): Seconds a page may take from its submission to the pool
+            before empty text is yielded for it. Defaults to PDF_PAGE_TIMEOUT_SECONDS.
+
+    Yields:
+        Tuple[int, str]: The page number and the text extracted from that page.
+    """
+    from PyPDF2 import PdfReader
+
+    pdf_reader = PdfReader(file_path)
+    num_pages = len(pdf_reader.pages)
+    logger.info(f"Opened PDF file for text extraction: {file_path}")
+
+    if max_workers <= 1 or num_pages <= 1:
+        for page_num, page in enumerate(pdf_reader.pages):
+            yield page_num, extract_text_from_page(page, page_num)
+        return
+
+    workers = min(max_workers, num_pages)
+    executor = _start_page_pool(file_path, workers)
+    running: Dict[int, Tuple["Future[str]", float]] = {}  # Page -> future, deadline
+    results: Dict[int, str] = {}
+    next_page = 0
+    try:
+        for page_num in range(num_pages):
+            while page_num not in results:
+                # Keep the workers busy, at most a few pages ahead of the caller
+                while (
+                    next_page < num_pages
+                    and len(running) < workers
+                    and next_page < page_num + 4 * workers
+                ):
+                    future = executor.submit(_extract_page_in_worker, next_page)
+                    running[next_page] = (future, time.monotonic() + page_timeout)
+                    next_page += 1
+
+                first_deadline = min(deadline for _, deadline in running.values())
+                wait(
+                    [future for future, _ in running.values()],
+                    timeout=max(first_deadline - time.monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+                restart = False
+                for page, (future, deadline) in list(running.items()):
+                    if future.done():
+                        del running[page]
+                        try:
+                            results[page] = future.result()
+                        except Exception as e:
+                            logger.error(f"Error processing page {page}: {e}")
+                            results[page] = ""
+                            # A crashed worker breaks the whole pool
+                            restart = restart or isinstance(e, BrokenProcessPool)
+                    elif deadline <= time.monotonic():
+                        del running[page]
+                        logger.error(
+                            f"Timed out after {page_timeout}s extracting page {page}."
+                        )
+                        results[page] = ""
+                        restart = True
+
+                if restart:
+                    _stop_page_pool(executor, kill=True)
+                    executor = _start_page_pool(file_path, workers)
+                    for page in sorted(running):
+                        future = executor.submit(_extract_page_in_worker, page)
+                        running[page] = (future, time.monotonic() + page_timeout)
+            yield page_num, results.pop(page_num)
+    finally:
+        _stop_page_pool(executor, kill=bool(running))
+
+
+def extract_text_from_page(page: "PageObject", page_num: int) -> str:
+    """
+    Extracts text from a single PDF page, falling back to OCR if the page has no text.
+
+    Args:
+        page (PageObject): The PDF page object.
+        page_num (int): The page number, used for logging.
+
+    Returns:
+        str: Text extracted from the page, or an empty string on failure.
+    """
+    try:
+        page_text = page.extract_text()
+        if page_text:
+            logger.info(f"Extracted text from page {page_num} without OCR.")
+            return page_text
+        logger.info(f"No text found on page {page_num}; attempting OCR.")
+        return extract_text_from_images(page)
+    except Exception as e:
+        logger.error(f"Error processing page {page_num}: {e}")
+        return ""
+
+
+def extract_text_from_images(page: "PageObject") -> str:
     """
     Extracts text from images on a page using OCR.
 
+    Tiny or blank images (logos, rules, decorations) are skipped, and OCR results
+    are cached by image content so an image repeated across pages or documents
+    is only OCR'd once.
+
     Args:
         page (PageObject): The PDF page object containing images.
 
     Returns:
         str: Extracted text from images using OCR.
     """
+    import pytesseract
+    from PIL import Image
+
     text = ""
     for image_file_object in page.images:
         try:
-            image = Image.open(io.BytesIO(image_file_object.data))
-            ocr_text = pytesseract.image_to_string(image)
+            image_data = image_file_object.data
+            cache_path = _ocr_cache_path(image_data)
+            if os.path.exists(cache_path):
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    text += f.read()
+                logger.info("Reused cached OCR text for image.")
+                continue
+
+            image = Image.open(io.BytesIO(image_data))
+            if not _is_worth_ocr(image_data):
+                ocr_text = ""
+                logger.info(f"Skipped OCR for decorative image of size {image.size}.")
+            else:
+                ocr_text = pytesseract.image_to_string(_prepare_for_ocr(image))
+                logger.info("Extracted text from image using OCR.")
+            _write_ocr_cache(cache_path, ocr_text)
             text += ocr_text
-            logger.info("Extracted text from image using OCR.")
         except Exception as e:
             logger.error(f"Error processing image for OCR: {e}")
     return text
+
+
+def _is_worth_ocr(image_data: bytes) -> bool:
+    from PIL import Image
+
+    # Image.open only reads the header, so the size checks do not decode pixels
+    image = Image.open(io.BytesIO(image_data))
+    width, height = image.size
+    if min(width, height) < OCR_MIN_IMAGE_SIDE:
+        return False
+    if width * height < OCR_MIN_IMAGE_PIXELS:
+        return False
+    # The contrast check has to decode pixels: draft() lets JPEGs decode at a
+    # reduced scale, and the grayscale conversion and extrema run on a thumbnail.
+    # This is a separate image object, so the caller still OCRs full resolution.
+    image.draft("L", (_CONTRAST_CHECK_SIDE, _CONTRAST_CHECK_SIDE))
+    image.thumbnail((_CONTRAST_CHECK_SIDE, _CONTRAST_CHECK_SIDE))
+    low, high = image.convert("L").getextrema()
+    return bool(high - low >= 32)
+
+
+def _prepare_for_ocr(image: "Image.Image") -> "Image.Image":
+    if OCR_MAX_IMAGE_SIDE is not None and max(image.size) > OCR_MAX_IMAGE_SIDE:
+        image = image.copy()
+        image.thumbnail((OCR_MAX_IMAGE_SIDE, OCR_MAX_IMAGE_SIDE))
+    if OCR_BINARIZE:
+        image = image.convert("L").point(lambda p: 255 if p > 128 else 0, mode="1")
+    return image
+
+
+def _ocr_cache_path(image_data: bytes) -> str:
+    digest = hashlib.sha256(image_data)
+    # Preprocessing settings change the OCR output, so they are part of the key
+    digest.update(f"{OCR_MAX_IMAGE_SIDE}:{OCR_BINARIZE}".encode("utf-8"))
+    key = digest.hexdigest()
+    return os.path.join(OCR_CACHE_DIR, key[:2], f"{key}.txt")
+
+
+def _write_ocr_cache(cache_path: str, ocr_text: str) -> None:
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(ocr_text)
+    os.replace(tmp_path, cache_path)
+
+
+def _start_page_pool(file_path: str, workers: int) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_page_worker,
+        initargs=(file_path,),
+    )
+
+
+def _stop_page_pool(executor: ProcessPoolExecutor, kill: bool) -> None:
+    # Cancels queued pages and, if kill is set, kills the workers' process groups
+    processes = list((getattr(executor, "_processes", None) or {}).values())
+    executor.shutdown(wait=not kill, cancel_futures=True)
+    if not kill:
+        return
+    for process in processes:
+        if not process.is_alive():
+            continue
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except (AttributeError, OSError):
+            # No process groups (Windows), or the worker has not created its own yet
+            process.kill()
+    logger.warning(f"Killed {len(processes)} PDF extraction workers.")
+
+
+def _init_page_worker(file_path: str) -> None:
+    from PyPDF2 import PdfReader
+
+    # Own process group, so tesseract processes started by OCR die with the worker
+    if hasattr(os, "setpgrp"):
+        os.setpgrp()
+    global _worker_reader
+    _worker_reader = PdfReader(file_path)
+
+
+def _extract_page_in_worker(page_num: int) -> str:
+    assert _worker_reader is not None
+    return extract_text_from_page(_worker_reader.pages[page_num], page_num)
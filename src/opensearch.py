@@ -1,51 +1,267 @@
 import logging
-from typing import Any, Dict, List
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Dict, Hashable, List, Optional
 
-from opensearchpy import OpenSearch
-
-from src.constants import OPENSEARCH_HOST, OPENSEARCH_INDEX, OPENSEARCH_PORT
+from src.cache import LRUCache, get_index_generation
+from src.constants import (
+    HYBRID_CANDIDATE_DEPTH,
+    HYBRID_FUSION_METHOD,
+    HYBRID_LEXICAL_WEIGHT,
+    HYBRID_VECTOR_WEIGHT,
+    OPENSEARCH_HEALTH_CHECK_INTERVAL_SECONDS,
+    OPENSEARCH_HEALTH_CHECK_TIMEOUT_SECONDS,
+    OPENSEARCH_HOST,
+    OPENSEARCH_INDEX,
+    OPENSEARCH_POOL_MAXSIZE,
+    OPENSEARCH_PORT,
+    OPENSEARCH_SEARCH_PIPELINE,
+    RETRIEVAL_CACHE_MAX_ENTRIES,
+    RETRIEVAL_CACHE_TTL_SECONDS,
+    VECTOR_QUANTIZATION,
+)
+from src.fusion import fuse
+from src.quantization import (
+    EXACT_EMBEDDING_FIELD,
+    oversampled_k,
+    quantize,
+    rescore_hits,
+)
 from src.utils import setup_logging
 
+# opensearchpy loads when the first client is created
+if TYPE_CHECKING:
+    from opensearchpy import OpenSearch
+
 # Initialize logger
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Shared client and the time of its last health check
+_client: Optional["OpenSearch"] = None
+_client_lock = threading.Lock()
+_last_health_check = 0.0
+# Client used only for health pings: short timeout and no retries
+_health_client: Optional["OpenSearch"] = None
+
+# Process-wide cache of hybrid search results shared by all sessions
+_result_cache: LRUCache[List[Dict[str, Any]]] = LRUCache(
+    RETRIEVAL_CACHE_MAX_ENTRIES, ttl_seconds=RETRIEVAL_CACHE_TTL_SECONDS
+)
 
-def get_opensearch_client() -> OpenSearch:
+
+def get_opensearch_client() -> "OpenSearch":
     """
-    Initializes and returns an OpenSearch client.
+    Returns the process-wide OpenSearch client, creating it on first use.
+
+    The client keeps a pool of keep-alive connections that is shared by all
+    callers. At most every OPENSEARCH_HEALTH_CHECK_INTERVAL_SECONDS one caller
+    pings the cluster, without holding the lock, so other callers are never
+    blocked behind a slow ping. A new client is swapped in if the ping fails;
+    callers still holding the old one finish their requests on it.
 
     Returns:
         OpenSearch: Configured OpenSearch client instance.
     """
-    client = OpenSearch(
+    global _last_health_check
+    with _client_lock:
+        client = _client
+        now = time.monotonic()
+        due = (
+            client is not None
+            and now - _last_health_check >= OPENSEARCH_HEALTH_CHECK_INTERVAL_SECONDS
+        )
+        if due:
+            # Claimed by this caller, the others keep using the client meanwhile
+            _last_health_check = now
+
+    if client is None:
+        return _replace_client(None)
+    if due and not _ping():
+        logger.warning("OpenSearch health check failed; recreating client.")
+        return _replace_client(client)
+    return client
+
+
+def _replace_client(stale: Optional["OpenSearch"]) -> "OpenSearch":
+    global _client, _last_health_check
+    with _client_lock:
+        # Another caller may have replaced it already
+        if _client is stale:
+            # Not closed: other threads may be mid-request on it; its pooled
+            # connections are released once the last reference is dropped
+            _client = _new_client(timeout=30, max_retries=3, retry_on_timeout=True)
+            _last_health_check = time.monotonic()
+            logger.info("OpenSearch client initialized.")
+        return _client
+
+
+def _ping() -> bool:
+    global _health_client
+    if _health_client is None:
+        _health_client = _new_client(
+            timeout=OPENSEARCH_HEALTH_CHECK_TIMEOUT_SECONDS, max_retries=0
+        )
+    try:
+        return bool(_health_client.ping())
+    except Exception as e:
+        logger.warning(f"OpenSearch health check raised: {e}")
+        return False
+
+
+def _new_client(**kwargs: Any) -> "OpenSearch":
+    from opensearchpy import OpenSearch
+
+    return OpenSearch(
         hosts=[{"host": OPENSEARCH_HOST, "port": OPENSEARCH_PORT}],
         http_compress=True,
-        timeout=30,
-        max_retries=3,
-        retry_on_timeout=True,
+        pool_maxsize=OPENSEARCH_POOL_MAXSIZE,
+        **kwargs,
     )
-    logger.info("OpenSearch client initialized.")
-    return client
+
+
+def search_cache_key(
+    query_text: str,
+    top_k: int,
+    fusion: Optional[str],
+    candidate_depth: Optional[int],
+) -> Hashable:
+    """
+    Builds the result cache key of a hybrid search.
+
+    The key includes the index generation, so results cached before the
+    index last changed in this process are never served.
+
+    Args:
+        query_text (str): The text query; whitespace is normalised.
+        top_k (int): Number of results.
+        fusion (Optional[str]): Fusion method, or None for the search pipeline.
+        candidate_depth (Optional[int]): Hits fetched per leg.
+
+    Returns:
+        Hashable: The cache key.
+    """
+    return (
+        " ".join(query_text.split()),
+        top_k,
+        fusion,
+        candidate_depth,
+        VECTOR_QUANTIZATION,
+        get_index_generation(),
+    )
+
+
+def get_cached_results(key: Hashable) -> Optional[List[Dict[str, Any]]]:
+    """
+    Returns cached hybrid search results for a key from search_cache_key.
+
+    Args:
+        key (Hashable): The cache key.
+
+    Returns:
+        Optional[List[Dict[str, Any]]]: A copy of the cached hits, or None.
+    """
+    hits = _result_cache.get(key)
+    return list(hits) if hits is not None else None
+
+
+def cache_results(key: Hashable, hits: List[Dict[str, Any]]) -> None:
+    """
+    Stores hybrid search results for a key from search_cache_key.
+
+    Args:
+        key (Hashable): The cache key.
+        hits (List[Dict[str, Any]]): The search hits.
+    """
+    _result_cache.put(key, list(hits))
+
+
+def get_retrieval_cache_stats() -> Dict[str, float]:
+    """
+    Returns hit-rate statistics of the hybrid search result cache.
+
+    Returns:
+        Dict[str, float]: Entry count, hits, misses, evictions, expirations and hit rate.
+    """
+    return _result_cache.stats()
 
 
 def hybrid_search(
-    query_text: str, query_embedding: List[float], top_k: int = 5
+    query_text: str,
+    query_embedding: List[float],
+    top_k: int = 5,
+    fusion: Optional[str] = HYBRID_FUSION_METHOD,
+    candidate_depth: Optional[int] = HYBRID_CANDIDATE_DEPTH,
 ) -> List[Dict[str, Any]]:
     """
     Performs a hybrid search combining text-based and vector-based queries.
 
+    Without a fusion method the legs are combined by the server-side search
+    pipeline. With one, both legs are sent in a single _msearch request and
+    fused client-side, so no search pipeline is needed. On a quantized index
+    the k-NN leg is oversampled and rescored with the exact vectors, which
+    always uses client-side fusion (min-max unless a method is given).
+    Results are cached per normalised query, top_k, search parameters and
+    index generation.
+
     Args:
         query_text (str): The text query for text-based search.
         query_embedding (List[float]): Embedding vector for vector-based search.
         top_k (int, optional): Number of top results to retrieve. Defaults to 5.
+        fusion (Optional[str], optional): Client-side fusion method ("minmax", "rrf" or "zscore"), or None for the search pipeline. Defaults to HYBRID_FUSION_METHOD.
+        candidate_depth (Optional[int], optional): Hits fetched per leg for client-side fusion; None uses top_k. Defaults to HYBRID_CANDIDATE_DEPTH.
 
     Returns:
         List[Dict[str, Any]]: List of search results from OpenSearch.
     """
+    if fusion is None and VECTOR_QUANTIZATION is not None:
+        fusion = "minmax"
+    key = search_cache_key(query_text, top_k, fusion, candidate_depth)
+    cached_hits = get_cached_results(key)
+    if cached_hits is not None:
+        logger.info(f"Hybrid search for query '{query_text}' served from cache.")
+        return cached_hits
+
+    if fusion is not None:
+        hits = _msearch_fused(
+            query_text,
+            query_embedding,
+            top_k,
+            fusion,
+            max(candidate_depth or top_k, top_k),
+        )
+        cache_results(key, hits)
+        return hits
+
     client = get_opensearch_client()
+    response = client.search(
+        index=OPENSEARCH_INDEX,
+        body=hybrid_query_body(query_text, query_embedding, top_k),
+        search_pipeline=OPENSEARCH_SEARCH_PIPELINE,
+    )
+    logger.info(f"Hybrid search completed for query '{query_text}' with top_k={top_k}.")
+
+    # Type casting for compatibility with expected return type
+    hits: List[Dict[str, Any]] = response["hits"]["hits"]
+    cache_results(key, hits)
+    return hits
+
 
-    query_body = {
+def hybrid_query_body(
+    query_text: str, query_embedding: List[float], top_k: int
+) -> Dict[str, Any]:
+    """
+    Builds the hybrid query body whose legs are fused by the search pipeline.
+
+    Args:
+        query_text (str): The text query for text-based search.
+        query_embedding (List[float]): Embedding vector for vector-based search.
+        top_k (int): Number of top results to retrieve.
+
+    Returns:
+        Dict[str, Any]: Body for a search request with search_pipeline=OPENSEARCH_SEARCH_PIPELINE.
+    """
+    return {
         "_source": {"exclude": ["embedding"]},  # Exclude embeddings from the results
         "query": {
             "hybrid": {
@@ -65,11 +281,57 @@ def hybrid_search(
         "size": top_k,
     }
 
-    response = client.search(
-        index=OPENSEARCH_INDEX, body=query_body, search_pipeline="nlp-search-pipeline"
-    )
-    logger.info(f"Hybrid search completed for query '{query_text}' with top_k={top_k}.")
 
-    # Type casting for compatibility with expected return type
-    hits: List[Dict[str, Any]] = response["hits"]["hits"]
-    return hits
+def _msearch_fused(
+    query_text: str,
+    query_embedding: List[float],
+    top_k: int,
+    fusion: str,
+    candidate_depth: int,
+) -> List[Dict[str, Any]]:
+    client = get_opensearch_client()
+    header = {"index": OPENSEARCH_INDEX}
+    vector_k = oversampled_k(candidate_depth)
+    body = [
+        header,
+        {
+            "_source": {"exclude": ["embedding", EXACT_EMBEDDING_FIELD]},
+            "query": {"match": {"text": {"query": query_text}}},
+            "size": candidate_depth,
+        },
+        header,
+        {
+            "_source": {"exclude": ["embedding"]},
+            "query": {
+                "knn": {
+                    "embedding": {"vector": quantize(query_embedding), "k": vector_k}
+                }
+            },
+            "size": vector_k,
+        },
+    ]
+    response = client.msearch(body=body)
+
+    result_lists: List[List[Dict[str, Any]]] = []
+    for leg, item in zip(("lexical", "vector"), response["responses"]):
+        if "error" in item:
+            # A failed leg degrades to the other one instead of failing the query
+            logger.error(f"Hybrid search {leg} leg failed: {item['error']}")
+            result_lists.append([])
+        else:
+            result_lists.append(item["hits"]["hits"])
+    if VECTOR_QUANTIZATION is not None:
+        result_lists[1] = rescore_hits(
+            result_lists[1], query_embedding, candidate_depth
+        )
+
+    logger.info(
+        f"Hybrid search completed for query '{query_text}' with top_k={top_k}, "
+        f"fusion={fusion}, candidate_depth={candidate_depth}."
+    )
+    return fuse(
+        result_lists,
+        [HYBRID_LEXICAL_WEIGHT, HYBRID_VECTOR_WEIGHT],
+        top_k,
+        method=fusion,
+    )
@@ -0,0 +1,488 @@
+import logging
+import os
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from src.catalog import DocumentRecord, file_sha256, list_documents, upsert_document
+from src.chunking import Chunk, TokenChunker
+from src.constants import (
+    CHUNKING_STRATEGY,
+    EMBEDDING_BATCH_SIZE,
+    PCA_FIT_SAMPLES,
+    PDF_EXTRACTION_WORKERS,
+    PIPELINE_EMBED_WORKERS,
+    PIPELINE_EXTRACT_WORKERS,
+    PIPELINE_INDEX_WORKERS,
+    PIPELINE_QUEUE_SIZE,
+    TEXT_CHUNK_SIZE,
+)
+from src.embeddings import embed_documents, generate_embeddings
+from src.ingestion import make_chunk_document, make_chunk_ids
+from src.ocr import iter_pdf_page_texts
+from src.projection import get_projection
+from src.retrieval import get_retrieval_backend
+from src.utils import TextChunker, setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Marks the end of a stage's input
+_DONE = object()
+
+# Serializes projection refits of concurrent ingestion runs
+_projection_lock = threading.Lock()
+
+
+@dataclass
+class IngestionResult:
+    """Outcome of ingesting a single document."""
+
+    document_name: str
+    file_path: str
+    sha256: str = ""
+    size_bytes: int = 0
+    page_count: int = 0
+    char_count: int = 0
+    chunk_count: int = 0
+    added_chunks: int = 0
+    removed_chunks: int = 0
+    error: Optional[str] = None
+
+
+class IngestionPipeline:
+    """
+    Streams documents through extraction, chunking, embedding and bulk indexing.
+
+    Each stage runs in its own worker thread(s) and hands work to the next stage
+    through a bounded queue, so embedding of one file overlaps with extraction of
+    the next and indexing of the previous one. Peak memory is bounded by the
+    queue sizes (pages and chunk batches in flight), not by document size.
+    Successfully ingested documents are recorded in the document catalog.
+
+    Chunks are built according to CHUNKING_STRATEGY; token-based chunks are
+    indexed with their character offsets in the cleaned document text.
+
+    Vectors are stored with the version of the projection they were made
+    with. Once a run has finished, update_projection fits or refits the PCA
+    projection if the corpus has grown enough, and re-embeds older vectors.
+    """
+
+    def __init__(
+        self,
+        chunk_size: int = TEXT_CHUNK_SIZE,
+        overlap: int = 100,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        extract_workers: int = PIPELINE_EXTRACT_WORKERS,
+        embed_workers: int = PIPELINE_EMBED_WORKERS,
+        index_workers: int = PIPELINE_INDEX_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+    ) -> None:
+        """
+        Configures the pipeline.
+
+        Args:
+            chunk_size (int, optional): Number of words in each chunk for the "words" strategy. Defaults to TEXT_CHUNK_SIZE.
+            overlap (int, optional): Number of words shared by consecutive chunks for the "words" strategy. Defaults to 100.
+            batch_size (int, optional): Chunks per embedding/indexing batch. Defaults to EMBEDDING_BATCH_SIZE.
+            extract_workers (int, optional): Files extracted concurrently, which split the
+                PDF_EXTRACTION_WORKERS page processes between them. Defaults to PIPELINE_EXTRACT_WORKERS.
+            embed_workers (int, optional): Concurrent embedding workers. Defaults to PIPELINE_EMBED_WORKERS.
+            index_workers (int, optional): Concurrent bulk indexing workers. Defaults to PIPELINE_INDEX_WORKERS.
+            queue_size (int, optional): Capacity of each inter-stage queue. Defaults to PIPELINE_QUEUE_SIZE.
+        """
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.extract_workers = extract_workers
+        # Concurrent files share the OCR processes instead of each starting a full pool
+        self.ocr_workers = max(1, PDF_EXTRACTION_WORKERS // max(1, extract_workers))
+        self.embed_workers = embed_workers
+        self.index_workers = index_workers
+        self.queue_size = queue_size
+
+    def run(self, files: List[Tuple[str, str]]) -> List[IngestionResult]:
+        """
+        Ingests files and blocks until every stage has drained.
+
+        A file that fails at any stage has its already indexed chunks deleted
+        again. A file whose document name repeats an earlier one in files is
+        rejected, as both would be indexed under the same name.
+
+        Args:
+            files (List[Tuple[str, str]]): (document_name, file_path) pairs to ingest.
+
+        Returns:
+            List[IngestionResult]: One result per file, in input order.
+        """
+        start = time.perf_counter()
+        self._results = [IngestionResult(name, path) for name, path in files]
+        self._results_lock = threading.Lock()
+        self._files: "queue.Queue[Tuple[int, str]]" = queue.Queue()
+        self._pages: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        self._to_embed: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+        self._to_index: "queue.Queue[Any]" = queue.Queue(self.queue_size)
+
+        # Files are identified by their position, as names may repeat
+        unique: List[int] = []
+        first_of: Dict[str, int] = {}
+        for key, (name, _) in enumerate(files):
+            if first_of.setdefault(name, key) == key:
+                unique.append(key)
+            else:
+                self._fail(key, ValueError(f"Duplicate document name '{name}'."))
+        for key in unique:
+            if self._results[key].error is None:
+                self._files.put((key, files[key][1]))
+
+        extractors = self._start(self._extract_stage, self.extract_workers)
+        chunker = self._start(self._chunk_stage, 1)
+        embedders = self._start(self._embed_stage, self.embed_workers)
+        indexers = self._start(self._index_stage, self.index_workers)
+
+        # Shut stages down in order once their upstream has finished
+        self._drain(extractors, self._pages, chunker)
+        self._drain(chunker, self._to_embed, embedders)
+        self._drain(embedders, self._to_index, indexers)
+        for thread in indexers:
+            thread.join()
+
+        for key in unique:
+            result = self._results[key]
+            if result.error is not None:
+                self._remove_failed(result)
+                continue
+            upsert_document(
+                DocumentRecord(
+                    document_name=result.document_name,
+                    file_path=result.file_path,
+                    sha256=result.sha256,
+                    size_bytes=result.size_bytes,
+                    page_count=result.page_count,
+                    char_count=result.char_count,
+                    chunk_count=result.chunk_count,
+                )
+            )
+        _try_update_projection()
+        logger.info(
+            f"Ingestion pipeline processed {len(files)} files "
+            f"({sum(r.chunk_count for r in self._results)} chunks) "
+            f"in {time.perf_counter() - start:.2f}s."
+        )
+        return self._results
+
+    def _start(self, target: Any, count: int) -> List[threading.Thread]:
+        threads = [
+            threading.Thread(target=target, name=f"{target.__name__}-{i}", daemon=True)
+            for i in range(max(1, count))
+        ]
+        for thread in threads:
+            thread.start()
+        return threads
+
+    def _drain(
+        self,
+        upstream: List[threading.Thread],
+        downstream_queue: "queue.Queue[Any]",
+        downstream: List[threading.Thread],
+    ) -> None:
+        for thread in upstream:
+            thread.join()
+        for _ in downstream:
+            downstream_queue.put(_DONE)
+
+    def _fail(self, key: int, error: Exception) -> None:
+        with self._results_lock:
+            result = self._results[key]
+            if result.error is None:
+                result.error = str(error)
+        logger.error(f"Ingestion of '{result.document_name}' failed: {error}")
+
+    def _failed(self, key: int) -> bool:
+        with self._results_lock:
+            return self._results[key].error is not None
+
+    def _remove_failed(self, result: IngestionResult) -> None:
+        # Deletes chunks indexed before the file failed; it has no catalog row
+        try:
+            get_retrieval_backend().delete_documents_by_document_name(
+                result.document_name
+            )
+        except Exception as e:
+            logger.error(
+                f"Could not remove the chunks of failed '{result.document_name}': {e}"
+            )
+        result.chunk_count = 0
+
+    def _extract_stage(self) -> None:
+        while True:
+            try:
+                key, file_path = self._files.get_nowait()
+            except queue.Empty:
+                return
+            page_count = 0
+            try:
+                sha256 = file_sha256(file_path)
+                with self._results_lock:
+                    self._results[key].sha256 = sha256
+                    self._results[key].size_bytes = os.path.getsize(file_path)
+                for _, page_text in iter_pdf_page_texts(file_path, self.ocr_workers):
+                    self._pages.put((key, page_text))
+                    page_count += 1
+            except Exception as e:
+                self._fail(key, e)
+            with self._results_lock:
+                self._results[key].page_count = page_count
+            self._pages.put((key, None))
+
+    def _chunk_stage(self) -> None:
+        chunkers: Dict[int, Union[TextChunker, TokenChunker]] = {}
+        batches: Dict[int, List[Dict[str, Any]]] = {}
+        seen: Dict[int, Dict[str, int]] = {}
+        while True:
+            item = self._pages.get()
+            if item is _DONE:
+                return
+            key, page_text = item
+            document_name = self._results[key].document_name
+            if key not in chunkers:
+                chunkers[key] = new_chunker(self.chunk_size, self.overlap)
+            chunker = chunkers[key]
+            batch = batches.setdefault(key, [])
+            chunks: List[Union[str, Chunk]] = []
+            try:
+                if page_text is None:
+                    chunks.extend(chunker.flush())
+                else:
+                    chunks.extend(chunker.feed(page_text))
+            except Exception as e:
+                self._fail(key, e)
+
+            texts, offsets = _split_chunks(chunks)
+            chunk_ids = make_chunk_ids(document_name, texts, seen.setdefault(key, {}))
+            for i, (chunk_id, text) in enumerate(zip(chunk_ids, texts)):
+                batch.append(
+                    make_chunk_document(chunk_id, text, document_name, offsets, i)
+                )
+                if len(batch) >= self.batch_size:
+                    self._to_embed.put((key, batch))
+                    batch = batches[key] = []
+
+            if page_text is None:
+                if batch:
+                    self._to_embed.put((key, batch))
+                with self._results_lock:
+                    self._results[key].char_count = chunker.char_count
+                del chunkers[key], batches[key]
+                seen.pop(key, None)
+
+    def _embed_stage(self) -> None:
+        while True:
+            item = self._to_embed.get()
+            if item is _DONE:
+                return
+            key, batch = item
+            if self._failed(key):
+                continue  # Its chunks are removed once the pipeline has drained
+            try:
+                self._to_index.put((key, embed_documents(batch)))
+            except Exception as e:
+                self._fail(key, e)
+
+    def _index_stage(self) -> None:
+        while True:
+            item = self._to_index.get()
+            if item is _DONE:
+                return
+            key, batch = item
+            if self._failed(key):
+                continue
+            try:
+                success, errors = get_retrieval_backend().index_documents(batch)
+                with self._results_lock:
+                    self._results[key].chunk_count += success
+                if errors:
+                    self._fail(
+                        key, RuntimeError(f"{len(errors)} chunks failed to index")
+                    )
+            except Exception as e:
+                self._fail(key, e)
+
+
+def update_projection(sample_size: int = PCA_FIT_SAMPLES) -> bool:
+    """
+    Fits the PCA projection once the corpus is large enough, and refits it as the corpus grows.
+
+    Until the indexed corpus has the projection's min_samples chunks, vectors
+    are stored truncated. The PCA is then fitted on a reservoir sample of up
+    to sample_size indexed chunks, and refitted each time the corpus has
+    doubled since, until it was fitted on a full sample. After a refit, all
+    chunks whose vectors were made with another projection are re-embedded
+    (their model embeddings usually come from the embedding cache) and
+    re-indexed. Does nothing without a PCA projection or once it is final.
+
+    Args:
+        sample_size (int, optional): Most chunks the PCA is fitted on. Defaults to PCA_FIT_SAMPLES.
+
+    Returns:
+        bool: Whether the projection was (re)fitted.
+    """
+    projection = get_projection()
+    if projection is None or projection.method != "pca":
+        return False
+    with _projection_lock:
+        if projection.fit_samples >= sample_size:
+            return False
+        backend = get_retrieval_backend()
+        rng = random.Random(0)
+        sample: List[str] = []
+        total = stale = 0
+        for total, chunk in enumerate(backend.iter_chunks(), start=1):
+            stale += chunk["projection"] != projection.version
+            if len(sample) < sample_size:
+                sample.append(chunk["text"])
+            else:
+                slot = rng.randrange(total)
+                if slot < sample_size:
+                    sample[slot] = chunk["text"]
+
+        refit = total >= projection.min_samples and (
+            total >= 2 * projection.fit_samples
+        )
+        if refit:
+            projection.fit(generate_embeddings(sample, project=False))
+        elif not projection.fitted:
+            logger.info(
+                f"Keeping truncated vectors until {projection.min_samples} chunks "
+                f"are indexed to fit the PCA projection on ({total} so far)."
+            )
+        # Also picks up vectors a crash left behind during an earlier re-embedding
+        if refit or (projection.fitted and stale):
+            version = projection.version
+            reembedded, errors = backend.index_documents(
+                {key: value for key, value in chunk.items() if key != "projection"}
+                for chunk in backend.iter_chunks()
+                if chunk["projection"] != version
+            )
+            logger.info(
+                f"Re-embedded {reembedded} chunks with projection {version} "
+                f"({len(errors)} errors)."
+            )
+        return refit
+
+
+def _try_update_projection() -> None:
+    # A failed (re)fit leaves the index consistent, so ingestion still succeeds
+    try:
+        update_projection()
+    except Exception as e:
+        logger.error(f"Updating the embedding projection failed: {e}")
+
+
+def new_chunker(
+    chunk_size: int = TEXT_CHUNK_SIZE, overlap: int = 100
+) -> Union[TextChunker, TokenChunker]:
+    """
+    Creates the streaming chunker for CHUNKING_STRATEGY.
+
+    Both first ingestion and updates chunk documents page by page with it, so
+    an unchanged document yields the same chunks and chunk IDs either way.
+
+    Args:
+        chunk_size (int, optional): Number of words in each chunk for the "words" strategy. Defaults to TEXT_CHUNK_SIZE.
+        overlap (int, optional): Number of words shared by consecutive chunks for the "words" strategy. Defaults to 100.
+
+    Returns:
+        Union[TextChunker, TokenChunker]: A fresh chunker.
+    """
+    if CHUNKING_STRATEGY == "tokens":
+        return TokenChunker()
+    return TextChunker(chunk_size, overlap)
+
+
+def update_document(
+    document_name: str, file_path: str, chunk_size: int = TEXT_CHUNK_SIZE
+) -> IngestionResult:
+    """
+    Re-ingests a revised document, indexing only the chunks that changed.
+
+    Documents whose file hash matches the catalog are skipped entirely. Pages
+    are chunked with the same chunker as IngestionPipeline, so unchanged parts
+    of the document keep their chunk IDs.
+
+    Args:
+        document_name (str): Name of the document.
+        file_path (str): Path to the revised file.
+        chunk_size (int, optional): Number of words in each chunk for the "words" strategy. Defaults to TEXT_CHUNK_SIZE.
+
+    Returns:
+        IngestionResult: Outcome of the update, including added and removed chunk counts.
+    """
+    result = IngestionResult(
+        document_name,
+        file_path,
+        sha256=file_sha256(file_path),
+        size_bytes=os.path.getsize(file_path),
+    )
+    record = list_documents().get(document_name)
+    if record is not None and record.sha256 == result.sha256:
+        logger.info(f"'{document_name}' is unchanged; skipping re-indexing.")
+        result.page_count = record.page_count
+        result.char_count = record.char_count
+        result.chunk_count = record.chunk_count
+        return result
+
+    try:
+        chunker = new_chunker(chunk_size)
+        pieces: List[Union[str, Chunk]] = []
+        for _, page_text in iter_pdf_page_texts(file_path):
+            pieces.extend(chunker.feed(page_text))
+            result.page_count += 1
+        pieces.extend(chunker.flush())
+        chunks, offsets = _split_chunks(pieces)
+        stats = get_retrieval_backend().update_document(document_name, chunks, offsets)
+    except Exception as e:
+        logger.error(f"Update of '{document_name}' failed: {e}")
+        result.error = str(e)
+        return result
+
+    result.char_count = chunker.char_count
+    result.chunk_count = len(chunks)
+    result.added_chunks = stats["added"]
+    result.removed_chunks = stats["removed"]
+    if stats["failed"]:
+        # The catalog keeps the old hash, so re-uploading the file retries
+        result.error = f"{stats['failed']} chunks failed to index or delete"
+        logger.error(f"Update of '{document_name}' incomplete: {result.error}")
+        return result
+    upsert_document(
+        DocumentRecord(
+            document_name=document_name,
+            file_path=file_path,
+            sha256=result.sha256,
+            size_bytes=result.size_bytes,
+            page_count=result.page_count,
+            char_count=result.char_count,
+            chunk_count=result.chunk_count,
+        )
+    )
+    _try_update_projection()
+    return result
+
+
+def _split_chunks(
+    chunks: Sequence[Union[str, Chunk]],
+) -> Tuple[List[str], Optional[List[Tuple[int, int]]]]:
+    # Separates chunk texts from their character spans, if the chunker kept them
+    texts = [chunk.text if isinstance(chunk, Chunk) else chunk for chunk in chunks]
+    if chunks and all(isinstance(chunk, Chunk) for chunk in chunks):
+        return texts, [
+            (chunk.start_offset, chunk.end_offset)
+            for chunk in chunks
+            if isinstance(chunk, Chunk)
+        ]
+    return texts, None
@@ -0,0 +1,264 @@
+import functools
+import hashlib
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from src.constants import (
+    EMBEDDING_DIMENSION,
+    EMBEDDING_PROJECTION,
+    PROJECTED_DIMENSION,
+    PROJECTION_PATH,
+)
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Projection methods accepted by EMBEDDING_PROJECTION
+PROJECTION_METHODS = ("pca", "truncate")
+
+
+@dataclass
+class _FittedPCA:
+    # Mean and components of a fitted PCA and the sample size it was fitted on
+    mean: np.ndarray[Any, Any]
+    components: np.ndarray[Any, Any]
+    samples: int
+    version: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        content = self.mean.tobytes() + self.components.tobytes()
+        self.version = f"pca-{hashlib.sha1(content).hexdigest()[:12]}"
+
+
+class EmbeddingProjection:
+    """
+    Reduces embeddings to a lower dimension before they are stored or searched.
+
+    "truncate" keeps the leading dimensions and re-normalises, which suits
+    Matryoshka-trained models. "pca" projects onto the principal components of
+    the corpus. It falls back to truncation until it is fitted on a sample of
+    corpus embeddings, and may be refitted on a larger sample later. The fit
+    is persisted so chunk and query embeddings share the same projection, and
+    each fit has its own version, stored with every vector so that vectors of
+    an older projection can be found and re-embedded.
+    """
+
+    def __init__(
+        self,
+        method: str,
+        dimension: int,
+        path: str,
+        source_dimension: int,
+        min_samples: Optional[int] = None,
+    ) -> None:
+        """
+        Configures the projection, loading a previously fitted PCA from path.
+
+        Args:
+            method (str): One of PROJECTION_METHODS.
+            dimension (int): Dimension of the projected embeddings.
+            path (str): File holding the fitted PCA.
+            source_dimension (int): Dimension of the model's embeddings.
+            min_samples (Optional[int], optional): Fewest embeddings the PCA may be fitted on, and
+                never fewer than dimension. Defaults to dimension.
+
+        Raises:
+            ValueError: If method is unknown or dimension exceeds source_dimension.
+        """
+        if method not in PROJECTION_METHODS:
+            raise ValueError(
+                f"Unknown embedding projection '{method}'; "
+                f"expected one of {PROJECTION_METHODS}"
+            )
+        if not 0 < dimension <= source_dimension:
+            raise ValueError(
+                f"Projected dimension {dimension} must be in 1..{source_dimension}."
+            )
+        self.method = method
+        self.dimension = dimension
+        self.source_dimension = source_dimension
+        self.min_samples = max(min_samples or dimension, dimension)
+        self._path = path
+        self._lock = threading.Lock()
+        # Replaced as a whole on (re)fit, so readers never see a mixed state
+        self._fit: Optional[_FittedPCA] = None
+
+        if method == "pca" and os.path.exists(path):
+            with np.load(path) as data:
+                components = data["components"]
+                if components.shape == (dimension, source_dimension):
+                    self._fit = _FittedPCA(
+                        data["mean"],
+                        components,
+                        int(data["samples"]) if "samples" in data.files else 0,
+                    )
+                    logger.info(f"Loaded PCA projection from {path}.")
+                else:
+                    logger.warning(
+                        f"Ignoring PCA projection in {path} with shape "
+                        f"{components.shape}; it will be refitted."
+                    )
+
+    @property
+    def fitted(self) -> bool:
+        """Whether the projection is applied as configured rather than by the truncation fallback."""
+        return self.method == "truncate" or self._fit is not None
+
+    @property
+    def fit_samples(self) -> int:
+        """Number of embeddings the current PCA was fitted on, 0 if unfitted."""
+        return self._fit.samples if self._fit is not None else 0
+
+    @property
+    def version(self) -> str:
+        """Identifies the projection transform currently applies."""
+        return self._fit.version if self._fit is not None else "truncate"
+
+    def fit(self, embeddings: np.ndarray[Any, Any]) -> None:
+        """
+        Fits (or refits) the PCA on a sample of corpus embeddings and persists it.
+
+        Args:
+            embeddings (np.ndarray[Any, Any]): Sample embeddings, one per row.
+
+        Raises:
+            ValueError: If the projection is not "pca" or the sample has fewer than min_samples rows.
+        """
+        if self.method != "pca":
+            raise ValueError(f"The '{self.method}' projection cannot be fitted.")
+        if len(embeddings) < self.min_samples:
+            raise ValueError(
+                f"Fitting the PCA projection needs at least {self.min_samples} "
+                f"embeddings, got {len(embeddings)}."
+            )
+        sample = np.asarray(embeddings, dtype=np.float64)
+        mean = sample.mean(axis=0)
+        _, _, vt = np.linalg.svd(sample - mean, full_matrices=False)
+        fit = _FittedPCA(
+            mean.astype(np.float32),
+            np.ascontiguousarray(vt[: self.dimension], dtype=np.float32),
+            len(sample),
+        )
+        with self._lock:
+            os.makedirs(os.path.dirname(self._path) or ".", exist_ok=True)
+            with open(f"{self._path}.tmp", "wb") as f:
+                np.savez(
+                    f, mean=fit.mean, components=fit.components, samples=fit.samples
+                )
+            os.replace(f"{self._path}.tmp", self._path)
+            self._fit = fit
+        logger.info(
+            f"Fitted PCA projection {self.source_dimension} -> {self.dimension} "
+            f"on {len(sample)} embeddings."
+        )
+
+    def transform(self, embeddings: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+        """
+        Projects embeddings.
+
+        An unfitted PCA (e.g. before enough of the corpus was ingested) falls
+        back to truncation.
+
+        Args:
+            embeddings (np.ndarray[Any, Any]): Embeddings, one per row.
+
+        Returns:
+            np.ndarray[Any, Any]: float32 matrix of shape (len(embeddings), dimension).
+        """
+        return self.transform_with_version(embeddings)[0]
+
+    def transform_with_version(
+        self, embeddings: np.ndarray[Any, Any]
+    ) -> Tuple[np.ndarray[Any, Any], str]:
+        """
+        Projects embeddings and reports which projection was applied.
+
+        Args:
+            embeddings (np.ndarray[Any, Any]): Embeddings, one per row.
+
+        Returns:
+            Tuple[np.ndarray[Any, Any], str]: The projected embeddings and the projection's version.
+        """
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        fit = self._fit
+        if fit is None:
+            truncated = matrix[:, : self.dimension]
+            norms = np.linalg.norm(truncated, axis=1, keepdims=True)
+            return (
+                np.ascontiguousarray(truncated / np.maximum(norms, 1e-12)),
+                "truncate",
+            )
+        result: np.ndarray[Any, Any] = (matrix - fit.mean) @ fit.components.T
+        return result, fit.version
+
+
+@functools.lru_cache(maxsize=1)
+def get_projection() -> Optional[EmbeddingProjection]:
+    """
+    Returns the process-wide projection selected by EMBEDDING_PROJECTION.
+
+    Returns:
+        Optional[EmbeddingProjection]: The projection, or None if disabled.
+    """
+    if EMBEDDING_PROJECTION is None:
+        return None
+    return EmbeddingProjection(
+        EMBEDDING_PROJECTION,
+        PROJECTED_DIMENSION,
+        PROJECTION_PATH,
+        EMBEDDING_DIMENSION,
+    )
+
+
+def index_dimension() -> int:
+    """
+    Returns the dimension of the embeddings stored in the index.
+
+    Returns:
+        int: PROJECTED_DIMENSION if a projection is enabled, else EMBEDDING_DIMENSION.
+    """
+    if EMBEDDING_PROJECTION is None:
+        return EMBEDDING_DIMENSION
+    return PROJECTED_DIMENSION
+
+
+def project_embeddings(embeddings: np.ndarray[Any, Any]) -> np.ndarray[Any, Any]:
+    """
+    Applies the configured projection, if any.
+
+    Args:
+        embeddings (np.ndarray[Any, Any]): Model embeddings, one per row.
+
+    Returns:
+        np.ndarray[Any, Any]: The projected embeddings, or the input unchanged.
+    """
+    projection = get_projection()
+    if projection is None:
+        return embeddings
+    return projection.transform(embeddings)
+
+
+def project_for_index(
+    embeddings: np.ndarray[Any, Any],
+) -> Tuple[np.ndarray[Any, Any], Optional[str]]:
+    """
+    Applies the configured projection to embeddings that are about to be stored.
+
+    Args:
+        embeddings (np.ndarray[Any, Any]): Model embeddings, one per row.
+
+    Returns:
+        Tuple[np.ndarray[Any, Any], Optional[str]]: The projected embeddings and the version of
+            the projection to store with them, None without a projection.
+    """
+    projection = get_projection()
+    if projection is None:
+        return embeddings, None
+    return projection.transform_with_version(embeddings)
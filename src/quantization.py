@@ -0,0 +1,152 @@
+import base64
+import logging
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from src.constants import (
+    INT8_QUANTIZATION_RANGE,
+    VECTOR_OVERSAMPLE_FACTOR,
+    VECTOR_QUANTIZATION,
+)
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Quantization modes accepted by VECTOR_QUANTIZATION
+QUANTIZATION_METHODS = ("fp16", "int8", "binary")
+
+# Unindexed field holding the full-precision embedding for rescoring
+EXACT_EMBEDDING_FIELD = "embedding_exact"
+
+
+def apply_quantization_mapping(
+    config: Dict[str, Any], method: Optional[str] = VECTOR_QUANTIZATION
+) -> Dict[str, Any]:
+    """
+    Adjusts the index configuration to store quantized vectors.
+
+    fp16 uses faiss scalar quantization, int8 stores byte vectors and binary
+    stores one bit per dimension searched by Hamming distance. Quantized
+    indices also get an unindexed binary field with the exact embedding, which
+    lives only in the stored source on disk.
+
+    Args:
+        config (Dict[str, Any]): Index configuration as loaded from index_config.json.
+        method (Optional[str], optional): Quantization mode, or None for float32. Defaults to VECTOR_QUANTIZATION.
+
+    Returns:
+        Dict[str, Any]: The adjusted configuration (modified in place).
+
+    Raises:
+        ValueError: If method is not one of QUANTIZATION_METHODS.
+    """
+    if method is None:
+        return config
+    if method not in QUANTIZATION_METHODS:
+        raise ValueError(
+            f"Unknown vector quantization '{method}'; "
+            f"expected one of {QUANTIZATION_METHODS}"
+        )
+
+    properties = config["mappings"]["properties"]
+    embedding = properties["embedding"]
+    if method == "fp16":
+        embedding["method"]["parameters"]["encoder"] = {
+            "name": "sq",
+            "parameters": {"type": "fp16"},
+        }
+    elif method == "int8":
+        embedding["data_type"] = "byte"
+    else:
+        if embedding["dimension"] % 8:
+            raise ValueError("Binary quantization needs a dimension divisible by 8.")
+        embedding["data_type"] = "binary"
+        embedding["method"]["space_type"] = "hamming"
+    properties[EXACT_EMBEDDING_FIELD] = {"type": "binary"}
+    return config
+
+
+def quantize(
+    embedding: np.ndarray[Any, Any], method: Optional[str] = VECTOR_QUANTIZATION
+) -> List[Any]:
+    """
+    Converts an embedding to the vector format stored in the index.
+
+    Args:
+        embedding (np.ndarray[Any, Any]): Full-precision embedding.
+        method (Optional[str], optional): Quantization mode, or None for float32. Defaults to VECTOR_QUANTIZATION.
+
+    Returns:
+        List[Any]: Floats for float32/fp16, int8 values in [-127, 127] for int8, and bit-packed
+        signed bytes for binary.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    if method == "int8":
+        scaled = np.rint(vector * (127 / INT8_QUANTIZATION_RANGE))
+        return np.clip(scaled, -127, 127).astype(np.int8).tolist()
+    if method == "binary":
+        return np.packbits(vector > 0).view(np.int8).tolist()
+    return vector.tolist()
+
+
+def encode_exact(embedding: np.ndarray[Any, Any]) -> str:
+    """
+    Encodes a full-precision embedding for the exact embedding field.
+
+    Args:
+        embedding (np.ndarray[Any, Any]): The embedding.
+
+    Returns:
+        str: Base64 of the little-endian float32 bytes.
+    """
+    return base64.b64encode(np.asarray(embedding, dtype="<f4").tobytes()).decode()
+
+
+def oversampled_k(k: int, method: Optional[str] = VECTOR_QUANTIZATION) -> int:
+    """
+    Returns the number of k-NN candidates to fetch before rescoring.
+
+    Args:
+        k (int): Number of hits wanted after rescoring.
+        method (Optional[str], optional): Quantization mode, or None for float32. Defaults to VECTOR_QUANTIZATION.
+
+    Returns:
+        int: k times VECTOR_OVERSAMPLE_FACTOR for quantized indices, k otherwise.
+    """
+    return k * VECTOR_OVERSAMPLE_FACTOR if method is not None else k
+
+
+def rescore_hits(
+    hits: List[Dict[str, Any]], query_embedding: List[float], top_k: int
+) -> List[Dict[str, Any]]:
+    """
+    Re-ranks k-NN candidates by exact L2 distance to the query.
+
+    Scores use OpenSearch's l2 scoring, 1 / (1 + d^2), so they stay comparable
+    with unquantized indices. The exact embedding is removed from the returned
+    hits; hits without one keep their approximate score.
+
+    Args:
+        hits (List[Dict[str, Any]]): Candidate hits with the exact embedding in '_source'.
+        query_embedding (List[float]): Full-precision query embedding.
+        top_k (int): Number of hits to return.
+
+    Returns:
+        List[Dict[str, Any]]: The top_k hits by exact score.
+    """
+    query = np.asarray(query_embedding, dtype=np.float32)
+    rescored = []
+    for hit in hits:
+        source = dict(hit["_source"])
+        encoded = source.pop(EXACT_EMBEDDING_FIELD, None)
+        score = hit["_score"]
+        if encoded is not None:
+            vector = np.frombuffer(base64.b64decode(encoded), dtype="<f4")
+            difference = vector - query
+            score = 1.0 / (1.0 + float(difference @ difference))
+        rescored.append({**hit, "_score": score, "_source": source})
+    rescored.sort(key=lambda hit: hit["_score"], reverse=True)
+    return rescored[:top_k]
@@ -0,0 +1,135 @@
+import logging
+import time
+from typing import TYPE_CHECKING, Any, Dict, List
+
+import streamlit as st
+
+from src.cache import LRUCache
+from src.constants import (
+    RERANK_BATCH_SIZE,
+    RERANK_BUDGET_MS,
+    RERANK_CACHE_MAX_ENTRIES,
+    RERANK_CANDIDATE_MULTIPLIER,
+    RERANK_ENABLED,
+    RERANKER_MODEL_PATH,
+)
+from src.utils import setup_logging
+
+# sentence_transformers (and torch) load on first use of get_reranker
+if TYPE_CHECKING:
+    from sentence_transformers import CrossEncoder
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+# Process-wide cache of cross-encoder scores keyed by (query, chunk ID)
+_score_cache: LRUCache[float] = LRUCache(RERANK_CACHE_MAX_ENTRIES)
+
+
+@st.cache_resource(show_spinner=False)
+def get_reranker() -> "CrossEncoder":
+    """
+    Loads and caches the cross-encoder used for reranking.
+
+    Returns:
+        CrossEncoder: The loaded cross-encoder model.
+    """
+    from sentence_transformers import CrossEncoder
+
+    logger.info(f"Loading reranker model from path: {RERANKER_MODEL_PATH}")
+    return CrossEncoder(RERANKER_MODEL_PATH)
+
+
+def candidate_count(top_k: int) -> int:
+    """
+    Returns how many hits to retrieve so that reranking can pick the best top_k.
+
+    Args:
+        top_k (int): Number of hits wanted after reranking.
+
+    Returns:
+        int: top_k times RERANK_CANDIDATE_MULTIPLIER if reranking is enabled, else top_k.
+    """
+    return top_k * RERANK_CANDIDATE_MULTIPLIER if RERANK_ENABLED else top_k
+
+
+def rerank(
+    query: str,
+    hits: List[Dict[str, Any]],
+    top_k: int,
+    budget_ms: float = RERANK_BUDGET_MS,
+    batch_size: int = RERANK_BATCH_SIZE,
+) -> List[Dict[str, Any]]:
+    """
+    Reorders hits by cross-encoder relevance to the query.
+
+    Cached (query, chunk) scores are reused; the remaining hits are scored in
+    batches in retrieval order until the time budget is used up. The budget
+    starts once the model is loaded, so the first query is still reranked. Scored hits
+    come first, ordered by score, followed by the unscored hits in retrieval
+    order. Each scored hit gets a '_rerank_score'.
+
+    Args:
+        query (str): The user's query.
+        hits (List[Dict[str, Any]]): Candidate hits, best retrieval rank first.
+        top_k (int): Number of hits to return.
+        budget_ms (float, optional): Time budget for model scoring in milliseconds. Defaults to RERANK_BUDGET_MS.
+        batch_size (int, optional): Pairs scored per forward pass. Defaults to RERANK_BATCH_SIZE.
+
+    Returns:
+        List[Dict[str, Any]]: The top_k reranked hits.
+    """
+    if not hits:
+        return []
+    start = time.perf_counter()
+    normalized_query = " ".join(query.split())
+    scores: Dict[int, float] = {}
+    pending: List[int] = []
+    for i, hit in enumerate(hits):
+        cached = _score_cache.get((normalized_query, hit["_id"]))
+        if cached is None:
+            pending.append(i)
+        else:
+            scores[i] = cached
+
+    if pending:
+        model = get_reranker()
+        # The budget covers scoring only, not loading the model on first use
+        scoring_start = time.perf_counter()
+        for offset in range(0, len(pending), batch_size):
+            if (time.perf_counter() - scoring_start) * 1000 >= budget_ms:
+                logger.info(
+                    f"Rerank budget of {budget_ms:.0f} ms used up; "
+                    f"{len(pending) - offset} candidates left unscored."
+                )
+                break
+            batch = pending[offset : offset + batch_size]
+            batch_scores = model.predict(
+                [(normalized_query, hits[i]["_source"]["text"]) for i in batch],
+                batch_size=batch_size,
+                show_progress_bar=False,
+            )
+            for i, score in zip(batch, batch_scores):
+                scores[i] = float(score)
+                _score_cache.put((normalized_query, hits[i]["_id"]), float(score))
+
+    scored = sorted(scores, key=lambda i: scores[i], reverse=True)
+    unscored = [i for i in range(len(hits)) if i not in scores]
+    reranked = [{**hits[i], "_rerank_score": scores[i]} for i in scored]
+    reranked.extend(hits[i] for i in unscored)
+    logger.info(
+        f"Reranked {len(scores)} of {len(hits)} candidates in "
+        f"{(time.perf_counter() - start) * 1000:.0f} ms."
+    )
+    return reranked[:top_k]
+
+
+def get_rerank_cache_stats() -> Dict[str, float]:
+    """
+    Returns hit-rate statistics of the rerank score cache.
+
+    Returns:
+        Dict[str, float]: Entry count, hits, misses, evictions, expirations and hit rate.
+    """
+    return _score_cache.stats()
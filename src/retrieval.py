@@ -0,0 +1,123 @@
+import functools
+import logging
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Protocol, Tuple
+
+from src.constants import LOCAL_INDEX_DIR, OPENSEARCH_INDEX, RETRIEVAL_BACKEND
+from src.ingestion import (
+    bulk_index_documents,
+    create_index,
+    delete_documents_by_document_name,
+    incremental_index_document,
+    iter_indexed_chunks,
+)
+from src.local_engine import LocalRetrievalEngine
+from src.opensearch import get_opensearch_client, hybrid_search
+from src.projection import index_dimension
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+class RetrievalBackend(Protocol):
+    """Storage and hybrid search operations used by the ingestion and chat paths."""
+
+    def ensure_ready(self) -> None:
+        """Creates the underlying index if it does not exist yet."""
+        ...
+
+    def search(
+        self, query_text: str, query_embedding: List[float], top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        """Returns the top_k OpenSearch-style hits for a query."""
+        ...
+
+    def index_documents(
+        self, documents: Iterable[Dict[str, Any]]
+    ) -> Tuple[int, List[Any]]:
+        """Indexes chunk documents and returns the success count and errors."""
+        ...
+
+    def update_document(
+        self,
+        document_name: str,
+        chunks: List[str],
+        offsets: Optional[List[Tuple[int, int]]] = None,
+    ) -> Dict[str, int]:
+        """Re-indexes only the changed chunks of a document; stats include failures."""
+        ...
+
+    def delete_documents_by_document_name(self, document_name: str) -> None:
+        """Deletes all chunks of a document."""
+        ...
+
+    def list_document_names(self) -> List[str]:
+        """Returns the names of all indexed documents."""
+        ...
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        """Yields every indexed chunk as a document dictionary, with the 'projection' of its vector."""
+        ...
+
+
+class OpenSearchBackend:
+    """Retrieval backend backed by an OpenSearch cluster with the k-NN plugin."""
+
+    def ensure_ready(self) -> None:
+        create_index(get_opensearch_client())
+
+    def search(
+        self, query_text: str, query_embedding: List[float], top_k: int = 5
+    ) -> List[Dict[str, Any]]:
+        return hybrid_search(query_text, query_embedding, top_k=top_k)
+
+    def index_documents(
+        self, documents: Iterable[Dict[str, Any]]
+    ) -> Tuple[int, List[Any]]:
+        return bulk_index_documents(documents)
+
+    def update_document(
+        self,
+        document_name: str,
+        chunks: List[str],
+        offsets: Optional[List[Tuple[int, int]]] = None,
+    ) -> Dict[str, int]:
+        return incremental_index_document(document_name, chunks, offsets)
+
+    def delete_documents_by_document_name(self, document_name: str) -> None:
+        delete_documents_by_document_name(document_name)
+
+    def list_document_names(self) -> List[str]:
+        client = get_opensearch_client()
+        query = {
+            "size": 0,
+            "aggs": {
+                "unique_docs": {"terms": {"field": "document_name", "size": 10000}}
+            },
+        }
+        response = client.search(index=OPENSEARCH_INDEX, body=query)
+        buckets = response["aggregations"]["unique_docs"]["buckets"]
+        logger.info("Retrieved document names from OpenSearch.")
+        return [bucket["key"] for bucket in buckets]
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        return iter_indexed_chunks()
+
+
+@functools.lru_cache(maxsize=1)
+def get_retrieval_backend() -> RetrievalBackend:
+    """
+    Returns the process-wide retrieval backend selected by RETRIEVAL_BACKEND.
+
+    Returns:
+        RetrievalBackend: The OpenSearch backend or the local in-process engine.
+
+    Raises:
+        ValueError: If RETRIEVAL_BACKEND names an unknown backend.
+    """
+    if RETRIEVAL_BACKEND == "opensearch":
+        return OpenSearchBackend()
+    if RETRIEVAL_BACKEND == "local":
+        return LocalRetrievalEngine(LOCAL_INDEX_DIR, index_dimension())
+    raise ValueError(f"Unknown retrieval backend: {RETRIEVAL_BACKEND}")
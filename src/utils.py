@@ -1,22 +1,47 @@
 # src/utils.py
 
 import logging
+import os
 import re
-from typing import List
+import zlib
+from typing import Iterable, Iterator, List
 
 from src.constants import LOG_FILE_PATH
 
+# Everything clean_text rewrites, matched in a single pass: a hyphen at a line
+# break inside a word, and any whitespace other than a lone space
+_CLEAN_PATTERN = re.compile(r"(?<=\w)-\n(?=\w)|[ \t\n]{2,}|[\t\n]")
+_PARAGRAPH_BREAK = re.compile(r"(\n{2,})")
+
+# Characters a streamed piece of text must not be cut next to, as a match of
+# _CLEAN_PATTERN could then span the cut
+_UNSAFE_CUT_CHARS = frozenset(" \t\n-")
+
+# Words hashed to decide whether a chunk may end after the last of them
+_BOUNDARY_WORDS = 3
+
+# Whether setup_logging has already configured the root logger
+_logging_configured = False
+
 
 def setup_logging() -> None:
     """
     Configures logging settings for the application, specifying log file, format, and level.
+
+    Every module calls this on import, so only the first call does any work.
+    The log directory is created if it does not exist.
     """
+    global _logging_configured
+    if _logging_configured:
+        return
+    os.makedirs(os.path.dirname(LOG_FILE_PATH) or ".", exist_ok=True)
     logging.basicConfig(
         filename=LOG_FILE_PATH,
         filemode="a",
         format="%(asctime)s - %(levelname)s - %(message)s",
         level=logging.INFO,
     )
+    _logging_configured = True
 
 
 def clean_text(text: str) -> str:
@@ -29,24 +54,86 @@ def clean_text(text: str) -> str:
     Returns:
         str: The cleaned text.
     """
-    # Remove hyphens at line breaks (e.g., 'exam-\nple' -> 'example')
-    text = re.sub(r"(\w+)-\n(\w+)", r"\1\2", text)
+    cleaned_text = _CLEAN_PATTERN.sub(_clean_match, text).strip()
+    logging.info("Text cleaned.")
+    return cleaned_text
 
-    # Replace newlines within sentences with spaces
-    text = re.sub(r"(?<!\n)\n(?!\n)", " ", text)
 
-    # Replace multiple newlines with a single newline
-    text = re.sub(r"\n+", "\n", text)
+def _clean_match(match: "re.Match[str]") -> str:
+    # Removes hyphens at line breaks (e.g., 'exam-\nple' -> 'example'), keeps one
+    # newline per paragraph break and turns all other whitespace runs into a space
+    run = match.group()
+    if run[0] == "-":
+        return ""
+    if "\n\n" not in run:
+        return " "
+    return "".join(
+        "\n" if part.startswith("\n\n") else " "
+        for part in _PARAGRAPH_BREAK.split(run)
+        if part
+    )
 
-    # Remove excessive whitespace
-    text = re.sub(r"[ \t]+", " ", text)
 
-    cleaned_text = text.strip()
-    logging.info("Text cleaned.")
-    return cleaned_text
+class TextCleaner:
+    """
+    Applies clean_text to text that arrives in pieces, e.g. one PDF page at a time.
 
+    Each piece is cut between the last two characters that are neither
+    whitespace nor hyphens; everything after the cut is carried over to the
+    next piece, so no whitespace run or hyphenated line break spans two
+    pieces. The concatenated output therefore equals clean_text of the
+    concatenated input while only about one piece is held in memory.
+    """
 
-def chunk_text(text: str, chunk_size: int, overlap: int = 100) -> List[str]:
+    def __init__(self) -> None:
+        """
+        Creates a cleaner with no pending text.
+        """
+        self._tail = ""
+        self._started = False
+
+    def feed(self, text: str) -> str:
+        """
+        Cleans the next piece of text.
+
+        Args:
+            text (str): The next piece of raw text.
+
+        Returns:
+            str: Cleaned text that is final, possibly empty.
+        """
+        text = self._tail + text
+        cut = len(text) - 1
+        while cut > 0 and (
+            text[cut] in _UNSAFE_CUT_CHARS or text[cut - 1] in _UNSAFE_CUT_CHARS
+        ):
+            cut -= 1
+        cut = max(cut, 0)
+        self._tail = text[cut:]
+        return self._emit(_CLEAN_PATTERN.sub(_clean_match, text[:cut]))
+
+    def flush(self) -> str:
+        """
+        Cleans the carried-over text and resets the cleaner.
+
+        Returns:
+            str: The final cleaned text, possibly empty.
+        """
+        cleaned = self._emit(_CLEAN_PATTERN.sub(_clean_match, self._tail).rstrip())
+        self._tail = ""
+        self._started = False
+        return cleaned
+
+    def _emit(self, cleaned: str) -> str:
+        if not self._started:
+            cleaned = cleaned.lstrip()
+            self._started = bool(cleaned)
+        return cleaned
+
+
+def chunk_text(
+    text: str, chunk_size: int, overlap: int = 100, clean: bool = True
+) -> List[str]:
     """
     Splits text into chunks with a specified overlap.
 
@@ -54,27 +141,142 @@ def chunk_text(text: str, chunk_size: int, overlap: int = 100) -> List[str]:
         text (str): The text to split.
         chunk_size (int): The number of tokens in each chunk.
         overlap (int): The number of tokens to overlap between chunks.
+        clean (bool): Whether to clean the text first; pass False for text that
+            clean_text already produced. Defaults to True.
 
     Returns:
         List[str]: A list of text chunks.
     """
-    # Clean the text before chunking
-    text = clean_text(text)
-    logging.info("Text prepared for chunking.")
-
-    # Tokenize the text into words
-    tokens = text.split(" ")
-
-    chunks = []
-    start = 0
-    while start < len(tokens):
-        end = start + chunk_size
-        chunk_tokens = tokens[start:end]
-        chunk_text = " ".join(chunk_tokens)
-        chunks.append(chunk_text)
-        start = end - overlap  # Move back by 'overlap' tokens
-
+    chunks = list(iter_text_chunks([text], chunk_size, overlap, clean=clean))
     logging.info(
         f"Text split into {len(chunks)} chunks with chunk size {chunk_size} and overlap {overlap}."
     )
     return chunks
+
+
+def iter_text_chunks(
+    pieces: Iterable[str], chunk_size: int, overlap: int = 100, clean: bool = True
+) -> Iterator[str]:
+    """
+    Lazily splits streamed text, e.g. the pages of a document, into overlapping chunks.
+
+    Args:
+        pieces (Iterable[str]): Consecutive pieces of the text.
+        chunk_size (int): The number of tokens in each chunk.
+        overlap (int): The number of tokens to overlap between chunks.
+        clean (bool): Whether to clean the text on the fly. Defaults to True.
+
+    Yields:
+        str: Text chunks in document order.
+    """
+    chunker = TextChunker(chunk_size, overlap, clean=clean)
+    for piece in pieces:
+        yield from chunker.feed(piece)
+    yield from chunker.flush()
+
+
+class TextChunker:
+    """
+    Incrementally splits streamed text into overlapping word chunks.
+
+    Text is fed piece by piece (e.g. one PDF page at a time), cleaned with a
+    TextCleaner, and complete chunks are returned as soon as enough words are
+    available, so only one chunk window is held in memory. Words are separated
+    by single spaces, and a word cut by a piece boundary is carried over.
+
+    Chunk boundaries are content-defined: a chunk ends after a word when a hash
+    of the last few words hits, once it has half of its chunk_size - overlap
+    new words, and at the latest when it has all of them. Each chunk starts with
+    the last overlap words before it. An edit therefore only moves the
+    boundaries next to it, so the chunks elsewhere in the document (and their
+    content-derived IDs) stay the same.
+    """
+
+    def __init__(self, chunk_size: int, overlap: int = 100, clean: bool = True) -> None:
+        """
+        Creates a chunker.
+
+        Args:
+            chunk_size (int): The number of tokens in each chunk.
+            overlap (int): The number of tokens to overlap between chunks.
+            clean (bool): Whether to clean the fed text. Defaults to True.
+        """
+        if not 0 <= overlap < chunk_size:
+            raise ValueError("overlap must be non-negative and smaller than chunk_size")
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+        self.max_new_words = chunk_size - overlap
+        self.min_new_words = max(self.max_new_words // 2, 1)
+        # Natural boundaries fall on average halfway between the two limits
+        self._divisor = max((self.max_new_words - self.min_new_words) // 2, 1)
+        self.char_count = 0
+        self._cleaner = TextCleaner() if clean else None
+        self._partial = ""  # Last word of the text so far, which may continue
+        self._window: List[str] = []
+        self._emitted = 0  # Leading window tokens already part of an emitted chunk
+        self._scanned = 0  # Window length up to which no boundary was found
+
+    def feed(self, text: str) -> List[str]:
+        """
+        Cleans a piece of text and returns the chunks it completes.
+
+        Args:
+            text (str): The next piece of text.
+
+        Returns:
+            List[str]: Chunks completed by this piece, possibly empty.
+        """
+        if self._cleaner is not None:
+            text = self._cleaner.feed(text)
+        return self._add(text)
+
+    def flush(self) -> List[str]:
+        """
+        Returns the final, possibly shorter chunk(s) and resets the window.
+
+        Returns:
+            List[str]: The remaining chunks, or an empty list if no tokens are pending.
+        """
+        chunks = self._add(self._cleaner.flush()) if self._cleaner is not None else []
+        if self._partial:
+            self._window.append(self._partial)
+        if len(self._window) > self._emitted:
+            chunks.append(" ".join(self._window))
+        self._partial = ""
+        self._window = []
+        self._emitted = 0
+        self._scanned = 0
+        return chunks
+
+    def _add(self, text: str) -> List[str]:
+        self.char_count += len(text)
+        if not text:
+            return []
+        tokens = (self._partial + text).split(" ")
+        self._partial = tokens.pop()
+        self._window.extend(filter(None, tokens))
+
+        chunks = []
+        end = self._next_boundary()
+        while end:
+            chunks.append(" ".join(self._window[:end]))
+            start = max(end - self.overlap, 0)
+            del self._window[:start]
+            self._emitted = end - start
+            self._scanned = 0
+            end = self._next_boundary()
+        return chunks
+
+    def _next_boundary(self) -> int:
+        # Returns the window length to cut at, or 0 if no boundary is reached yet
+        window = self._window
+        first = max(self._emitted + self.min_new_words, self._scanned, _BOUNDARY_WORDS)
+        last = self._emitted + self.max_new_words
+        for end in range(first, min(last, len(window) + 1)):
+            last_words = " ".join(window[end - _BOUNDARY_WORDS : end])
+            if zlib.crc32(last_words.encode("utf-8")) % self._divisor == 0:
+                return end
+        if len(window) >= last:
+            return last
+        self._scanned = max(first, len(window) + 1)
+        return 0
@@ -0,0 +1,180 @@
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Set, Tuple
+
+import ollama
+
+from src.chat import ollama_options
+from src.constants import OLLAMA_KEEP_ALIVE, OLLAMA_MODEL_NAME, RERANK_ENABLED
+from src.embeddings import get_embedding_model
+from src.reranker import get_reranker
+from src.retrieval import get_retrieval_backend
+from src.utils import setup_logging
+
+# Initialize logger
+setup_logging()
+logger = logging.getLogger(__name__)
+
+
+def normalize_model_name(model: str) -> str:
+    """
+    Adds Ollama's implicit ':latest' tag to a model name without a tag.
+
+    Args:
+        model (str): Model name, e.g. 'llama3.2' or 'llama3.2:1b'.
+
+    Returns:
+        str: The name with an explicit tag.
+    """
+    if ":" in model.rsplit("/", 1)[-1]:
+        return model
+    return f"{model}:latest"
+
+
+def local_model_names() -> Set[str]:
+    """
+    Returns the names of the models available in the local Ollama server.
+
+    Returns:
+        Set[str]: Normalized model names, e.g. {'llama3.2:1b'}.
+    """
+    response = ollama.list()
+    names = set()
+    for entry in response["models"]:
+        name = entry.get("model") or entry.get("name")
+        if name:
+            names.add(normalize_model_name(name))
+    return names
+
+
+# Models known to be available; only successes are remembered so that a
+# failed check (e.g. Ollama not running yet) is retried on the next call
+_pulled_models: Set[str] = set()
+
+
+def ensure_model_pulled(model: str) -> bool:
+    """
+    Ensures that the specified model is pulled and available locally.
+
+    A successful check is remembered for the process, a failed one is not.
+
+    Args:
+        model (str): The name of the model to ensure is available.
+
+    Returns:
+        bool: True if the model is available or successfully pulled, False if an error occurs.
+    """
+    if model in _pulled_models:
+        return True
+    try:
+        if normalize_model_name(model) not in local_model_names():
+            logger.info(f"Model {model} not found locally. Pulling the model...")
+            ollama.pull(model)
+            logger.info(f"Model {model} has been pulled and is now available locally.")
+        else:
+            logger.info(f"Model {model} is already available locally.")
+    except ollama.ResponseError as e:
+        logger.error(f"Error checking or pulling model: {e.error}")
+        return False
+    _pulled_models.add(model)
+    return True
+
+
+def preload_ollama_model() -> None:
+    """
+    Pulls the chat model if needed and loads it into memory without generating.
+
+    The model stays loaded for OLLAMA_KEEP_ALIVE, with the same num_ctx as the
+    chat requests so the first question does not trigger a reload.
+
+    Raises:
+        RuntimeError: If the model is not available and could not be pulled.
+    """
+    if not ensure_model_pulled(OLLAMA_MODEL_NAME):
+        raise RuntimeError(f"Model {OLLAMA_MODEL_NAME} is not available.")
+    ollama.generate(
+        model=OLLAMA_MODEL_NAME,
+        prompt="",
+        options=ollama_options(),
+        keep_alive=OLLAMA_KEEP_ALIVE,
+    )
+
+
+def warm_embedding_model() -> None:
+    """
+    Loads the embedding model and encodes a dummy text to allocate its buffers.
+    """
+    get_embedding_model().encode(["warm-up"], show_progress_bar=False)
+
+
+def warm_retrieval_backend() -> None:
+    """
+    Connects to the retrieval backend and makes sure the index exists.
+
+    For OpenSearch this opens the first pooled connection; the local engine
+    loads its index files.
+    """
+    get_retrieval_backend().ensure_ready()
+
+
+def warm_reranker() -> None:
+    """
+    Loads the cross-encoder and scores a dummy pair.
+    """
+    get_reranker().predict([("warm-up", "warm-up")], show_progress_bar=False)
+
+
+# Warm-up steps that completed in this process; failed steps are retried
+_completed_steps: Set[str] = set()
+_warm_up_lock = threading.Lock()
+
+
+def warm_up(use_rag: bool = True) -> List[str]:
+    """
+    Prepares every model and connection used to answer a question, once per process.
+
+    Steps run in order and a failing step is logged without stopping the
+    others, so the app still starts, e.g. while Ollama is down. Completed steps
+    are remembered and skipped on later calls, failed ones run again. Without
+    RAG only the chat model is needed, so the embedding model, reranker and
+    retrieval backend (and torch with them) are left unloaded until RAG is
+    enabled.
+
+    Args:
+        use_rag (bool, optional): Whether answers use retrieved context. Defaults to True.
+
+    Returns:
+        List[str]: Names of the steps that failed, empty once everything is ready.
+    """
+    steps: List[Tuple[str, Callable[[], None]]] = []
+    if use_rag:
+        steps.append(("retrieval backend", warm_retrieval_backend))
+        steps.append(("embedding model", warm_embedding_model))
+        if RERANK_ENABLED:
+            steps.append(("reranker", warm_reranker))
+    steps.append(("ollama model", preload_ollama_model))
+
+    timings: Dict[str, float] = {}
+    failed: List[str] = []
+    # Sessions starting together wait for one warm-up instead of loading twice
+    with _warm_up_lock:
+        for name, step in steps:
+            if name in _completed_steps:
+                continue
+            start = time.perf_counter()
+            try:
+                step()
+            except Exception as e:
+                logger.error(f"Warm-up of the {name} failed: {e}")
+                failed.append(name)
+                continue
+            timings[name] = time.perf_counter() - start
+            _completed_steps.add(name)
+
+    if timings:
+        logger.info(
+            "Warm-up finished: "
+            + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in timings.items())
+        )
+    return failed
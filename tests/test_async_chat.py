@@ -0,0 +1,121 @@
+import asyncio
+from collections.abc import Generator
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+pytest.importorskip("ollama")
+pytest.importorskip("streamlit")
+
+from src import async_chat, opensearch  # noqa: E402
+from src.cache import LRUCache  # noqa: E402
+from src.opensearch import hybrid_query_body  # noqa: E402
+
+EMBEDDING = [0.1, 0.2, 0.3]
+
+
+def _hit(doc_id: str, score: float) -> Dict[str, Any]:
+    return {"_id": doc_id, "_score": score, "_source": {"text": doc_id}}
+
+
+class _SearchClient:
+    def __init__(self, fail: Optional[str] = None) -> None:
+        self.fail = fail
+        self.requests: List[Dict[str, Any]] = []
+
+    async def search(self, **kwargs: Any) -> Dict[str, Any]:
+        self.requests.append(kwargs)
+        query = kwargs["body"]["query"]
+        leg = (
+            "hybrid" if "hybrid" in query else "vector" if "knn" in query else "lexical"
+        )
+        if leg == self.fail or self.fail == "both":
+            raise ConnectionError(f"{leg} leg unavailable")
+        hits = {
+            "hybrid": [_hit("a", 1.0), _hit("b", 0.5)],
+            "lexical": [_hit("a", 9.0), _hit("b", 3.0)],
+            "vector": [_hit("c", 0.9), _hit("a", 0.8)],
+        }[leg]
+        return {"hits": {"hits": hits}}
+
+
+@pytest.fixture
+def client(monkeypatch: pytest.MonkeyPatch) -> _SearchClient:
+    fake = _SearchClient()
+    monkeypatch.setattr(async_chat, "_get_async_clients", lambda: (fake, None))
+    monkeypatch.setattr(async_chat, "embed_query", lambda query: EMBEDDING)
+    monkeypatch.setattr(async_chat, "RETRIEVAL_BACKEND", "opensearch")
+    monkeypatch.setattr(async_chat, "VECTOR_QUANTIZATION", None)
+    monkeypatch.setattr(async_chat, "HYBRID_CANDIDATE_DEPTH", None)
+    monkeypatch.setattr(opensearch, "_result_cache", LRUCache(10))
+    return fake
+
+
+def test_without_fusion_the_search_pipeline_query_is_sent(
+    client: _SearchClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(async_chat, "HYBRID_FUSION_METHOD", None)
+    hits = asyncio.run(async_chat.aretrieve("query", 2))
+    assert [hit["_id"] for hit in hits] == ["a", "b"]
+    (request,) = client.requests
+    assert request["body"] == hybrid_query_body("query", EMBEDDING, 2)
+    assert request["search_pipeline"] == opensearch.OPENSEARCH_SEARCH_PIPELINE
+    # A repeated query is served from the result cache shared with hybrid_search
+    asyncio.run(async_chat.aretrieve("query", 2))
+    assert len(client.requests) == 1
+
+
+def test_client_side_fusion_searches_both_legs(
+    client: _SearchClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(async_chat, "HYBRID_FUSION_METHOD", "rrf")
+    hits = asyncio.run(async_chat.aretrieve("query", 3))
+    assert hits[0]["_id"] == "a"
+    assert {hit["_id"] for hit in hits} == {"a", "b", "c"}
+    assert len(client.requests) == 2
+
+
+@pytest.mark.parametrize("failing_leg", ["lexical", "vector"])
+def test_a_failed_leg_degrades_to_the_other(
+    client: _SearchClient, monkeypatch: pytest.MonkeyPatch, failing_leg: str
+) -> None:
+    monkeypatch.setattr(async_chat, "HYBRID_FUSION_METHOD", "minmax")
+    client.fail = failing_leg
+    hits = asyncio.run(async_chat.aretrieve("query", 2))
+    expected = ["c", "a"] if failing_leg == "lexical" else ["a", "b"]
+    assert [hit["_id"] for hit in hits] == expected
+
+
+def test_the_query_fails_only_if_both_legs_fail(
+    client: _SearchClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(async_chat, "HYBRID_FUSION_METHOD", "minmax")
+    client.fail = "both"
+    with pytest.raises(ConnectionError):
+        asyncio.run(async_chat.aretrieve("query", 2))
+
+
+class _ChatClient:
+    def __init__(self) -> None:
+        self.closed = False
+
+    async def chat(self, **kwargs: Any) -> Any:
+        async def stream() -> Any:
+            try:
+                for word in ["one ", "two ", "three"]:
+                    yield {"message": {"content": word}}
+            finally:
+                self.closed = True
+
+        return stream()
+
+
+def test_an_abandoned_stream_is_closed(monkeypatch: pytest.MonkeyPatch) -> None:
+    ollama_client = _ChatClient()
+    monkeypatch.setattr(async_chat, "_get_async_clients", lambda: (None, ollama_client))
+    chunks = async_chat.generate_response_streaming_async("hi", False, 3, 0.7)
+    assert isinstance(chunks, Generator)
+    assert next(chunks)["message"]["content"] == "one "
+    assert not ollama_client.closed
+    chunks.close()
+    assert ollama_client.closed
@@ -0,0 +1,113 @@
+from typing import List
+
+import pytest
+
+from src import cache
+from src.cache import (
+    LRUCache,
+    SemanticAnswerCache,
+    bump_index_generation,
+    get_index_generation,
+)
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    fake = _Clock()
+    monkeypatch.setattr(cache.time, "monotonic", fake)
+    return fake
+
+
+def test_lru_evicts_least_recently_used() -> None:
+    lru: LRUCache[str] = LRUCache(max_entries=2)
+    lru.put("a", "A")
+    lru.put("b", "B")
+    assert lru.get("a") == "A"  # a is now more recent than b
+    lru.put("c", "C")
+    assert lru.get("b") is None
+    assert lru.get("a") == "A" and lru.get("c") == "C"
+    stats = lru.stats()
+    assert stats["entries"] == 2 and stats["evictions"] == 1
+    assert stats["hits"] == 3 and stats["misses"] == 1
+    assert stats["hit_rate"] == pytest.approx(0.75)
+
+
+def test_lru_expires_entries_after_ttl(clock: _Clock) -> None:
+    lru: LRUCache[int] = LRUCache(max_entries=10, ttl_seconds=60)
+    lru.put("a", 1)
+    clock.now += 59
+    assert lru.get("a") == 1
+    clock.now += 2
+    assert lru.get("a") is None
+    assert lru.stats()["expirations"] == 1
+    assert lru.stats()["entries"] == 0
+    # Storing again restarts the lifetime
+    lru.put("a", 2)
+    clock.now += 30
+    assert lru.get("a") == 2
+
+
+def test_lru_clear_keeps_statistics() -> None:
+    lru: LRUCache[List[float]] = LRUCache(max_entries=10)
+    lru.put(("query", 1), [0.1])
+    assert lru.get(("query", 1)) == [0.1]
+    lru.clear()
+    assert lru.get(("query", 1)) is None
+    assert lru.stats()["hits"] == 1 and lru.stats()["entries"] == 0
+
+
+def test_index_generation_increments() -> None:
+    before = get_index_generation()
+    assert bump_index_generation() == before + 1
+    assert get_index_generation() == before + 1
+
+
+def test_semantic_cache_matches_similar_queries_with_the_same_context() -> None:
+    answers = SemanticAnswerCache(max_entries=10, threshold=0.95)
+    answers.put([1.0, 0.0], ("model", "chunk-1"), generation=3, answer="yes")
+    # Scaled and slightly rotated queries are still similar enough
+    assert answers.get([2.0, 0.1], ("model", "chunk-1"), generation=3) == "yes"
+    assert answers.get([0.6, 0.8], ("model", "chunk-1"), generation=3) is None
+    assert answers.get([1.0, 0.0], ("model", "chunk-2"), generation=3) is None
+    stats = answers.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_semantic_cache_prefers_the_most_similar_answer() -> None:
+    answers = SemanticAnswerCache(max_entries=10, threshold=0.5)
+    answers.put([1.0, 0.0], "ctx", generation=0, answer="first")
+    answers.put([0.0, 1.0], "ctx", generation=0, answer="second")
+    assert answers.get([0.3, 1.0], "ctx", generation=0) == "second"
+    assert answers.get([1.0, 0.3], "ctx", generation=0) == "first"
+
+
+def test_semantic_cache_drops_older_generations_and_evicts() -> None:
+    answers = SemanticAnswerCache(max_entries=2, threshold=0.9)
+    answers.put([1.0, 0.0], "ctx", generation=1, answer="stale")
+    assert answers.get([1.0, 0.0], "ctx", generation=2) is None
+    assert answers.stats()["entries"] == 0
+
+    for i in range(3):
+        answers.put([1.0, float(i)], f"ctx-{i}", generation=2, answer=str(i))
+    assert answers.stats()["evictions"] == 1
+    assert answers.get([1.0, 0.0], "ctx-0", generation=2) is None
+    assert answers.get([1.0, 2.0], "ctx-2", generation=2) == "2"
+
+
+def test_answer_context_key_includes_model_options() -> None:
+    pytest.importorskip("ollama")
+    pytest.importorskip("streamlit")
+    from src.chat import answer_context_key
+
+    hits = [{"_id": "chunk-2"}, {"_id": "chunk-1"}]
+    assert answer_context_key(hits, 0.7) == answer_context_key(list(hits), 0.7)
+    assert answer_context_key(hits, 0.7) != answer_context_key(hits, 0.2)
+    assert answer_context_key(hits, 0.7) != answer_context_key(hits[::-1], 0.7)
@@ -0,0 +1,114 @@
+import random
+from typing import Any, Dict, List, Tuple, Union
+
+import pytest
+
+from src.utils import chunk_text, iter_text_chunks
+
+
+def _paragraphs(count: int, words: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(400)]
+    return [
+        " ".join(rng.choice(vocabulary) for _ in range(words)) for _ in range(count)
+    ]
+
+
+def _edit_paragraph(paragraphs: List[str], index: int) -> List[str]:
+    edited = list(paragraphs)
+    edited[index] = _paragraphs(1, 90, seed=99)[0]
+    return edited
+
+
+def test_word_chunks_streamed_match_whole_text() -> None:
+    text = "\n\n".join(_paragraphs(40, 80, seed=1))
+    pieces = [text[i : i + 613] for i in range(0, len(text), 613)]
+    assert list(iter_text_chunks(pieces, 300, 100)) == chunk_text(text, 300, 100)
+
+
+def test_word_chunks_respect_size_and_overlap() -> None:
+    chunks = chunk_text("\n\n".join(_paragraphs(40, 80, seed=2)), 300, 100)
+    words = [chunk.split(" ") for chunk in chunks]
+    assert all(len(chunk) <= 300 for chunk in words)
+    for previous, current in zip(words, words[1:]):
+        assert current[:100] == previous[-100:]
+
+
+def test_paragraph_edit_changes_few_word_chunks() -> None:
+    paragraphs = _paragraphs(80, 80, seed=3)
+    before = chunk_text("\n\n".join(paragraphs), 300, 100)
+    after = chunk_text("\n\n".join(_edit_paragraph(paragraphs, 40)), 300, 100)
+    assert len(before) > 20
+    # Only the chunks around the edited paragraph are new
+    assert len(set(after) - set(before)) <= 4
+    assert len(set(before) - set(after)) <= 4
+
+
+class _WordTokenizer:
+    # Stands in for a Hugging Face tokenizer, one token per word
+    def num_special_tokens_to_add(self) -> int:
+        return 2
+
+    def __call__(
+        self, texts: Union[str, List[str]], **kwargs: Any
+    ) -> Dict[str, List[Any]]:
+        if isinstance(texts, str):
+            return {"input_ids": texts.split()}
+        mappings: List[List[Tuple[int, int]]] = []
+        for text in texts:
+            mapping, position = [], 0
+            for word in text.split():
+                start = text.index(word, position)
+                position = start + len(word)
+                mapping.append((start, position))
+            mappings.append(mapping)
+        return {"input_ids": mappings, "offset_mapping": mappings}
+
+
+class _Model:
+    tokenizer = _WordTokenizer()
+    max_seq_length = 130
+
+
+@pytest.fixture
+def token_chunking(monkeypatch: pytest.MonkeyPatch) -> Any:
+    pytest.importorskip("streamlit")
+    from src import chunking
+
+    monkeypatch.setattr(chunking, "get_embedding_model", lambda: _Model())
+    return chunking
+
+
+def _sentences(count: int, seed: int) -> List[str]:
+    rng = random.Random(seed)
+    vocabulary = [f"term{i}" for i in range(300)]
+    return [
+        " ".join(rng.choice(vocabulary) for _ in range(rng.randint(8, 20))) + "."
+        for _ in range(count)
+    ]
+
+
+def test_token_chunks_have_offsets_into_cleaned_text(token_chunking: Any) -> None:
+    text = " ".join(_sentences(200, seed=4))
+    chunks = token_chunking.chunk_text_by_tokens(text, overlap_tokens=16)
+    assert len(chunks) > 5
+    for chunk in chunks:
+        assert text[chunk.start_offset : chunk.end_offset] == chunk.text
+        assert len(chunk.text.split()) <= 128
+
+
+def test_paragraph_edit_changes_few_token_chunks(token_chunking: Any) -> None:
+    sentences = _sentences(300, seed=5)
+    edited = list(sentences)
+    edited[150:153] = _sentences(4, seed=6)
+
+    def texts(sentences: List[str]) -> List[str]:
+        chunks = token_chunking.chunk_text_by_tokens(
+            " ".join(sentences), overlap_tokens=16
+        )
+        return [chunk.text for chunk in chunks]
+
+    before, after = texts(sentences), texts(edited)
+    assert len(before) > 20
+    assert len(set(after) - set(before)) <= 4
+    assert len(set(before) - set(after)) <= 4
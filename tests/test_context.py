@@ -0,0 +1,83 @@
+from typing import Any, Dict, List, Optional
+
+import pytest
+
+from src import context
+from src.context import assemble_context, clip_to_tokens, estimate_tokens
+
+DOCUMENT = " ".join(f"word{i}" for i in range(400))
+
+
+def _hit(
+    text: str,
+    document_name: str = "doc.pdf",
+    start: Optional[int] = None,
+    prefix: str = "",
+) -> Dict[str, Any]:
+    source: Dict[str, Any] = {"text": prefix + text, "document_name": document_name}
+    if start is not None:
+        source["start_offset"] = start
+        source["end_offset"] = start + len(text)
+    return {"_id": f"{document_name}:{start}", "_score": 1.0, "_source": source}
+
+
+def _span(start: int, end: int) -> str:
+    return DOCUMENT[start:end]
+
+
+def _sections(context_text: str) -> List[str]:
+    return [s.split("\n", 1)[1].strip() for s in context_text.split("\n\n") if s]
+
+
+def test_estimate_and_clip_tokens() -> None:
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("abcde") == 2
+    clipped = clip_to_tokens(DOCUMENT, 10)
+    assert estimate_tokens(clipped) <= 10
+    assert DOCUMENT.startswith(clipped) and not clipped.endswith(" ")
+    assert clip_to_tokens("short", 10) == "short"
+
+
+def test_overlapping_offsets_merge_into_one_passage() -> None:
+    hits = [_hit(_span(100, 300), start=100), _hit(_span(250, 500), start=250)]
+    assert _sections(assemble_context(hits, 10_000)) == [_span(100, 500)]
+
+
+def test_distant_offsets_stay_separate() -> None:
+    hits = [_hit(_span(0, 100), start=0), _hit(_span(600, 700), start=600)]
+    assert len(_sections(assemble_context(hits, 10_000))) == 2
+
+
+def test_passage_prefix_is_removed_before_merging(monkeypatch: Any) -> None:
+    monkeypatch.setattr(context, "ASSYMETRIC_EMBEDDING", True)
+    hits = [
+        _hit(_span(100, 300), start=100, prefix="passage: "),
+        _hit(_span(250, 500), start=250, prefix="passage: "),
+    ]
+    assert _sections(assemble_context(hits, 10_000)) == [_span(100, 500)]
+
+
+def test_chunks_without_offsets_merge_on_shared_words() -> None:
+    words = DOCUMENT.split()
+    hits = [_hit(" ".join(words[:40])), _hit(" ".join(words[30:80]))]
+    assert _sections(assemble_context(hits, 10_000)) == [" ".join(words[:80])]
+
+
+def test_duplicate_text_in_other_document_is_dropped() -> None:
+    text = _span(0, 200).strip()
+    hits = [_hit(text, "a.pdf"), _hit(text[20:150], "b.pdf")]
+    assert _sections(assemble_context(hits, 10_000)) == [text]
+
+
+def test_budget_truncates_the_last_passage() -> None:
+    hits = [_hit(_span(0, 400), start=0), _hit(_span(1000, 2000), start=1000)]
+    assembled = assemble_context(hits, 200)
+    assert estimate_tokens(assembled) <= 200 + 2
+    sections = _sections(assembled)
+    assert sections[0] == _span(0, 400)
+    assert len(sections) == 2 and _span(1000, 2000).startswith(sections[1])
+
+
+@pytest.mark.parametrize("budget", [0, 10])
+def test_tiny_budget_yields_no_partial_passage(budget: int) -> None:
+    assert assemble_context([_hit(_span(0, 400), start=0)], budget) == ""
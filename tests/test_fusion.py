@@ -0,0 +1,68 @@
+from typing import Any, Dict, List
+
+import pytest
+
+from src.fusion import fuse, min_max_fuse, rrf_fuse, z_score_fuse
+
+
+def _hits(*scored: Any) -> List[Dict[str, Any]]:
+    return [
+        {"_id": doc_id, "_score": score, "_source": {"text": doc_id}}
+        for doc_id, score in scored
+    ]
+
+
+LEXICAL = _hits(("a", 12.0), ("b", 8.0), ("c", 4.0))
+SEMANTIC = _hits(("c", 0.9), ("d", 0.7), ("a", 0.5))
+
+
+def _ids(hits: List[Dict[str, Any]]) -> List[str]:
+    return [hit["_id"] for hit in hits]
+
+
+def test_min_max_scales_each_list_and_averages_by_weight() -> None:
+    fused = min_max_fuse([LEXICAL, SEMANTIC], [0.3, 0.7], top_k=10)
+    scores = {hit["_id"]: hit["_score"] for hit in fused}
+    # a: 1.0 lexical, 0.0 semantic; c: 0.0 lexical, 1.0 semantic; d missing lexically
+    assert scores["a"] == pytest.approx(0.3)
+    assert scores["c"] == pytest.approx(0.7)
+    assert scores["d"] == pytest.approx(0.7 * 0.5)
+    assert scores["b"] == pytest.approx(0.3 * 0.5)
+    assert _ids(fused) == ["c", "d", "a", "b"]
+
+
+def test_min_max_constant_scores_normalize_to_one() -> None:
+    fused = min_max_fuse([_hits(("a", 3.0), ("b", 3.0))], [1.0], top_k=10)
+    assert [hit["_score"] for hit in fused] == [1.0, 1.0]
+
+
+def test_rrf_uses_ranks_only() -> None:
+    fused = rrf_fuse([LEXICAL, SEMANTIC], [1.0, 1.0], top_k=10, rank_constant=60)
+    scores = {hit["_id"]: hit["_score"] for hit in fused}
+    assert scores["a"] == pytest.approx(1 / 61 + 1 / 63)
+    assert scores["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert scores["d"] == pytest.approx(1 / 62)
+    # Rescaling one list's raw scores does not change the ranking
+    scaled = [{**hit, "_score": hit["_score"] * 1000} for hit in SEMANTIC]
+    assert _ids(rrf_fuse([LEXICAL, scaled], [1.0, 1.0], 10)) == _ids(
+        rrf_fuse([LEXICAL, SEMANTIC], [1.0, 1.0], 10)
+    )
+
+
+def test_z_score_gives_missing_hits_the_lowest_score() -> None:
+    fused = z_score_fuse([LEXICAL, SEMANTIC], [0.5, 0.5], top_k=10)
+    scores = {hit["_id"]: hit["_score"] for hit in fused}
+    # b is missing semantically and d lexically, both get that list's minimum
+    assert scores["b"] == pytest.approx(0.5 * 0.0 + 0.5 * -1.224744871)
+    assert scores["d"] == pytest.approx(0.5 * -1.224744871 + 0.5 * 0.0)
+    assert scores["a"] == pytest.approx(scores["c"])
+
+
+def test_fuse_dispatches_truncates_and_keeps_sources() -> None:
+    for method in ("minmax", "rrf", "zscore"):
+        fused = fuse([LEXICAL, SEMANTIC], [0.5, 0.5], top_k=2, method=method)
+        assert len(fused) == 2
+        assert all(hit["_source"]["text"] == hit["_id"] for hit in fused)
+    assert fuse([[], []], [0.5, 0.5], top_k=5) == []
+    with pytest.raises(ValueError):
+        fuse([LEXICAL], [1.0], top_k=5, method="borda")
@@ -0,0 +1,90 @@
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+pytest.importorskip("ollama")
+
+from src.history import ConversationHistory  # noqa: E402
+
+
+def _messages(count: int, tokens: int = 10) -> List[Dict[str, str]]:
+    # Each message is estimated at the given number of tokens (4 chars each)
+    return [
+        {
+            "role": "user" if i % 2 == 0 else "assistant",
+            "content": f"{i:03d}" + "x" * (4 * tokens - 3),
+        }
+        for i in range(count)
+    ]
+
+
+@pytest.fixture
+def compactions(monkeypatch: pytest.MonkeyPatch) -> List[Tuple[int, int]]:
+    calls: List[Tuple[int, int]] = []
+
+    def compact(self: Any, summary: str, folded: Any, end: int) -> None:
+        calls.append((len(folded), end))
+
+    monkeypatch.setattr(ConversationHistory, "_compact", compact)
+    return calls
+
+
+def _compact(history: ConversationHistory) -> bool:
+    started = history.compact_in_background()
+    if history._worker is not None:
+        history._worker.join()
+    return started
+
+
+def test_prompt_history_keeps_newest_messages_within_budget() -> None:
+    messages = _messages(6)
+    history = ConversationHistory(messages, token_budget=35)
+    query = "next question"
+    messages.append({"role": "user", "content": query})
+    summary, kept = history.prompt_history(query)
+    assert summary == ""
+    assert kept == messages[3:6]
+
+
+def test_prompt_history_clips_an_oversized_newest_message() -> None:
+    messages = _messages(2, tokens=100)
+    history = ConversationHistory(messages, token_budget=20)
+    _, kept = history.prompt_history("another question")
+    assert len(kept) == 1
+    assert kept[0]["content"] == messages[1]["content"][:80] + " ..."
+
+
+def test_no_compaction_within_budget(compactions: List[Tuple[int, int]]) -> None:
+    assert not _compact(ConversationHistory(_messages(8), token_budget=80))
+    assert compactions == []
+
+
+def test_compaction_folds_whole_turns_down_to_half_the_budget(
+    compactions: List[Tuple[int, int]],
+) -> None:
+    # 80 tokens over a budget of 50: fold until at most 25 remain
+    assert _compact(ConversationHistory(_messages(8), token_budget=50))
+    assert compactions == [(6, 6)]
+
+
+def test_compaction_rounds_an_odd_end_up_to_a_turn_boundary(
+    compactions: List[Tuple[int, int]],
+) -> None:
+    # Half the budget is reached after 5 messages, inside the third turn
+    assert _compact(ConversationHistory(_messages(8), token_budget=60))
+    assert compactions == [(6, 6)]
+
+
+def test_compaction_never_splits_the_last_turn(
+    compactions: List[Tuple[int, int]],
+) -> None:
+    # A pending question makes the count odd; rounding up would split a turn
+    assert _compact(ConversationHistory(_messages(7), token_budget=40))
+    assert compactions == [(4, 4)]
+
+
+def test_compaction_keeps_the_last_turn_even_if_over_budget(
+    compactions: List[Tuple[int, int]],
+) -> None:
+    assert not _compact(ConversationHistory(_messages(2, tokens=100), token_budget=50))
+    assert compactions == []
@@ -0,0 +1,128 @@
+from typing import Any, Dict, List, Set, Tuple
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from src import ingestion  # noqa: E402
+from src.ingestion import (  # noqa: E402
+    incremental_index_document,
+    make_chunk_document,
+    make_chunk_ids,
+)
+
+CHUNKS = ["intro", "body", "body", "outro"]
+
+
+class _Index:
+    """
+    In-memory stand-in for the OpenSearch calls made by incremental_index_document.
+    """
+
+    def __init__(self, ids: Set[str], fail_index: bool = False) -> None:
+        self.ids = set(ids)
+        self.fail_index = fail_index
+        self.indexed: List[Dict[str, Any]] = []
+        self.deleted: List[str] = []
+        self.refreshes = 0
+
+    def bulk_index_documents(
+        self, documents: List[Dict[str, Any]]
+    ) -> Tuple[int, List[Any]]:
+        if self.fail_index:
+            return 0, [{"index": {"error": "rejected"}} for _ in documents]
+        self.indexed.extend(documents)
+        self.ids.update(doc["doc_id"] for doc in documents)
+        return len(documents), []
+
+    def stream_bulk_index(self, actions: Any) -> Tuple[int, List[Any]]:
+        for action in actions:
+            self.deleted.append(action["_id"])
+            self.ids.discard(action["_id"])
+        return len(self.deleted), []
+
+
+@pytest.fixture
+def index(monkeypatch: pytest.MonkeyPatch) -> _Index:
+    fake = _Index(set(make_chunk_ids("doc.pdf", CHUNKS)))
+    monkeypatch.setattr(ingestion, "get_indexed_chunk_ids", lambda name: fake.ids)
+    monkeypatch.setattr(ingestion, "bulk_index_documents", fake.bulk_index_documents)
+    monkeypatch.setattr(ingestion, "stream_bulk_index", fake.stream_bulk_index)
+    monkeypatch.setattr(
+        ingestion,
+        "refresh_and_bump_generation",
+        lambda: setattr(fake, "refreshes", fake.refreshes + 1),
+    )
+    return fake
+
+
+def test_chunk_ids_are_stable_and_unique() -> None:
+    ids = make_chunk_ids("doc.pdf", CHUNKS)
+    assert ids == make_chunk_ids("doc.pdf", CHUNKS)
+    assert len(set(ids)) == len(ids)
+    assert ids[2] == f"{ids[1]}-1"
+    # The same text in another document gets another ID
+    assert make_chunk_ids("other.pdf", ["intro"])[0] != ids[0]
+
+
+def test_chunk_ids_continue_occurrences_across_calls() -> None:
+    seen: Dict[str, int] = {}
+    batched = make_chunk_ids("doc.pdf", CHUNKS[:2], seen)
+    batched += make_chunk_ids("doc.pdf", CHUNKS[2:], seen)
+    assert batched == make_chunk_ids("doc.pdf", CHUNKS)
+
+
+def test_chunk_document_offsets() -> None:
+    doc = make_chunk_document("id", "body", "doc.pdf", [(0, 5), (6, 10)], 1)
+    assert doc == {
+        "doc_id": "id",
+        "text": "body",
+        "document_name": "doc.pdf",
+        "start_offset": 6,
+        "end_offset": 10,
+    }
+    assert "start_offset" not in make_chunk_document("id", "body", "doc.pdf")
+
+
+def test_incremental_update_indexes_and_removes_only_the_delta(index: _Index) -> None:
+    revised = ["intro", "body", "new body", "outro"]
+    stats = incremental_index_document("doc.pdf", revised)
+    assert stats == {"added": 1, "removed": 1, "unchanged": 3, "failed": 0}
+    assert [doc["text"] for doc in index.indexed] == ["new body"]
+    assert index.ids == set(make_chunk_ids("doc.pdf", revised))
+    assert index.refreshes == 1
+
+    # Re-indexing the same chunks is a no-op
+    stats = incremental_index_document("doc.pdf", revised)
+    assert stats == {"added": 0, "removed": 0, "unchanged": 4, "failed": 0}
+
+
+def test_incremental_update_keeps_old_chunks_when_indexing_fails(
+    index: _Index,
+) -> None:
+    index.fail_index = True
+    before = set(index.ids)
+    stats = incremental_index_document("doc.pdf", ["rewritten"])
+    assert stats == {"added": 0, "removed": 0, "unchanged": 0, "failed": 1}
+    assert index.ids == before and index.deleted == []
+
+
+def test_generation_is_bumped_only_after_the_refresh(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    events: List[str] = []
+
+    class _Indices:
+        def refresh(self, index: str) -> None:
+            events.append(f"refresh {index}")
+
+    class _Client:
+        indices = _Indices()
+
+    monkeypatch.setattr(ingestion, "get_opensearch_client", lambda: _Client())
+    monkeypatch.setattr(
+        ingestion, "bump_index_generation", lambda: events.append("bump")
+    )
+    monkeypatch.setattr(ingestion, "stream_bulk_index", lambda actions: (1, []))
+    ingestion.bulk_index_documents([])
+    assert events == [f"refresh {ingestion.OPENSEARCH_INDEX}", "bump"]
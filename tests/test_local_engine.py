@@ -0,0 +1,125 @@
+import os
+from typing import Any, Dict, List
+
+import numpy as np
+import pytest
+
+pytest.importorskip("streamlit")
+
+from src import local_engine  # noqa: E402
+from src.local_engine import BM25Index, LocalRetrievalEngine  # noqa: E402
+
+DIMENSION = 8
+
+
+@pytest.fixture(autouse=True)
+def no_catalog(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(local_engine, "delete_document", lambda name: None)
+
+
+def _documents(document_name: str, count: int, first: int = 0) -> List[Dict[str, Any]]:
+    rng = np.random.default_rng(first)
+    return [
+        {
+            "doc_id": f"{document_name}-{i}",
+            "text": f"chunk number{i} of {document_name}",
+            "embedding": rng.normal(size=DIMENSION).tolist(),
+            "document_name": document_name,
+        }
+        for i in range(first, first + count)
+    ]
+
+
+def _search_ids(engine: LocalRetrievalEngine, text: str, embedding: Any) -> List[str]:
+    return [hit["_id"] for hit in engine.search(text, list(embedding), top_k=5)]
+
+
+def test_bm25_segments_score_like_one_build() -> None:
+    texts = [f"alpha beta{i % 7} gamma{i % 3} delta" for i in range(200)]
+    incremental = BM25Index(texts[:10])
+    for first in range(10, 200, 32):
+        incremental.add(texts[first : first + 32])
+    assert len(incremental.segments) < 10
+    for query in ("alpha", "beta3 gamma1", "delta beta6", "missing"):
+        np.testing.assert_allclose(
+            incremental.score(query), BM25Index(texts).score(query), rtol=1e-5
+        )
+
+
+def test_index_search_and_reopen(tmp_path: Any) -> None:
+    engine = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    documents = _documents("a", 10)
+    engine.index_documents(documents)
+    target = documents[3]
+    assert _search_ids(engine, "number3", target["embedding"])[0] == "a-3"
+
+    reopened = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    assert _search_ids(reopened, "number3", target["embedding"])[0] == "a-3"
+    assert reopened.list_document_names() == ["a"]
+
+
+def test_replaced_and_deleted_chunks_are_not_returned(tmp_path: Any) -> None:
+    engine = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    engine.index_documents(_documents("a", 5) + _documents("b", 5))
+    engine.index_documents(_documents("a", 1, first=2))  # Re-indexes a-2
+    ids = _search_ids(engine, "number2", _documents("a", 1, first=2)[0]["embedding"])
+    assert ids.count("a-2") == 1
+
+    engine.delete_documents_by_document_name("a")
+    assert engine.list_document_names() == ["b"]
+    for engine in (engine, LocalRetrievalEngine(str(tmp_path), DIMENSION)):
+        ids = _search_ids(engine, "chunk a", np.zeros(DIMENSION))
+        assert ids and all(chunk_id.startswith("b-") for chunk_id in ids)
+
+
+def test_compaction_keeps_live_rows(tmp_path: Any, monkeypatch: Any) -> None:
+    monkeypatch.setattr(local_engine, "_COMPACT_MIN_DELETED", 4)
+    engine = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    engine.index_documents(_documents("a", 6) + _documents("b", 6))
+    engine.delete_documents_by_document_name("a")
+    assert os.path.exists(tmp_path / "manifest.json")
+    assert not os.path.exists(tmp_path / "vectors.f32")
+
+    target = _documents("b", 1, first=4)[0]
+    for engine in (engine, LocalRetrievalEngine(str(tmp_path), DIMENSION)):
+        assert engine.list_document_names() == ["b"]
+        assert _search_ids(engine, "number4", target["embedding"])[0] == "b-4"
+
+
+def test_half_written_batch_is_dropped_on_open(tmp_path: Any) -> None:
+    engine = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    engine.index_documents(_documents("a", 4))
+    # A crash after the vectors and part of the metadata of the next batch
+    with open(tmp_path / "vectors.f32", "ab") as f:
+        f.write(np.ones((3, DIMENSION), dtype=np.float32).tobytes())
+    with open(tmp_path / "chunks.jsonl", "a", encoding="utf-8") as f:
+        f.write('{"id": "a-9", "te')
+
+    reopened = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    assert os.path.getsize(tmp_path / "vectors.f32") == 4 * 4 * DIMENSION
+    documents = _documents("b", 2)
+    reopened.index_documents(documents)
+    target = documents[1]
+    assert _search_ids(reopened, "number1 b", target["embedding"])[0] == "b-1"
+    assert LocalRetrievalEngine(str(tmp_path), DIMENSION).list_document_names() == [
+        "a",
+        "b",
+    ]
+
+
+def test_dimension_change_is_refused_instead_of_truncating(tmp_path: Any) -> None:
+    engine = LocalRetrievalEngine(str(tmp_path), DIMENSION)
+    engine.index_documents(_documents("a", 4))
+    size = os.path.getsize(tmp_path / "vectors.f32")
+
+    # Fewer dimensions make the vector file look longer than the metadata
+    with pytest.raises(RuntimeError):
+        LocalRetrievalEngine(str(tmp_path), DIMENSION // 2)
+    assert os.path.getsize(tmp_path / "vectors.f32") == size
+
+    # An index written before the manifest recorded the dimension is checked too
+    os.remove(tmp_path / "manifest.json")
+    with pytest.raises(RuntimeError):
+        LocalRetrievalEngine(str(tmp_path), DIMENSION // 2)
+    assert os.path.getsize(tmp_path / "vectors.f32") == size
+    assert LocalRetrievalEngine(str(tmp_path), DIMENSION).list_document_names() == ["a"]
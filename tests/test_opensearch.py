@@ -0,0 +1,65 @@
+import threading
+import time
+from typing import Any, List
+
+import pytest
+
+from src import opensearch
+
+
+class _Client:
+    def __init__(self, healthy: bool = True, ping_seconds: float = 0.0) -> None:
+        self.healthy = healthy
+        self.ping_seconds = ping_seconds
+
+    def ping(self) -> bool:
+        time.sleep(self.ping_seconds)
+        return self.healthy
+
+
+@pytest.fixture
+def clients(monkeypatch: pytest.MonkeyPatch) -> List[_Client]:
+    created: List[_Client] = []
+    health = _Client()
+
+    def new_client(**kwargs: Any) -> _Client:
+        if kwargs.get("max_retries") == 0:
+            return health
+        created.append(_Client())
+        return created[-1]
+
+    monkeypatch.setattr(opensearch, "_new_client", new_client)
+    monkeypatch.setattr(opensearch, "_client", None)
+    monkeypatch.setattr(opensearch, "_health_client", None)
+    monkeypatch.setattr(opensearch, "OPENSEARCH_HEALTH_CHECK_INTERVAL_SECONDS", 0)
+    created.insert(0, health)
+    return created
+
+
+def test_client_is_shared_and_replaced_after_a_failed_ping(
+    clients: List[_Client],
+) -> None:
+    health = clients[0]
+    first = opensearch.get_opensearch_client()
+    assert opensearch.get_opensearch_client() is first
+    health.healthy = False
+    second = opensearch.get_opensearch_client()
+    assert second is not first and len(clients) == 3
+
+
+def test_slow_ping_does_not_block_other_callers(
+    clients: List[_Client], monkeypatch: pytest.MonkeyPatch
+) -> None:
+    health = clients[0]
+    first = opensearch.get_opensearch_client()
+    health.ping_seconds = 0.5
+    pinging = threading.Thread(target=opensearch.get_opensearch_client)
+    pinging.start()
+    time.sleep(0.05)
+    # The pinging thread claimed the health check; this caller is not due and
+    # gets the current client without waiting for the ping
+    monkeypatch.setattr(opensearch, "OPENSEARCH_HEALTH_CHECK_INTERVAL_SECONDS", 60)
+    start = time.perf_counter()
+    assert opensearch.get_opensearch_client() is first
+    assert time.perf_counter() - start < 0.1
+    pinging.join()
@@ -0,0 +1,143 @@
+from typing import Any, Dict, Iterable, Iterator, List, Set, Tuple
+
+import numpy as np
+import pytest
+
+pytest.importorskip("streamlit")
+
+from src import pipeline  # noqa: E402
+from src.projection import EmbeddingProjection  # noqa: E402
+from src.utils import TextChunker  # noqa: E402
+
+
+class _Backend:
+    def __init__(self) -> None:
+        self.chunks: Dict[str, Dict[str, Any]] = {}
+
+    def index_documents(
+        self, documents: Iterable[Dict[str, Any]]
+    ) -> Tuple[int, List[Any]]:
+        count = 0
+        for count, doc in enumerate(documents, start=1):
+            # Like the real backends, embeds documents that come without a vector
+            if "embedding" not in doc:
+                pipeline.embed_documents([doc])
+            self.chunks[doc["doc_id"]] = doc
+        return count, []
+
+    def iter_chunks(self) -> Iterator[Dict[str, Any]]:
+        for doc in list(self.chunks.values()):
+            yield {key: value for key, value in doc.items() if key != "embedding"}
+
+    def delete_documents_by_document_name(self, document_name: str) -> None:
+        self.chunks = {
+            chunk_id: doc
+            for chunk_id, doc in self.chunks.items()
+            if doc["document_name"] != document_name
+        }
+
+
+def _embed_documents(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    for doc in documents:
+        doc["embedding"] = np.zeros(4)
+    return documents
+
+
+@pytest.fixture
+def backend(monkeypatch: pytest.MonkeyPatch) -> _Backend:
+    backend = _Backend()
+
+    def pages(file_path: str, max_workers: int = 1) -> Iterator[Tuple[int, str]]:
+        for page in range(20):
+            if "broken" in file_path and page == 15:
+                raise RuntimeError("unreadable page")
+            yield page, f"{file_path} page {page} " + "word " * 40
+
+    monkeypatch.setattr(pipeline, "iter_pdf_page_texts", pages)
+    monkeypatch.setattr(pipeline, "new_chunker", lambda *args: TextChunker(30, 5))
+    monkeypatch.setattr(pipeline, "get_projection", lambda: None)
+    monkeypatch.setattr(pipeline, "embed_documents", _embed_documents)
+    monkeypatch.setattr(pipeline, "get_retrieval_backend", lambda: backend)
+    monkeypatch.setattr(pipeline, "file_sha256", lambda path: path)
+    monkeypatch.setattr(pipeline.os.path, "getsize", lambda path: 1)
+    monkeypatch.setattr(pipeline, "upsert_document", lambda record: None)
+    return backend
+
+
+def test_failed_file_leaves_no_chunks(backend: _Backend) -> None:
+    results = pipeline.IngestionPipeline(batch_size=4).run(
+        [("good.pdf", "good"), ("bad.pdf", "broken")]
+    )
+    assert results[0].error is None and results[0].chunk_count > 0
+    assert results[1].error == "unreadable page"
+    assert {doc["document_name"] for doc in backend.chunks.values()} == {"good.pdf"}
+    assert len(backend.chunks) == results[0].chunk_count
+
+
+def test_duplicate_names_keep_separate_results(backend: _Backend) -> None:
+    results = pipeline.IngestionPipeline(batch_size=4).run(
+        [("a.pdf", "first"), ("a.pdf", "second")]
+    )
+    assert len(results) == 2
+    assert results[0].error is None and results[0].chunk_count > 0
+    assert results[1].error is not None and "Duplicate" in results[1].error
+    assert results[1].chunk_count == 0
+
+
+def test_projection_is_fitted_and_refitted_as_the_corpus_grows(
+    backend: _Backend, monkeypatch: pytest.MonkeyPatch, tmp_path: Any
+) -> None:
+    projection = EmbeddingProjection("pca", 4, str(tmp_path / "pca.npz"), 16)
+    rng = np.random.default_rng(0)
+    monkeypatch.setattr(pipeline, "get_projection", lambda: projection)
+    monkeypatch.setattr(
+        pipeline,
+        "generate_embeddings",
+        lambda texts, project: rng.normal(size=(len(texts), 16)),
+    )
+
+    def embed(documents: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for doc in documents:
+            doc["embedding"] = np.zeros(4)
+            doc["projection"] = projection.version
+        return documents
+
+    monkeypatch.setattr(pipeline, "embed_documents", embed)
+
+    def add(count: int) -> None:
+        start = len(backend.chunks)
+        backend.index_documents(
+            embed(
+                [
+                    {"doc_id": str(i), "text": f"chunk {i}", "document_name": "a"}
+                    for i in range(start, start + count)
+                ]
+            )
+        )
+
+    def versions() -> Set[str]:
+        return {doc["projection"] for doc in backend.chunks.values()}
+
+    # Truncated vectors are kept until there are as many chunks as dimensions
+    add(3)
+    assert not pipeline.update_projection(sample_size=8)
+    assert not projection.fitted and versions() == {"truncate"}
+
+    add(2)
+    assert pipeline.update_projection(sample_size=8)
+    assert projection.fit_samples == 5
+    # Every vector is re-embedded with the fitted projection
+    assert versions() == {projection.version} != {"truncate"}
+
+    add(4)
+    assert not pipeline.update_projection(sample_size=8)
+
+    # Refitted once the corpus has doubled, on at most sample_size chunks
+    first = projection.version
+    add(1)
+    assert pipeline.update_projection(sample_size=8)
+    assert projection.fit_samples == 8 and projection.version != first
+    assert versions() == {projection.version}
+
+    add(20)
+    assert not pipeline.update_projection(sample_size=8)
@@ -0,0 +1,80 @@
+import os
+from typing import Any
+
+import numpy as np
+import pytest
+
+from src.projection import EmbeddingProjection
+
+
+def _projection(tmp_path: Any, min_samples: int = 50) -> EmbeddingProjection:
+    return EmbeddingProjection(
+        "pca", 4, str(tmp_path / "projection.npz"), 16, min_samples=min_samples
+    )
+
+
+def _corpus(rows: int) -> np.ndarray[Any, Any]:
+    rng = np.random.default_rng(0)
+    return rng.normal(size=(rows, 16)).astype(np.float32)
+
+
+def test_unfitted_pca_truncates_without_fitting(tmp_path: Any) -> None:
+    projection = _projection(tmp_path)
+    projected = projection.transform(_corpus(100))
+    assert not projection.fitted
+    assert projected.shape == (100, 4)
+    np.testing.assert_allclose(np.linalg.norm(projected, axis=1), 1.0, rtol=1e-5)
+    assert not os.path.exists(tmp_path / "projection.npz")
+
+
+def test_fit_refuses_small_samples(tmp_path: Any) -> None:
+    projection = _projection(tmp_path)
+    with pytest.raises(ValueError):
+        projection.fit(_corpus(49))
+    assert not projection.fitted
+
+
+def test_min_samples_is_at_least_the_dimension(tmp_path: Any) -> None:
+    projection = _projection(tmp_path, min_samples=1)
+    assert projection.min_samples == 4
+    default = EmbeddingProjection("pca", 4, str(tmp_path / "default.npz"), 16)
+    assert default.min_samples == 4
+    with pytest.raises(ValueError):
+        projection.fit(_corpus(3))
+
+
+def test_fitted_pca_is_orthonormal_and_persisted(tmp_path: Any) -> None:
+    corpus = _corpus(200)
+    projection = _projection(tmp_path)
+    projection.fit(corpus)
+    assert projection.fitted
+
+    reloaded = _projection(tmp_path)
+    assert reloaded.fitted
+    np.testing.assert_allclose(
+        reloaded.transform(corpus), projection.transform(corpus), rtol=1e-5
+    )
+    assert reloaded.version == projection.version
+    assert reloaded.fit_samples == 200
+    assert reloaded._fit is not None
+    components = reloaded._fit.components
+    np.testing.assert_allclose(components @ components.T, np.eye(4), atol=1e-5)
+
+
+def test_truncate_needs_no_fit(tmp_path: Any) -> None:
+    projection = EmbeddingProjection("truncate", 4, str(tmp_path / "unused"), 16)
+    assert projection.fitted
+    assert projection.transform(_corpus(3)).shape == (3, 4)
+
+
+def test_refit_changes_the_version(tmp_path: Any) -> None:
+    projection = _projection(tmp_path)
+    _, version = projection.transform_with_version(_corpus(2))
+    assert version == projection.version == "truncate"
+
+    projection.fit(_corpus(50))
+    first = projection.version
+    assert first.startswith("pca-") and projection.fit_samples == 50
+    projection.fit(_corpus(100))
+    assert projection.version != first and projection.fit_samples == 100
+    assert projection.transform_with_version(_corpus(2))[1] == projection.version
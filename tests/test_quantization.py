@@ -0,0 +1,92 @@
+import copy
+from typing import Any, Dict
+
+import numpy as np
+import pytest
+
+from src.constants import INT8_QUANTIZATION_RANGE, VECTOR_OVERSAMPLE_FACTOR
+from src.quantization import (
+    EXACT_EMBEDDING_FIELD,
+    apply_quantization_mapping,
+    encode_exact,
+    oversampled_k,
+    quantize,
+    rescore_hits,
+)
+
+CONFIG: Dict[str, Any] = {
+    "mappings": {
+        "properties": {
+            "embedding": {
+                "type": "knn_vector",
+                "dimension": 16,
+                "method": {"engine": "faiss", "space_type": "l2", "parameters": {}},
+            }
+        }
+    }
+}
+
+
+def test_quantize_formats() -> None:
+    vector = np.array([0.3, -0.3, 0.15, 1.0, -1.0, 0.0, 0.01, -0.01])
+    assert quantize(vector, None) == pytest.approx(vector.tolist())
+    int8 = quantize(vector, "int8")
+    assert int8[:3] == [127, -127, round(0.15 * 127 / INT8_QUANTIZATION_RANGE)]
+    # Values outside the range are clipped symmetrically rather than wrapped
+    assert int8[3:5] == [127, -127]
+    # One bit per dimension, positive values set: 1 0 1 1 0 0 1 0
+    assert quantize(vector, "binary") == [np.int8(np.uint8(0b10110010))]
+
+
+def test_mapping_per_method() -> None:
+    assert apply_quantization_mapping(copy.deepcopy(CONFIG), None) == CONFIG
+
+    int8 = apply_quantization_mapping(copy.deepcopy(CONFIG), "int8")
+    properties = int8["mappings"]["properties"]
+    assert properties["embedding"]["data_type"] == "byte"
+    assert properties[EXACT_EMBEDDING_FIELD] == {"type": "binary"}
+
+    binary = apply_quantization_mapping(copy.deepcopy(CONFIG), "binary")
+    embedding = binary["mappings"]["properties"]["embedding"]
+    assert embedding["method"]["space_type"] == "hamming"
+
+    odd = copy.deepcopy(CONFIG)
+    odd["mappings"]["properties"]["embedding"]["dimension"] = 12
+    with pytest.raises(ValueError):
+        apply_quantization_mapping(odd, "binary")
+    with pytest.raises(ValueError):
+        apply_quantization_mapping(copy.deepcopy(CONFIG), "int4")
+
+
+def test_oversampled_k() -> None:
+    assert oversampled_k(5, None) == 5
+    assert oversampled_k(5, "int8") == 5 * VECTOR_OVERSAMPLE_FACTOR
+
+
+def test_rescore_orders_by_exact_distance_and_strips_vectors() -> None:
+    query = [1.0, 0.0, 0.0, 0.0]
+    near = np.array([0.9, 0.1, 0.0, 0.0], dtype=np.float32)
+    far = np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32)
+    hits = [
+        # The approximate scores rank the far vector first
+        {
+            "_id": "far",
+            "_score": 0.9,
+            "_source": {EXACT_EMBEDDING_FIELD: encode_exact(far)},
+        },
+        {
+            "_id": "near",
+            "_score": 0.1,
+            "_source": {EXACT_EMBEDDING_FIELD: encode_exact(near)},
+        },
+        {"_id": "plain", "_score": 0.2, "_source": {"text": "no exact vector"}},
+    ]
+    rescored = rescore_hits(hits, query, top_k=2)
+    assert [hit["_id"] for hit in rescored] == ["near", "far"]
+    assert rescored[0]["_score"] == pytest.approx(1 / (1 + 0.02))
+    assert rescored[1]["_score"] == pytest.approx(1 / (1 + 2.0))
+    assert all(EXACT_EMBEDDING_FIELD not in hit["_source"] for hit in rescored)
+    # The input hits are left untouched
+    assert EXACT_EMBEDDING_FIELD in hits[0]["_source"]
+    # Hits without an exact embedding keep their approximate score
+    assert rescore_hits(hits, query, top_k=3)[2]["_score"] == 0.2
@@ -0,0 +1,78 @@
+import time
+from typing import Any, Dict, List, Sequence, Tuple
+
+import pytest
+
+pytest.importorskip("streamlit")
+
+from src import reranker  # noqa: E402
+from src.reranker import rerank  # noqa: E402
+
+
+class _Model:
+    def __init__(self, seconds_per_batch: float = 0.0) -> None:
+        self.seconds_per_batch = seconds_per_batch
+        self.batches = 0
+
+    def predict(self, pairs: Sequence[Tuple[str, str]], **kwargs: Any) -> List[float]:
+        self.batches += 1
+        time.sleep(self.seconds_per_batch)
+        # Longer chunks are more relevant
+        return [float(len(text)) for _, text in pairs]
+
+
+def _hits(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"_id": f"chunk-{i}", "_score": 1.0, "_source": {"text": "x" * (i + 1)}}
+        for i in range(count)
+    ]
+
+
+@pytest.fixture(autouse=True)
+def empty_score_cache(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(reranker, "_score_cache", reranker.LRUCache(100))
+
+
+def test_rerank_orders_by_score_and_reuses_cached_scores(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    model = _Model()
+    monkeypatch.setattr(reranker, "get_reranker", lambda: model)
+    hits = _hits(5)
+    reranked = rerank("query", hits, top_k=3, batch_size=2)
+    assert [hit["_id"] for hit in reranked] == ["chunk-4", "chunk-3", "chunk-2"]
+    assert reranked[0]["_rerank_score"] == 5.0
+    assert model.batches == 3
+
+    rerank("  query ", hits, top_k=3, batch_size=2)
+    assert model.batches == 3
+
+
+def test_rerank_budget_excludes_model_loading(monkeypatch: pytest.MonkeyPatch) -> None:
+    model = _Model()
+
+    def slow_load() -> _Model:
+        time.sleep(0.05)
+        return model
+
+    monkeypatch.setattr(reranker, "get_reranker", slow_load)
+    reranked = rerank("query", _hits(4), top_k=4, budget_ms=20, batch_size=2)
+    assert all("_rerank_score" in hit for hit in reranked)
+
+
+def test_rerank_keeps_unscored_hits_in_retrieval_order(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    model = _Model(seconds_per_batch=0.03)
+    monkeypatch.setattr(reranker, "get_reranker", lambda: model)
+    reranked = rerank("query", _hits(6), top_k=6, budget_ms=20, batch_size=2)
+    assert model.batches == 1
+    assert [hit["_id"] for hit in reranked] == [
+        "chunk-1",
+        "chunk-0",
+        "chunk-2",
+        "chunk-3",
+        "chunk-4",
+        "chunk-5",
+    ]
+    assert "_rerank_score" not in reranked[2]